@@ -0,0 +1,158 @@
+"""
+Headless batch runner: generates a full campaign for every topic in a JSONL file.
+
+Each input line is a JSON object; the topic is read from `--topic-field` (or, by
+default, the first of "topic", "query", "title"). Pipelines run against the ADK
+server concurrently, and one result line is appended to the output JSONL as soon
+as each topic finishes.
+
+Usage:
+    python batch.py topics.jsonl -o results.jsonl --concurrency 8 --retries 2
+    python batch.py topics.jsonl --outputs blog,linkedin  # Only the blog and LinkedIn post
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from client import (
+    CONTENT_OUTPUTS, DRAFT_STATE_KEYS, ReportParser, StreamStats, create_new_session, stream_agent_events,
+    fetch_media_artifacts, build_run_payload, parse_content_brief, event_text,
+)
+from content_generation_agent.stats import percentile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("batch")
+
+DEFAULT_TOPIC_FIELDS = ("topic", "query", "title")
+
+class TopicFailed(Exception):
+    """Raised when a single pipeline attempt cannot complete."""
+
+def read_topics(path: str, topic_field: Optional[str]) -> List[Dict]:
+    """Loads `{"id", "topic"}` records from a JSONL file, skipping blank or topic-less lines."""
+    fields = (topic_field,) if topic_field else DEFAULT_TOPIC_FIELDS
+    topics = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            topic = next((record[field] for field in fields if record.get(field)), None)
+            if not topic:
+                logger.warning(f"Line {line_no}: no topic in fields {fields}, skipping.")
+                continue
+            topics.append({"id": record.get("request_id", record.get("id", line_no)), "topic": topic})
+    return topics
+
+def run_topic_once(topic: str, warm_start_mode: Optional[str] = None, requested: Optional[List[str]] = None) -> Dict:
+    """Runs one pipeline for `topic` (all outputs unless `requested` lists some) and returns its collected outputs."""
+    user_id, session_id, status = create_new_session(client_name="batch")
+    if not session_id:
+        raise TopicFailed(status)
+    state_delta = {}
+    if warm_start_mode:
+        state_delta["warm_start_mode"] = warm_start_mode
+    if requested:
+        state_delta["requested_outputs"] = requested
+
+    outputs: Dict = {}
+    stats = StreamStats()
+    report_parser = ReportParser()
+    report_streamed = False
+    for event in stream_agent_events(build_run_payload(topic, user_id, session_id, state_delta or None), stats):
+        if event.get("error"):
+            raise TopicFailed(event["error"])
+        state_delta = event.get("actions", {}).get("stateDelta", {})
+        for key, output_key in DRAFT_STATE_KEYS.items():
+            if key in state_delta:
+                outputs[output_key] = state_delta[key]
+        for key in ("warm_start", "critical_path", "dependency_outputs"):
+            if key in state_delta:
+                outputs[key] = state_delta[key]
+        if "content_brief" in state_delta:
+            outputs["strategy_brief"] = parse_content_brief(state_delta["content_brief"])
+        if event.get("author") == "SynthesisAgent" and event_text(event):
+            if event.get("partial"):
+                report_streamed = True
+                outputs.update(report_parser.feed(event_text(event)))
+            elif not report_streamed:
+                outputs.update(report_parser.feed(event_text(event)))
+    outputs.update(report_parser.close())
+
+    images, audio = [], None
+    for update in fetch_media_artifacts(user_id, session_id, requested or None):
+        images, audio, _ = update  # Keep the final, complete set
+    return {"session_id": session_id, "outputs": outputs, "media": {"images": images, "audio": audio},
+            "stream": stats.summary()}
+
+def run_topic(item: Dict, retries: int, retry_backoff: float, warm_start_mode: Optional[str] = None,
+              requested: Optional[List[str]] = None) -> Dict:
+    """Runs a topic with retries, each attempt in a fresh session."""
+    started = time.monotonic()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            result = run_topic_once(item["topic"], warm_start_mode, requested)
+            return {**item, "status": "ok", "attempts": attempt, "wall_time_s": round(time.monotonic() - started, 3), **result}
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"[{item['id']}] Attempt {attempt} failed: {error}")
+            if attempt <= retries:
+                time.sleep(retry_backoff * 2 ** (attempt - 1))
+    return {**item, "status": "error", "attempts": retries + 1, "wall_time_s": round(time.monotonic() - started, 3), "error": error}
+
+def run_batch(topics: List[Dict], output_path: str, concurrency: int, retries: int, retry_backoff: float,
+              warm_start_mode: Optional[str] = None, requested: Optional[List[str]] = None) -> Dict:
+    """Runs all topics with at most `concurrency` pipelines in flight and returns a summary."""
+    started = time.monotonic()
+    wall_times, failed = [], 0
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_topic, item, retries, retry_backoff, warm_start_mode, requested) for item in topics]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            wall_times.append(result["wall_time_s"])
+            failed += result["status"] != "ok"
+            logger.info(f"[{done}/{len(topics)}] {result['id']}: {result['status']} in {result['wall_time_s']:.1f}s")
+
+    elapsed = time.monotonic() - started
+    return {
+        "topics": len(topics),
+        "succeeded": len(topics) - failed,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_topics_per_min": round(len(topics) / elapsed * 60, 2) if elapsed else 0.0,
+        "wall_time_p50_s": percentile(wall_times, 50),
+        "wall_time_p95_s": percentile(wall_times, 95),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the content pipeline for every topic in a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one topic per line.")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file results are appended to.")
+    parser.add_argument("--topic-field", help=f"Field holding the topic (default: first of {', '.join(DEFAULT_TOPIC_FIELDS)}).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pipelines running against the ADK server at once.")
+    parser.add_argument("--retries", type=int, default=2, help="Extra attempts per topic after a failure.")
+    parser.add_argument("--retry-backoff", type=float, default=5.0, help="Seconds before the first retry; doubles each time.")
+    parser.add_argument("--warm-start", choices=["auto", "offer", "off"],
+                        help="Reuse strategy and research from near-duplicate past topics (default: the server's TOPIC_WARM_START).")
+    parser.add_argument("--outputs", help=f"Comma-separated outputs to generate (default: all of {','.join(CONTENT_OUTPUTS)}).")
+    args = parser.parse_args(argv)
+    requested = [output.strip() for output in args.outputs.split(",") if output.strip()] if args.outputs else None
+    unknown = set(requested or ()) - set(CONTENT_OUTPUTS)
+    if unknown:
+        parser.error(f"unknown outputs: {', '.join(sorted(unknown))}")
+
+    topics = read_topics(args.input, args.topic_field)
+    logger.info(f"Running {len(topics)} topics with concurrency {args.concurrency}...")
+    summary = run_batch(topics, args.output, args.concurrency, args.retries, args.retry_backoff, args.warm_start, requested)
+    print(json.dumps(summary, indent=2))
+    return 0 if not summary["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
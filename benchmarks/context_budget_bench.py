@@ -0,0 +1,83 @@
+"""
+Offline benchmark of writer context budgeting.
+
+Builds a synthetic research dossier of about `--words` words (sections of
+paragraphs, some on the brief's keywords and some off-topic) and a matching brief,
+then compares the dossier and brief tokens sent to the six writers over
+`--iterations` loop iterations with the full inputs against the condensed views.
+Also reports how long building the views takes and what each view dropped.
+
+Usage:
+    python benchmarks/context_budget_bench.py --words 5000 --iterations 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from content_generation_agent.context_budget import VIEW_KEYS, ContextBudget, estimate_tokens
+from content_generation_agent import constants as K
+
+BRIEF = {
+    "topic": "AI agents in software engineering",
+    "audience": "engineering managers",
+    "goal": "inform",
+    "tone": "professional",
+    "keywords": ["AI agents", "developer productivity", "code review", "automation"],
+    "search_queries": ["impact of AI agents on software engineering", "AI coding assistants productivity study"],
+}
+ON_TOPIC = "agents developer productivity code review automation engineering software teams adoption".split()
+FILLER = ("the a study report found that in of and with for market growth companies survey analysts "
+          "percent year region customers vendors platform pricing history background").split()
+
+def build_dossier(words: int, rng: random.Random) -> str:
+    sections, total = [], 0
+    while total < words:
+        paragraphs = []
+        for _ in range(rng.randint(2, 5)):
+            vocabulary = FILLER + (ON_TOPIC if rng.random() < 0.4 else [])
+            sentences = []
+            for _ in range(rng.randint(3, 6)):
+                sentence = [rng.choice(vocabulary) for _ in range(rng.randint(10, 20))]
+                if rng.random() < 0.3:
+                    sentence.append(f"{rng.randint(5, 95)}%")
+                sentences.append(" ".join(sentence).capitalize() + ".")
+            paragraphs.append(" ".join(sentences))
+            total += sum(len(s.split()) for s in sentences)
+        sections.append(f"## Section {len(sections) + 1}\n\n" + "\n\n".join(paragraphs))
+    return "\n\n".join(sections)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-platform dossier views against the full dossier.")
+    parser.add_argument("--words", type=int, default=5000, help="Approximate dossier length in words.")
+    parser.add_argument("--iterations", type=int, default=3, help="Writer iterations per creation loop.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    brief = json.dumps(BRIEF)
+    dossier = build_dossier(args.words, random.Random(args.seed))
+    started = time.perf_counter()
+    views, audit = ContextBudget().views(brief, dossier)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    full = len(VIEW_KEYS) * args.iterations * (estimate_tokens(brief) + estimate_tokens(dossier))
+    condensed = args.iterations * sum(estimate_tokens(views[K.STATE_BRIEF_VIEW]) + estimate_tokens(views[key])
+                                      for key in VIEW_KEYS.values())
+    summary = {
+        "dossier_tokens": estimate_tokens(dossier),
+        "writer_input_tokens_full": full,
+        "writer_input_tokens_condensed": condensed,
+        "saved_percent": round(100 * (1 - condensed / full), 1),
+        "build_views_ms": round(build_ms, 2),
+        "views": {view: {"tokens_out": record["tokens_out"], "truncated": len(record["truncated"]),
+                         "dropped": len(record["dropped"])} for view, record in audit["views"].items()},
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
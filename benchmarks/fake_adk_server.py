@@ -0,0 +1,225 @@
+"""
+Local stand-in for the ADK API server, for load testing the client without Gemini.
+
+Implements the endpoints `client.py` talks to:
+    POST/GET /apps/{app}/users/{user}/sessions/{session}
+    POST     /run_sse
+    GET      /apps/{app}/users/{user}/sessions/{session}/artifacts/{name}[/versions/{version}]
+
+`/run_sse` either replays a recorded event log (a JSON array as produced by the
+UI's "Download Full Event Log" button, or JSONL) or generates a synthetic run
+shaped like the real pipeline. Delays and payload sizes are configurable, and the
+synthetic run can publish the podcast in parts (`audio_progress` events) while its
+simulated TTS runs, and list image previews in an `image_artifacts` manifest.
+
+Usage:
+    python benchmarks/fake_adk_server.py --port 8100 --event-delay 0.01 --draft-kb 4
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+SESSION_PATH = re.compile(r"^/apps/[^/]+/users/([^/]+)/sessions/([^/]+)$")
+ARTIFACT_PATH = re.compile(r"^/apps/[^/]+/users/[^/]+/sessions/[^/]+/artifacts/([^/?]+)")
+
+# (author, state key written, share of --draft-kb) in the order the real pipeline emits them.
+SYNTHETIC_AGENTS = [
+    ("QueryCaptureAgent", "user_query", 0.02),
+    ("StrategyAgent", "content_brief", 0.1),
+    ("QueryExtractorAgent", "search_queries_list", 0.02),
+    ("DossierAggregatorAgent", "research_dossier", 1.0),
+    ("BlogPostWriterAgent", "blog_draft", 1.0),
+    ("LinkedInPostWriterAgent", "linkedin_draft", 0.3),
+    ("XPostWriterAgent", "x_post_draft", 0.05),
+    ("ThreadsPostWriterAgent", "threads_post_draft", 0.2),
+    ("PodcastScriptWriterAgent", "podcast_draft", 1.0),
+    ("ImagePromptGeneratorAgent", "image_prompt", 0.05),
+    ("ImageGeneratorAgent", "image_generation_status", 0.02),
+    ("AudioProducerAgent", "audio_generation_status", 0.02),
+]
+REPORT_SECTIONS = ["BLOG_POST", "LINKEDIN_POST", "X_POST", "THREADS_POST", "PODCAST_SCRIPT", "IMAGE_PROMPT", "MEDIA_STATUS"]
+
+class FakeADKState:
+    """Configuration and per-session storage shared by all request handlers."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.event_delay = args.event_delay
+        self.partial_chunks = args.partial_chunks
+        self.draft_bytes = int(args.draft_kb * 1024)
+        self.artifact_delay = args.artifact_delay
+        self.tts_seconds = args.tts_seconds
+        self.audio_parts = args.audio_parts
+        self.recorded_events = load_recorded_events(args.replay) if args.replay else None
+        self.image_previews = args.image_previews
+        rng = random.Random(0)
+        raw = {"png": rng.randbytes(int(args.image_kb * 1024)), "wav": rng.randbytes(int(args.audio_kb * 1024)),
+               "webp": rng.randbytes(int(args.preview_kb * 1024))}
+        self.artifacts = {extension: base64.urlsafe_b64encode(data).decode() for extension, data in raw.items()}
+        self.sessions: Dict[str, List[Dict]] = {}
+        self.lock = threading.Lock()
+
+    def synthetic_events(self, query: str) -> List[Dict]:
+        text_unit = f"{query} lorem ipsum dolor sit amet. "
+        events = []
+        for author, state_key, share in SYNTHETIC_AGENTS:
+            if author == "AudioProducerAgent":
+                events += self.audio_part_events()
+            body = (text_unit * (1 + int(self.draft_bytes * share) // len(text_unit)))[:max(1, int(self.draft_bytes * share))]
+            step = max(1, len(body) // self.partial_chunks)
+            for start in range(0, len(body), step):
+                events.append({"author": author, "partial": True, "content": {"role": "model", "parts": [{"text": body[start:start + step]}]}})
+            events.append({"author": author, "content": {"role": "model", "parts": [{"text": body}]},
+                           "actions": {"stateDelta": {state_key: body}}})
+            if author == "ImageGeneratorAgent" and self.image_previews:
+                events[-1]["actions"]["stateDelta"]["image_artifacts"] = self.image_manifest()
+        report = "\n---\n".join(f"**{name}_START**\n{text_unit * 4}\n**{name}_END**" for name in REPORT_SECTIONS)
+        step = max(1, len(report) // self.partial_chunks)
+        for start in range(0, len(report), step):
+            events.append({"author": "SynthesisAgent", "partial": True, "content": {"role": "model", "parts": [{"text": report[start:start + step]}]}})
+        events.append({"author": "SynthesisAgent", "content": {"role": "model", "parts": [{"text": report}]}})
+        events.append({"author": "ContentPipelineAgent", "actions": {"stateDelta": {"critical_path": [
+            {"agent": "WarmStartAgent", "start_s": 0.0, "end_s": 1.0, "duration_s": 1.0},
+            {"agent": "SynthesisAgent", "start_s": 1.0, "end_s": 1.1, "duration_s": 0.1},
+        ]}}})
+        return events
+
+    def image_manifest(self) -> List[Dict]:
+        """The `image_artifacts` manifest of four images with previews.
+
+        Every run gets fresh hashes, like new images would, so the client's media cache
+        does not skip their downloads (all images are served with the same bytes).
+        """
+        def fresh_hash() -> str:
+            return hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+        return [{"artifact_name": f"generated_image_{i}.png", "version": 0, "sha256": fresh_hash(),
+                 "preview": {"artifact_name": f"generated_image_{i}_preview.webp", "version": 0, "sha256": fresh_hash()}}
+                for i in range(1, 5)]
+
+    def audio_part_events(self) -> List[Dict]:
+        """Spreads `--tts-seconds` of synthesis over `--audio-parts` published parts (or one wait without parts)."""
+        if not self.audio_parts:
+            return [{"author": "AudioProducerAgent", "_delay": self.tts_seconds}]
+        return [{"author": "AudioProducerAgent", "_delay": self.tts_seconds / self.audio_parts,
+                 "actions": {"stateDelta": {"audio_progress": {
+                     "part": part, "artifact_name": f"podcast_episode_part_{part:03d}.wav", "version": 0,
+                     "segments_ready": part, "segments": self.audio_parts}},
+                     "artifactDelta": {f"podcast_episode_part_{part:03d}.wav": 0}}}
+                for part in range(1, self.audio_parts + 1)]
+
+def load_recorded_events(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+class FakeADKHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: FakeADKState  # Set on the subclass built by `make_server`
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        if self.path == "/run_sse":
+            return self._run_sse(self._read_json())
+        match = SESSION_PATH.match(self.path)
+        if not match:
+            return self._send_json({"detail": "Not Found"}, 404)
+        self._read_json()
+        user_id, session_id = match.groups()
+        with self.state.lock:
+            self.state.sessions[session_id] = []
+        self._send_json({"id": session_id, "appName": "content_generation_agent", "userId": user_id, "state": {}, "events": []})
+
+    def do_GET(self):
+        artifact = ARTIFACT_PATH.match(self.path)
+        if artifact:
+            time.sleep(self.state.artifact_delay)
+            extension = artifact.group(1).rsplit(".", 1)[-1]
+            if extension not in self.state.artifacts:
+                return self._send_json({"detail": "Artifact not found"}, 404)
+            return self._send_json({"inlineData": {"data": self.state.artifacts[extension], "mimeType": f"application/{extension}"}})
+        match = SESSION_PATH.match(self.path)
+        if not match:
+            return self._send_json({"detail": "Not Found"}, 404)
+        with self.state.lock:
+            events = list(self.state.sessions.get(match.group(2), []))
+        self._send_json({"id": match.group(2), "events": events})
+
+    def _run_sse(self, request: Dict):
+        parts = (request.get("new_message") or {}).get("parts") or [{}]
+        query = parts[0].get("text", "topic")
+        template = self.state.recorded_events or self.state.synthetic_events(query)
+        invocation_id = request.get("invocation_id") or f"e-{uuid.uuid4()}"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for template_event in template:
+            template_event = dict(template_event)
+            time.sleep(template_event.pop("_delay", self.state.event_delay))
+            event = {**template_event, "id": str(uuid.uuid4()), "invocationId": invocation_id, "timestamp": time.time()}
+            if not event.get("partial"):
+                with self.state.lock:
+                    self.state.sessions.setdefault(request.get("session_id"), []).append(event)
+            frame = f"data: {json.dumps(event)}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+def make_server(args: argparse.Namespace) -> ThreadingHTTPServer:
+    handler = type("ConfiguredFakeADKHandler", (FakeADKHandler,), {"state": FakeADKState(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    return server
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake ADK API server for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--replay", help="Recorded event log (JSON array or JSONL) to stream instead of synthetic events.")
+    parser.add_argument("--event-delay", type=float, default=0.01, help="Seconds between streamed events.")
+    parser.add_argument("--partial-chunks", type=int, default=10, help="Partial events emitted per synthetic agent output.")
+    parser.add_argument("--draft-kb", type=float, default=4, help="Size of the largest synthetic draft, in KiB.")
+    parser.add_argument("--image-kb", type=float, default=512, help="Size of each image artifact, in KiB.")
+    parser.add_argument("--audio-kb", type=float, default=2048, help="Size of the audio artifact, in KiB.")
+    parser.add_argument("--artifact-delay", type=float, default=0.05, help="Seconds before each artifact response.")
+    parser.add_argument("--image-previews", action="store_true", help="Publish an image manifest with preview artifacts.")
+    parser.add_argument("--preview-kb", type=float, default=16, help="Size of each image preview artifact, in KiB.")
+    parser.add_argument("--tts-seconds", type=float, default=0.0, help="Simulated podcast synthesis time before the audio status.")
+    parser.add_argument("--audio-parts", type=int, default=0, help="Podcast parts published during synthesis (0: only the full episode).")
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    args = build_arg_parser().parse_args(argv)
+    server = make_server(args)
+    print(f"Fake ADK server listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
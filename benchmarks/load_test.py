@@ -0,0 +1,201 @@
+"""
+Load driver: runs N concurrent `run_content_pipeline` generators against an ADK server.
+
+By default it starts `fake_adk_server.py` in a subprocess, so the numbers reflect
+only the Gradio process's client hot path (SSE parsing, frame coalescing, artifact
+downloads) and need no network access or Gemini quota.
+
+Reports p50/p95/p99 latency per stage (including the time until the podcast
+player receives its first audio and until the gallery shows all four images after
+the stream), artifact bytes downloaded per session, events per second, UI frame bytes, traced
+memory per session and CPU usage of this process. With `--max-p95-total` the exit
+status fails when the end-to-end p95 regresses past the given seconds (for CI).
+
+Usage:
+    python benchmarks/load_test.py --sessions 20 --concurrency 10 -- --event-delay 0.005 --draft-kb 8
+Arguments after `--` are passed to the fake server.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ["session", "first_event", "first_audio", "stream", "gallery", "artifacts", "total"]
+
+def start_fake_server(port: int, server_args: List[str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "benchmarks", "fake_adk_server.py"), "--port", str(port), *server_args],
+        stdout=subprocess.PIPE, text=True,
+    )
+    process.stdout.readline()  # Wait for the "listening" banner
+    return process
+
+class SessionTimings(threading.local):
+    """Per-thread stage timestamps filled in by the instrumented client functions."""
+    stream_started: Optional[float] = None
+    first_event: Optional[float] = None
+    stream_done: Optional[float] = None
+    artifacts_started: Optional[float] = None
+    artifacts_done: Optional[float] = None
+    events: int = 0
+
+class DownloadCounter:
+    """Decoded artifact bytes downloaded by all sessions (downloads run on the shared artifact pool)."""
+
+    def __init__(self):
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, client_module):
+        iter_inline_data = client_module._iter_inline_data
+
+        def counted(chunks):
+            for data in iter_inline_data(chunks):
+                with self._lock:
+                    self.bytes += len(data)
+                yield data
+
+        client_module._iter_inline_data = counted
+
+def instrument(main_module, timings: SessionTimings):
+    """Wraps the client functions `main` imported so each stage boundary is timestamped."""
+    stream_agent_events, fetch_media_artifacts = main_module.stream_agent_events, main_module.fetch_media_artifacts
+
+    def timed_stream(*args, **kwargs):
+        # The UI reads the stream on a background thread, so bind the calling session's timings here
+        session = vars(timings)
+        session["stream_started"] = time.perf_counter()
+
+        def events():
+            for event in stream_agent_events(*args, **kwargs):
+                if session["first_event"] is None:
+                    session["first_event"] = time.perf_counter()
+                session["events"] += 1
+                yield event
+            session["stream_done"] = time.perf_counter()
+        return events()
+
+    def timed_fetch(*args, **kwargs):
+        timings.artifacts_started = time.perf_counter()
+        yield from fetch_media_artifacts(*args, **kwargs)
+        timings.artifacts_done = time.perf_counter()
+
+    main_module.stream_agent_events = timed_stream
+    main_module.fetch_media_artifacts = timed_fetch
+
+def run_session(main_module, timings: SessionTimings, index: int) -> Dict:
+    for field in ("stream_started", "first_event", "stream_done", "artifacts_started", "artifacts_done"):
+        setattr(timings, field, None)
+    timings.events = 0
+
+    started = time.perf_counter()
+    user_id, session_id, _ = main_module.create_new_session()
+    session_created = time.perf_counter()
+    frames, frame_bytes = 0, 0
+    first_audio = gallery_full = None
+    audio_index = main_module.UI_OUTPUT_KEYS.index("audio")
+    images_index = main_module.UI_OUTPUT_KEYS.index("images")
+    for frame in main_module.run_content_pipeline(f"Load test topic {index}", user_id, session_id):
+        frames += 1
+        if first_audio is None and isinstance(frame[audio_index], str):
+            first_audio = time.perf_counter()
+        if gallery_full is None and isinstance(frame[images_index], list) and len(frame[images_index]) == 4:
+            gallery_full = time.perf_counter()
+        frame_bytes += len(json.dumps(frame[:-1], default=str))  # Last value is the server-side gr.State
+    finished = time.perf_counter()
+
+    return {
+        "session": session_created - started,
+        "first_event": (timings.first_event or finished) - (timings.stream_started or session_created),
+        "first_audio": (first_audio or finished) - (timings.stream_started or session_created),
+        "stream": (timings.stream_done or finished) - (timings.stream_started or session_created),
+        "gallery": (gallery_full or finished) - (timings.stream_done or finished),
+        "artifacts": (timings.artifacts_done or finished) - (timings.artifacts_started or finished),
+        "total": finished - started,
+        "events": timings.events,
+        "frames": frames,
+        "frame_bytes": frame_bytes,
+    }
+
+def summarize(results: List[Dict], elapsed: float, cpu_seconds: float, peak_traced: int, concurrency: int, percentile) -> Dict:
+    latency = {
+        stage: {f"p{pct}": round(percentile([r[stage] for r in results], pct), 4) for pct in (50, 95, 99)}
+        for stage in STAGES
+    }
+    total_events = sum(r["events"] for r in results)
+    return {
+        "sessions": len(results),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "latency_s": latency,
+        "events_per_s": round(total_events / elapsed, 1) if elapsed else 0.0,
+        "frames_per_session": round(sum(r["frames"] for r in results) / len(results), 1),
+        "frame_kb_per_session": round(sum(r["frame_bytes"] for r in results) / len(results) / 1024, 1),
+        "traced_peak_mb": round(peak_traced / 2**20, 2),
+        "traced_kb_per_concurrent_session": round(peak_traced / 1024 / concurrency, 1),
+        "ui_cpu_s": round(cpu_seconds, 3),
+        "ui_cpu_percent": round(cpu_seconds / elapsed * 100, 1) if elapsed else 0.0,
+        "ui_max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    server_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    own_args = argv[:argv.index("--")] if "--" in argv else argv
+
+    parser = argparse.ArgumentParser(description="Concurrent load test of the Gradio pipeline function.")
+    parser.add_argument("--sessions", type=int, default=20, help="Total pipeline runs.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Pipeline generators running at once.")
+    parser.add_argument("--server-url", help="Use an already running server instead of starting the fake one.")
+    parser.add_argument("--port", type=int, default=8100, help="Port for the fake server.")
+    parser.add_argument("--output", help="Also write the JSON summary to this file.")
+    parser.add_argument("--max-p95-total", type=float, help="Exit non-zero if the end-to-end p95 exceeds this many seconds.")
+    args = parser.parse_args(own_args)
+
+    server = None
+    if not args.server_url:
+        server = start_fake_server(args.port, server_args)
+        args.server_url = f"http://127.0.0.1:{args.port}"
+    os.environ["ADK_API_BASE_URL"] = args.server_url
+    sys.path.insert(0, REPO_ROOT)
+    import main as main_module  # Imported late so the client picks up ADK_API_BASE_URL
+    import client as client_module
+    from content_generation_agent.stats import percentile
+
+    timings = SessionTimings()
+    instrument(main_module, timings)
+    downloads = DownloadCounter()
+    downloads.wrap(client_module)
+    try:
+        tracemalloc.start()
+        cpu_started, started = time.process_time(), time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda i: run_session(main_module, timings, i), range(args.sessions)))
+        elapsed, cpu_seconds = time.perf_counter() - started, time.process_time() - cpu_started
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if server:
+            server.terminate()
+
+    summary = summarize(results, elapsed, cpu_seconds, peak_traced, args.concurrency, percentile)
+    summary["artifact_kb_per_session"] = round(downloads.bytes / 1024 / len(results), 1)
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.max_p95_total is not None and summary["latency_s"]["total"]["p95"] > args.max_p95_total:
+        print(f"FAIL: total p95 {summary['latency_s']['total']['p95']}s > {args.max_p95_total}s", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
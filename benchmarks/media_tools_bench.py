@@ -0,0 +1,90 @@
+"""
+Offline benchmark of event-loop lag while the media tools run.
+
+Stand-ins for the Imagen and TTS clients are placed in the tools' shared client
+slots. The Imagen stand-in blocks its thread for `--imagen-seconds` like the
+real synchronous SDK; the TTS stand-in is async. `--calls` image and audio tool
+calls run concurrently while `EventLoopLagMonitor` probes the loop. The same
+workload then runs with the Imagen call made directly on the event loop (how the
+tool used to call the SDK) for comparison.
+
+Usage:
+    python benchmarks/media_tools_bench.py --calls 4 --imagen-seconds 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from content_generation_agent import tools
+from content_generation_agent.tracing import EventLoopLagMonitor, Tracer
+
+class BlockingImagen:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def generate_images(self, **kwargs):
+        time.sleep(self.seconds)
+        return SimpleNamespace(images=[SimpleNamespace(_image_bytes=b"\x89PNG") for _ in range(4)])
+
+class AsyncTts:
+    def __init__(self, seconds: float):
+        async def generate_content(**kwargs):
+            await asyncio.sleep(seconds)
+            part = SimpleNamespace(inline_data=SimpleNamespace(data=b"\x00\x00" * 24000))
+            return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+class FakeToolContext:
+    agent_name = "bench"
+
+    async def save_artifact(self, filename, artifact):
+        return 0
+
+async def run(args, offload: bool) -> dict:
+    monitor = EventLoopLagMonitor(Tracer(), interval=0.01)
+    monitor.ensure_started()
+    original = tools.run_blocking
+    if not offload:
+        async def on_loop(fn, timeout):
+            return fn()
+        tools.run_blocking = on_loop
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(
+            [tools.generate_images_tool("a prompt", FakeToolContext()) for _ in range(args.calls)] +
+            [tools.generate_podcast_audio_tool("Alex: hi\nBen: hello", FakeToolContext()) for _ in range(args.calls)]
+        ))
+    finally:
+        tools.run_blocking = original
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.05)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "succeeded": sum(json.loads(result)["status"] == "success" for result in results),
+        "max_loop_lag_ms": round(monitor.report() * 1000, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure event-loop lag while image and audio tools run.")
+    parser.add_argument("--calls", type=int, default=4, help="Concurrent calls of each media tool.")
+    parser.add_argument("--imagen-seconds", type=float, default=0.5, help="Seconds each stand-in Imagen call blocks.")
+    parser.add_argument("--tts-seconds", type=float, default=0.5, help="Seconds each stand-in TTS call takes.")
+    args = parser.parse_args(argv)
+
+    tools.rate_governor = None  # Measure the tools alone
+    tools._clients.update(imagen=BlockingImagen(args.imagen_seconds), genai=AsyncTts(args.tts_seconds))
+    summary = {
+        "sdk_call_on_event_loop": asyncio.run(run(args, offload=False)),
+        "sdk_call_offloaded": asyncio.run(run(args, offload=True)),
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Offline benchmark of chunked, parallel podcast TTS.
+
+Builds a synthetic two-host script of `--turns` turns and renders it with a
+stand-in TTS call whose latency grows with the text length (`--ms-per-char`
+plus a fixed `--overhead`) and which fails `--failure-rate` of the time. The
+whole script as one request (the previous behaviour, no retries) is compared
+with chunked synthesis. A revised script with `--edits` changed lines is then
+rendered again against the warm segment cache.
+
+Usage:
+    python benchmarks/podcast_tts_bench.py --turns 60 --ms-per-char 0.5 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from content_generation_agent.podcast_audio import PodcastSynthesizer, SegmentAudioStore, pcm_to_wav, split_script
+
+WORDS = ("agents models teams review code latency budget research draft audience platform "
+         "growth launch feedback quality metrics pipeline deploy users weekly").split()
+
+def build_script(turns: int, rng: random.Random) -> List[str]:
+    lines = []
+    for i in range(turns):
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 18))).capitalize() + "."
+                     for _ in range(rng.randint(1, 4))]
+        lines.append(f"{'Alex' if i % 2 == 0 else 'Ben'}: {' '.join(sentences)}")
+    return lines
+
+class StandInTts:
+    def __init__(self, ms_per_char: float, overhead: float, failure_rate: float, rng: random.Random):
+        self.ms_per_char, self.overhead, self.failure_rate, self.rng = ms_per_char, overhead, failure_rate, rng
+        self.calls = 0
+
+    async def __call__(self, text: str) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.overhead + len(text) * self.ms_per_char / 1000)
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError("503 UNAVAILABLE")
+        return b"\x01\x00" * (len(text) * 60)  # Roughly 2.5 ms of audio per character
+
+async def render(synthesizer: Optional[PodcastSynthesizer], script: str, tts: StandInTts) -> dict:
+    """Renders with `synthesizer`, or as one request without retries when it is None."""
+    started = time.perf_counter()
+    try:
+        if synthesizer:
+            wav, run = await synthesizer.synthesize(script, tts)
+        else:
+            wav, run = pcm_to_wav(await tts(script)), {}
+        outcome = {"ok": True, "wav_kb": len(wav) // 1024, **run}
+    except Exception as e:
+        outcome = {"ok": False, "error": str(e)}
+    return {"elapsed_s": round(time.perf_counter() - started, 2), "tts_calls": tts.calls, **outcome}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare one-request TTS with chunked, parallel, cached TTS.")
+    parser.add_argument("--turns", type=int, default=60, help="Turns in the synthetic script.")
+    parser.add_argument("--ms-per-char", type=float, default=0.5, help="Stand-in TTS latency per character.")
+    parser.add_argument("--overhead", type=float, default=0.3, help="Stand-in TTS latency per request in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Share of stand-in TTS requests that fail.")
+    parser.add_argument("--edits", type=int, default=2, help="Lines changed in the revised script.")
+    parser.add_argument("--max-chars", type=int, default=1500)
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    lines = build_script(args.turns, rng)
+    script = "\n".join(lines)
+    revised = list(lines)
+    for index in rng.sample(range(len(lines)), args.edits):
+        revised[index] = revised[index].rstrip(".") + ", and that matters."
+
+    def tts() -> StandInTts:
+        return StandInTts(args.ms_per_char, args.overhead, args.failure_rate, random.Random(args.seed))
+
+    chunked = PodcastSynthesizer(SegmentAudioStore(), max_chars=args.max_chars, parallelism=args.parallelism,
+                                 retries=2, retry_base_seconds=0.05)
+    summary = {
+        "script_chars": len(script),
+        "segments": len(split_script(script, args.max_chars)),
+        "single_request": asyncio.run(render(None, script, tts())),
+        "chunked": asyncio.run(render(chunked, script, tts())),
+        "chunked_revised": asyncio.run(render(chunked, "\n".join(revised), tts())),
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Offline benchmark of the research-stage search cache.
+
+Simulates a week of campaigns: `--sessions` research stages run `--concurrency` at a
+time, each searching `--queries` strings drawn from a small pool of topics and
+re-phrased with the variations real briefs produce (case, punctuation, stopwords,
+word order). Searches go to `LocalSearchBackend`, so no network or quota is used.
+
+Runs once without and once with the cache and reports backend calls, hit /
+coalesced counts and wall time for each.
+
+Usage:
+    python benchmarks/search_cache_bench.py --sessions 200 --concurrency 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from content_generation_agent.search_cache import LocalSearchBackend, SearchCache, SearchResultStore
+
+TOPIC_POOL = [
+    "impact of AI agents on software engineering",
+    "best practices for remote team productivity",
+    "future of electric vehicles in Europe",
+    "how small businesses use generative AI",
+    "latest trends in cloud cost optimization",
+    "benefits of a four day work week",
+    "quantum computing use cases for finance",
+    "sustainable packaging innovations",
+]
+
+def rephrase(query: str, rng: random.Random) -> str:
+    words = query.split()
+    if rng.random() < 0.3:
+        words = words[len(words) // 2:] + words[:len(words) // 2]
+    text = " ".join(words)
+    text = rng.choice([text, text.lower(), text.title(), text.upper()])
+    return rng.choice(["", "The ", "What is the "]) + text + rng.choice(["", "?", "  ", "."])
+
+def build_sessions(sessions: int, queries: int, seed: int) -> List[List[str]]:
+    rng = random.Random(seed)
+    return [[rephrase(rng.choice(TOPIC_POOL), rng) for _ in range(queries)] for _ in range(sessions)]
+
+async def run(workload: List[List[str]], concurrency: int, latency: float, use_cache: bool) -> Dict:
+    backend = LocalSearchBackend(latency=latency)
+    cache = SearchCache(SearchResultStore()) if use_cache else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def research_stage(queries: List[str]):
+        async with semaphore:
+            if cache:
+                await asyncio.gather(*(cache.search(query, backend) for query in queries))
+            else:
+                await asyncio.gather(*(backend(query) for query in queries))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(research_stage(queries) for queries in workload))
+    result = {"backend_calls": backend.calls, "elapsed_s": round(time.perf_counter() - started, 3)}
+    if cache:
+        result.update(cache.metrics())
+    return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the search cache against the local search backend.")
+    parser.add_argument("--sessions", type=int, default=200, help="Research stages to simulate.")
+    parser.add_argument("--queries", type=int, default=2, help="Search queries per session.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Research stages running at once.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per backend search.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workload = build_sessions(args.sessions, args.queries, args.seed)
+    summary = {
+        "sessions": args.sessions,
+        "searches": args.sessions * args.queries,
+        "uncached": asyncio.run(run(workload, args.concurrency, args.latency, use_cache=False)),
+        "cached": asyncio.run(run(workload, args.concurrency, args.latency, use_cache=True)),
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
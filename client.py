@@ -0,0 +1,575 @@
+# client.py
+"""
+HTTP client for the ADK API server, shared by the Gradio UI and the batch runner.
+
+Holds everything that talks to the server without depending on Gradio: the pooled
+HTTP session, the resumable SSE reader, artifact downloads into the media cache,
+and parsing of the SynthesisAgent's final report.
+"""
+import requests
+import uuid
+import json
+import re
+import logging
+import time
+import tempfile
+import base64
+import os
+import hashlib
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Generator, Iterable, Iterator, NamedTuple, Optional, Tuple
+from requests.adapters import HTTPAdapter
+
+from content_generation_agent.stats import percentile
+
+# --- Configuration ---
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = os.environ.get("ADK_API_BASE_URL", "http://127.0.0.1:8000")
+APP_NAME = "content_generation_agent"  # This must match your agent's directory name
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))  # Keep-alive connections to the ADK server
+ARTIFACT_FETCH_WORKERS = int(os.environ.get("ARTIFACT_FETCH_WORKERS", 8))  # Shared across all UI sessions
+MEDIA_CACHE_DIR = os.environ.get("MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "contentgen_media"))
+MEDIA_CACHE_MAX_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_MB", 512)) * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+SSE_READ_TIMEOUT = int(os.environ.get("SSE_READ_TIMEOUT", 600))  # Max silence on /run_sse before the stream is treated as dropped
+SSE_MAX_RESUMES = int(os.environ.get("SSE_MAX_RESUMES", 5))  # Reconnect attempts per run before giving up
+# Token-level partial events from every LLM agent; no agent's output is rendered incrementally, so they are off by default
+STREAM_PARTIAL_EVENTS = os.environ.get("ADK_STREAMING", "0") == "1"
+
+IMAGE_ARTIFACTS = [f"generated_image_{i}.png" for i in range(1, 5)]
+AUDIO_ARTIFACT = "podcast_episode.wav"
+AUDIO_PROGRESS_KEY = "audio_progress"  # State key announcing each published part of the episode
+IMAGE_MANIFEST_KEY = "image_artifacts"  # State key listing each image's full and preview artifact with content hashes
+DEPENDENCY_OUTPUTS_KEY = "dependency_outputs"  # State key listing unrequested outputs the run produces for requested ones
+
+# Outputs a run can request (`requested_outputs` in session state); must match `constants.ALL_OUTPUTS`.
+CONTENT_OUTPUTS = ["blog", "linkedin", "x", "threads", "podcast", "podcast_audio", "images"]
+
+# Session state keys streamed back as `stateDelta` that map 1:1 onto output fields.
+DRAFT_STATE_KEYS = {
+    "image_prompt": "image_prompt", "blog_draft": "blog", "linkedin_draft": "linkedin",
+    "x_post_draft": "x_post", "threads_post_draft": "threads_post", "podcast_draft": "podcast",
+    "research_dossier": "dossier"
+}
+
+# --- Shared HTTP Client ---
+
+def _build_http_session() -> requests.Session:
+    """Builds a pooled HTTP session so every call to the ADK server reuses warm connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http_session = _build_http_session()
+artifact_executor = ThreadPoolExecutor(max_workers=ARTIFACT_FETCH_WORKERS, thread_name_prefix="artifact-fetch")
+
+# --- Media Cache ---
+
+class MediaCache:
+    """A size-bounded, content-addressed directory of downloaded media files.
+
+    Files are named by the SHA-256 of their bytes, so an artifact that was already
+    fetched is never written twice. When the directory grows past `max_bytes`, the
+    least recently used files are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # path -> size, oldest first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        existing = [entry for entry in os.scandir(directory) if entry.is_file() and not entry.name.startswith(".")]
+        for entry in sorted(existing, key=lambda e: e.stat().st_mtime):
+            self._entries[entry.path] = entry.stat().st_size
+            self._total_bytes += entry.stat().st_size
+
+    def store(self, chunks: Iterable[bytes], suffix: str) -> str:
+        """Streams `chunks` to disk and returns the path of the cached file."""
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=".partial-", delete=False) as tmp:
+            try:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        path = os.path.join(self.directory, f"{digest.hexdigest()}{suffix}")
+
+        with self._lock:
+            if path in self._entries:
+                os.unlink(tmp.name)
+                os.utime(path)
+                self._entries.move_to_end(path)
+                return path
+            os.replace(tmp.name, path)
+            self._entries[path] = size
+            self._total_bytes += size
+            self._evict(keep=path)
+        return path
+
+    def lookup(self, sha256: str, suffix: str) -> Optional[str]:
+        """Returns the cached file with these bytes, if any, so its download can be skipped."""
+        path = os.path.join(self.directory, f"{sha256}{suffix}")
+        with self._lock:
+            if path not in self._entries or not os.path.exists(path):
+                return None
+            os.utime(path)
+            self._entries.move_to_end(path)
+            return path
+
+    def _evict(self, keep: str):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = next(iter(self._entries.items()))
+            if path == keep:
+                break
+            del self._entries[path]
+            self._total_bytes -= size
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            logger.info(f"Evicted {os.path.basename(path)} from media cache ({self._total_bytes} bytes in use).")
+
+media_cache = MediaCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES)
+
+def _iter_inline_data(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Incrementally decodes `inlineData.data` from a streamed artifact JSON response.
+
+    The base64 payload is decoded in 4-byte-aligned slices as it arrives, so a large
+    WAV never has to exist in memory as JSON text, base64 text and raw bytes at once.
+    """
+    buffer = b""
+    marker_found = False
+    carry = b""
+    for chunk in chunks:
+        if not marker_found:
+            buffer += chunk
+            inline_at = buffer.find(b'"inlineData"')
+            match = re.search(rb'"data"\s*:\s*"', buffer[inline_at:]) if inline_at != -1 else None
+            if not match:
+                continue
+            marker_found = True
+            chunk = buffer[inline_at + match.end():]
+            buffer = b""
+
+        end = chunk.find(b'"')
+        data = carry + (chunk if end == -1 else chunk[:end])
+        aligned = len(data) - len(data) % 4
+        if aligned:
+            yield base64.urlsafe_b64decode(data[:aligned])
+        carry = data[aligned:]
+        if end != -1:
+            if carry:
+                yield base64.urlsafe_b64decode(carry + b"=" * (-len(carry) % 4))
+            return
+
+    raise ValueError("Artifact response did not contain complete inlineData.")
+
+# --- Report Parsing ---
+
+# Maps the SynthesisAgent's `<MARKER>_START` / `<MARKER>_END` blocks to UI state keys.
+REPORT_SECTIONS = {
+    "BLOG_POST": "blog",
+    "LINKEDIN_POST": "linkedin",
+    "X_POST": "x_post",
+    "THREADS_POST": "threads_post",
+    "PODCAST_SCRIPT": "podcast",
+    "IMAGE_PROMPT": "image_prompt",
+    "MEDIA_STATUS": "media_status",
+}
+
+class ReportParser:
+    """Single-pass, incremental tokenizer for the SynthesisAgent report.
+
+    Text can be fed in arbitrary streamed chunks. Each section is returned by `feed`
+    the moment its END marker has fully arrived; text is scanned only once.
+    """
+    _MARKER = re.compile(r"\**\b(" + "|".join(REPORT_SECTIONS) + r")_(START|END)\b\**")
+
+    def __init__(self):
+        self._buffer = ""
+        self._scan_from = 0
+        self._open_section: Optional[str] = None
+        self._content_start = 0
+
+    def feed(self, text: str) -> Dict[str, str]:
+        self._buffer += text
+        return self._scan(final=False)
+
+    def close(self) -> Dict[str, str]:
+        """Processes any marker held back at the end of the stream."""
+        return self._scan(final=True)
+
+    def _scan(self, final: bool) -> Dict[str, str]:
+        completed = {}
+        for match in self._MARKER.finditer(self._buffer, self._scan_from):
+            if not final and match.end() == len(self._buffer):
+                break  # The marker (or its trailing `**`) may continue in the next chunk
+            self._scan_from = match.end()
+            section, kind = match.group(1), match.group(2)
+            if kind == "START":
+                self._open_section, self._content_start = section, match.end()
+            elif section == self._open_section:
+                completed[REPORT_SECTIONS[section]] = self._buffer[self._content_start:match.start()].strip()
+                self._open_section = None
+
+        if self._open_section is None:
+            # Nothing before the scan position is needed any more
+            self._buffer = self._buffer[self._scan_from:]
+            self._scan_from = 0
+        return completed
+
+def parse_final_report(report_text: str) -> Dict[str, str]:
+    """Parses the structured markdown report from the SynthesisAgent."""
+    if not report_text: return {}
+    parser = ReportParser()
+    sections = parser.feed(report_text)
+    sections.update(parser.close())
+    return {ui_key: sections.get(ui_key, "") for ui_key in REPORT_SECTIONS.values()}
+
+def event_text(event: Dict) -> str:
+    return "".join(part.get("text", "") for part in (event.get("content") or {}).get("parts", []))
+
+def create_new_session(client_name: str = "gradio"):
+    """Creates a new user/session with the ADK server."""
+    user_id = f"{client_name}-user-{uuid.uuid4()}"
+    session_id = f"{client_name}-session-{uuid.uuid4()}"
+    url = f"{API_BASE_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}"
+    try:
+        response = http_session.post(url, json={})
+        response.raise_for_status()
+        logger.info(f"Created new session: {session_id}")
+        return user_id, session_id, f"✅ **Active Session:** `{session_id}`"
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to create session: {e}")
+        return None, None, "❌ **Connection Error:** Could not connect to ADK server."
+
+class SSEMessage(NamedTuple):
+    event: str
+    data: str
+    id: str
+    retry: Optional[int]
+
+class SSEParser:
+    """Incremental parser for the `text/event-stream` format.
+
+    Bytes are fed in whatever chunks the socket delivers; complete messages are
+    returned as soon as their terminating blank line arrives. Multi-line `data:`
+    fields, `event:`, `id:`, `retry:` and comment lines are handled per the spec.
+    """
+    _LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data: List[str] = []
+        self._event = ""
+        self.last_event_id = ""
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEMessage]:
+        self._buffer += chunk
+        messages = []
+        consumed = 0
+        for match in self._LINE_BREAK.finditer(self._buffer):
+            if match.group() == b"\r" and match.end() == len(self._buffer):
+                break  # Could be the first half of a \r\n split across chunks
+            message = self._process_line(self._buffer[consumed:match.start()].decode("utf-8"))
+            consumed = match.end()
+            if message:
+                messages.append(message)
+        del self._buffer[:consumed]
+        return messages
+
+    def _process_line(self, line: str) -> Optional[SSEMessage]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id" and "\0" not in value:
+            self.last_event_id = value
+        elif field == "retry" and value.isdigit():
+            self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[SSEMessage]:
+        data, event = self._data, self._event
+        self._data, self._event = [], ""
+        if not data:
+            return None
+        return SSEMessage(event or "message", "\n".join(data), self.last_event_id, self.retry)
+
+class StreamStats:
+    """Collects per-event latency for one SSE run.
+
+    `receive` is the delay between the server stamping an event and the client
+    having its final byte; `parse` is the time spent decoding the event JSON.
+    """
+
+    def __init__(self):
+        self.receive_latencies: List[float] = []
+        self.parse_latencies: List[float] = []
+        self.resumes = 0
+
+    def record(self, event: Dict, received_at: float, parse_seconds: float):
+        if isinstance(event.get("timestamp"), (int, float)):
+            self.receive_latencies.append(max(0.0, received_at - event["timestamp"]))
+        self.parse_latencies.append(parse_seconds)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "events": len(self.parse_latencies),
+            "resumes": self.resumes,
+            "receive_p50_ms": percentile(self.receive_latencies, 50) * 1000,
+            "receive_p95_ms": percentile(self.receive_latencies, 95) * 1000,
+            "parse_p50_ms": percentile(self.parse_latencies, 50) * 1000,
+            "parse_p95_ms": percentile(self.parse_latencies, 95) * 1000,
+        }
+
+def _replay_missed_events(payload: dict, invocation_id: str, seen_ids: set) -> Generator[Dict, None, None]:
+    """Yields events the server persisted for `invocation_id` that never reached this client."""
+    url = f"{API_BASE_URL}/apps/{APP_NAME}/users/{payload['user_id']}/sessions/{payload['session_id']}"
+    response = http_session.get(url, timeout=30)
+    response.raise_for_status()
+    for event in response.json().get("events", []):
+        if event.get("invocationId") == invocation_id and event.get("id") not in seen_ids:
+            seen_ids.add(event.get("id"))
+            yield event
+
+def stream_agent_events(payload: dict, stats: Optional[StreamStats] = None) -> Generator[Dict, None, None]:
+    """Streams Server-Sent Events from the ADK's /run_sse endpoint.
+
+    If the connection drops mid-run, the same invocation is resumed by sending its
+    `invocation_id` back to /run_sse, so the pipeline continues where it stopped
+    instead of starting over. ADK sends no SSE `id:` lines and ignores
+    `Last-Event-ID`, so events persisted while disconnected are replayed from the
+    session instead. Events are deduplicated by their JSON `id`.
+    """
+    stats = stats if stats is not None else StreamStats()
+    seen_ids: set = set()
+    invocation_id = None
+    request_payload = payload
+
+    for attempt in range(SSE_MAX_RESUMES + 1):
+        try:
+            if invocation_id:
+                yield from _replay_missed_events(payload, invocation_id, seen_ids)
+
+            with http_session.post(f"{API_BASE_URL}/run_sse", json=request_payload, headers={"Accept": "text/event-stream"},
+                                   stream=True, timeout=(10, SSE_READ_TIMEOUT)) as response:
+                response.raise_for_status()
+                parser = SSEParser()
+                for chunk in response.iter_content(chunk_size=None):
+                    received_at = time.time()
+                    for message in parser.feed(chunk):
+                        parse_started = time.perf_counter()
+                        try:
+                            event = json.loads(message.data)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping undecodable SSE frame: {message.data[:120]!r}")
+                            continue
+                        stats.record(event, received_at, time.perf_counter() - parse_started)
+
+                        event_id = event.get("id")
+                        if event_id:
+                            if event_id in seen_ids:
+                                continue
+                            seen_ids.add(event_id)
+                        invocation_id = event.get("invocationId", invocation_id)
+                        yield event
+            return
+        except requests.exceptions.RequestException as e:
+            if not invocation_id or attempt == SSE_MAX_RESUMES:
+                yield {"error": f"Connection to server failed: {e}"}
+                return
+            stats.resumes += 1
+            logger.warning(f"SSE stream dropped ({e}). Resuming invocation {invocation_id} after {len(seen_ids)} events...")
+            time.sleep(min(2 ** attempt, 30))
+            request_payload = {key: value for key, value in payload.items() if key != "new_message"}
+            request_payload["invocation_id"] = invocation_id
+
+class WakeableStream:
+    """Reads an event stream on a daemon thread, so the consumer can be woken up between events.
+
+    Iterating yields each event as it arrives, and None whenever `wake()` was called
+    (from any thread). The consumer can then publish finished background work, such as
+    a downloaded audio part, without blocking the stream or waiting for the next event.
+    """
+    _END = object()
+
+    def __init__(self, events: Iterator[Dict]):
+        self._queue: queue.Queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._error: Optional[BaseException] = None
+        threading.Thread(target=self._read, args=(events,), name="sse-reader", daemon=True).start()
+
+    def _read(self, events: Iterator[Dict]):
+        try:
+            for event in events:
+                if self._stopped.is_set():
+                    break
+                self._queue.put(event)
+        except BaseException as e:
+            self._error = e
+        finally:
+            close = getattr(events, "close", None)
+            if close:
+                close()
+            self._queue.put(self._END)
+
+    def wake(self):
+        self._queue.put(None)
+
+    def __iter__(self) -> Iterator[Optional[Dict]]:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._END:
+                    break
+                yield item
+        finally:
+            self._stopped.set()  # A consumer that stops early ends the reader at its next event
+        if self._error is not None:
+            raise self._error
+
+def _artifact_url(user_id: str, session_id: str, artifact_name: str) -> str:
+    return f"{API_BASE_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}/artifacts/{artifact_name}"
+
+def _download_artifact(user_id: str, session_id: str, artifact_name: str, timeout: int,
+                       version: Optional[int] = None) -> Tuple[Optional[str], str]:
+    """Streams a single artifact (its latest or the given version) into the media cache. Returns (filepath or None, log line)."""
+    try:
+        url = _artifact_url(user_id, session_id, artifact_name)
+        if version is not None:
+            url += f"/versions/{version}"
+        with http_session.get(url, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return None, f"\n  - ⚠️ Could not load `{artifact_name}` (Status: {response.status_code})"
+            decoded_chunks = _iter_inline_data(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE))
+            filepath = media_cache.store(decoded_chunks, suffix=os.path.splitext(artifact_name)[1])
+        return filepath, f"\n  - ✅ Loaded `{artifact_name}`"
+    except Exception as e:
+        return None, f"\n  - ❌ Error loading `{artifact_name}`: {e}"
+
+def _download_cached(user_id: str, session_id: str, artifact: Dict, timeout: int) -> Tuple[Optional[str], str]:
+    """Downloads one manifest artifact by version, unless a file with its content hash is already cached."""
+    name = artifact["artifact_name"]
+    cached = artifact.get("sha256") and media_cache.lookup(artifact["sha256"], os.path.splitext(name)[1])
+    if cached:
+        return cached, f"\n  - ♻️ `{name}` was already cached"
+    return _download_artifact(user_id, session_id, name, timeout, artifact.get("version"))
+
+def fetch_full_image(user_id: str, session_id: str, entry: Dict) -> Tuple[Optional[str], str]:
+    """Fetches the full-resolution PNG of one `image_artifacts` manifest entry (on demand)."""
+    return _download_cached(user_id, session_id, entry, 60)
+
+def fetch_media_artifacts(user_id: str, session_id: str, outputs: Optional[Iterable[str]] = None,
+                          image_manifest: Optional[List[Dict]] = None) -> Generator[Tuple[List[str], Optional[str], str], None, None]:
+    """Fetches generated image and audio artifacts from the ADK server concurrently.
+
+    Yields (image_filepaths, audio_filepath, log_update) every time a single download
+    finishes, so the UI can show each artifact as soon as it lands. Artifacts of
+    outputs that were not requested are not fetched. With the run's `image_manifest`,
+    the compact preview of each image is fetched instead of its full PNG (which
+    `fetch_full_image` loads on demand), and files already in the media cache are
+    not downloaded again.
+    """
+    outputs = set(CONTENT_OUTPUTS if outputs is None else outputs)
+    if not outputs & {"images", "podcast_audio"}:
+        return
+    yield [], None, "\n* 🖼️🔊 Fetching generated media artifacts..."
+    image_slots: List[Optional[str]] = [None] * len(image_manifest or IMAGE_ARTIFACTS)
+    audio_filepath = None
+    futures = {}
+    if "images" in outputs and image_manifest:
+        for slot, entry in enumerate(image_manifest):
+            artifact = entry.get("preview") or entry
+            futures[artifact_executor.submit(_download_cached, user_id, session_id, artifact, 30)] = slot
+    elif "images" in outputs:
+        for slot, name in enumerate(IMAGE_ARTIFACTS):
+            futures[artifact_executor.submit(_download_artifact, user_id, session_id, name, 30)] = slot
+    if "podcast_audio" in outputs:
+        futures[artifact_executor.submit(_download_artifact, user_id, session_id, AUDIO_ARTIFACT, 60)] = AUDIO_ARTIFACT
+
+    for future in as_completed(futures):
+        slot = futures[future]
+        filepath, log_update = future.result()
+        if filepath and slot == AUDIO_ARTIFACT:
+            audio_filepath = filepath
+        elif filepath:
+            image_slots[slot] = filepath
+        yield [path for path in image_slots if path], audio_filepath, log_update
+
+class AudioPartFetcher:
+    """Downloads the podcast episode's parts while the run is still streaming.
+
+    Each `audio_progress` state delta names a part artifact and its version. The part
+    is downloaded on `artifact_executor` at once, and `ready` hands finished parts
+    out in episode order, so a player can start on the first part while later ones
+    are still being synthesized. `on_done` is called (on the download thread) when a
+    part finishes, e.g. `WakeableStream.wake` to publish it without waiting for the next event.
+    """
+
+    def __init__(self, user_id: str, session_id: str, on_done: Optional[Callable[[], None]] = None):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.on_done = on_done
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()  # part artifact -> download future, in episode order
+        self._handed_out = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._futures)
+
+    def submit(self, progress: Dict):
+        name = progress.get("artifact_name")
+        if name and name not in self._futures:
+            self._futures[name] = artifact_executor.submit(
+                _download_artifact, self.user_id, self.session_id, name, 60, progress.get("version"))
+            if self.on_done:
+                self._futures[name].add_done_callback(lambda _: self.on_done())
+
+    def ready(self, wait: bool = False) -> List[Tuple[Optional[str], str]]:
+        """Returns (filepath or None, log line) of the parts finished since the last call, in order.
+
+        Stops at the first part still downloading unless `wait` is set.
+        """
+        parts = []
+        for future in list(self._futures.values())[self._handed_out:]:
+            if not wait and not future.done():
+                break
+            parts.append(future.result())
+            self._handed_out += 1
+        return parts
+
+def build_run_payload(user_query: str, user_id: str, session_id: str, state_delta: Optional[Dict] = None) -> dict:
+    """Builds the /run_sse request body for one pipeline run, optionally seeding session state."""
+    payload = {"app_name": APP_NAME, "user_id": user_id, "session_id": session_id, "streaming": STREAM_PARTIAL_EVENTS,
+               "new_message": {"role": "user", "parts": [{"text": user_query}]}}
+    if state_delta:
+        payload["state_delta"] = state_delta
+    return payload
+
+def parse_content_brief(raw_brief: str) -> Optional[Dict]:
+    """Decodes the StrategyAgent's JSON brief, tolerating a Markdown code fence."""
+    try: return json.loads(re.sub(r'```json\n|\n```', '', raw_brief).strip())
+    except json.JSONDecodeError: return None
+
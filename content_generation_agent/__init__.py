@@ -1,7 +1,8 @@
 # content_generation_agent/__init__.py
 """
-Exposes the root agent of the application to the ADK framework.
+The content generation agent package.
 
-The ADK server looks for a 'root_agent' in this file to start the execution.
+The ADK server loads the application from `agent.py` (its `<package>.agent`
+convention), so this file stays empty. Importing a standalone helper module,
+such as `stats` from the UI client, then does not build the whole pipeline.
 """
-from .pipeline import root_agent
\ No newline at end of file
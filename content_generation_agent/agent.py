@@ -0,0 +1,28 @@
+# content_generation_agent/agent.py
+"""
+Exposes the root agent of the application to the ADK framework.
+
+The ADK server looks for an 'app' (falling back to 'root_agent') in this module to
+start the execution. The app is resumable, so a client whose SSE stream drops can
+continue the same invocation by passing its `invocation_id` back to /run_sse.
+App-wide plugins (tracing, the LLM response cache and the rate governor) are
+registered here as well.
+"""
+from google.adk.apps import App, ResumabilityConfig
+
+from .pipeline import root_agent
+from .llm_cache import LlmCachePlugin
+from .rate_governor import RateGovernorPlugin, register_governed_gemini
+from .tracing import TracingPlugin, loop_lag_monitor, tracer
+
+tracing_plugin = TracingPlugin(tracer, loop_lag_monitor) if tracer.enabled else None # Must come before the cache; see tracing.py
+llm_cache_plugin = LlmCachePlugin.from_env()
+rate_governor_plugin = RateGovernorPlugin()
+register_governed_gemini()  # Agents resolve their model name at call time, so this covers the whole pipeline
+
+app = App(
+    name="content_generation_agent",
+    root_agent=root_agent,
+    plugins=[plugin for plugin in (tracing_plugin, llm_cache_plugin, rate_governor_plugin) if plugin],
+    resumability_config=ResumabilityConfig(is_resumable=True),
+)
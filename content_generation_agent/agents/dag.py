@@ -0,0 +1,194 @@
+# content_generation_agent/agents/dag.py
+"""
+Defines a dependency-driven orchestrator for the content pipeline.
+
+Each node wraps an agent and declares the state keys (from `constants.py`) it reads
+and writes. A node depends on every other node that writes one of its inputs and
+starts as soon as all of those have finished, so the run's wall time is the
+critical path through the graph rather than the sum of stage maxima.
+
+A run can ask for a subset of the pipeline's outputs (`requested_outputs` in
+state). Only the nodes those outputs transitively need are scheduled; each such
+plan is computed once per distinct output set and cached. Outputs the plan produces
+only as dependencies (e.g. the podcast script behind `podcast_audio`) are written to
+`dependency_outputs`, so the report and clients show them instead of "not requested".
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.base_agent import BaseAgentState
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from .. import constants as K
+
+class DagNode(NamedTuple):
+    """An agent plus the state keys it reads and writes.
+
+    An `always` node (such as the final report) runs in every plan, after whichever
+    of its inputs' writers the plan includes.
+    """
+    agent: BaseAgent
+    reads: Iterable[str] = ()
+    writes: Iterable[str] = ()
+    always: bool = False
+
+def requested_outputs(state: Mapping, all_outputs: Iterable[str] = K.ALL_OUTPUTS) -> FrozenSet[str]:
+    """The known outputs listed in `requested_outputs`, or all of them if none are."""
+    all_outputs = frozenset(all_outputs)
+    requested = state.get(K.STATE_REQUESTED_OUTPUTS) or []
+    if isinstance(requested, str):
+        requested = requested.split(",")
+    selected = frozenset(str(output).strip() for output in requested) & all_outputs
+    return selected or all_outputs
+
+Plan = Tuple[List[DagNode], Dict[str, Set[str]]]  # Nodes to run and their dependencies within the plan
+
+def _branch_ctx(parent: BaseAgent, agent: BaseAgent, ctx: InvocationContext) -> InvocationContext:
+    """Gives each node its own branch so LLM nodes do not see each other's conversation (as `ParallelAgent` does)."""
+    branch_ctx = ctx.model_copy()
+    suffix = f"{parent.name}.{agent.name}"
+    branch_ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+    return branch_ctx
+
+class DagAgent(BaseAgent):
+    """A custom agent that runs its nodes as soon as the nodes they depend on finish.
+
+    Events from concurrently running nodes are merged the same way `ParallelAgent`
+    merges its branches. When the run completes, the critical path (the chain of
+    nodes that each gated the start of the next) is logged and written to
+    `critical_path` in state.
+
+    `outputs` maps each selectable output name to the state keys that make it up.
+    """
+
+    def __init__(self, name: str, nodes: List[DagNode], outputs: Optional[Dict[str, Iterable[str]]] = None):
+        super().__init__(name=name, sub_agents=[node.agent for node in nodes])
+        writers: Dict[str, Set[str]] = {}
+        for node in nodes:
+            for key in node.writes:
+                writers.setdefault(key, set()).add(node.agent.name)
+        self._nodes = nodes
+        self._dependencies = {
+            node.agent.name: {writer for key in node.reads for writer in writers.get(key, ())} - {node.agent.name}
+            for node in nodes
+        }
+        self._writers = writers
+        self._outputs = {output: list(keys) for output, keys in (outputs or {}).items()}
+        self._plans: Dict[FrozenSet[str], Plan] = {}
+        self._check_acyclic()
+
+    def plan(self, outputs: FrozenSet[str]) -> Plan:
+        """Returns (and caches) the nodes needed for `outputs`, with dependencies restricted to them."""
+        if outputs not in self._plans:
+            needed = {writer for output in outputs for key in self._outputs.get(output, ()) for writer in self._writers.get(key, ())}
+            pending = list(needed)
+            while pending:
+                for dependency in self._dependencies[pending.pop()] - needed:
+                    needed.add(dependency)
+                    pending.append(dependency)
+            needed |= {node.agent.name for node in self._nodes if node.always}
+            nodes = [node for node in self._nodes if node.agent.name in needed]
+            self._plans[outputs] = (nodes, {node.agent.name: self._dependencies[node.agent.name] & needed for node in nodes})
+            logging.info(f"🕸️ [{self.name}] Plan for {sorted(outputs)}: {[node.agent.name for node in nodes]}")
+        return self._plans[outputs]
+
+    def dependency_outputs(self, outputs: FrozenSet[str], nodes: List[DagNode]) -> List[str]:
+        """Outputs not in `outputs` whose state keys are all written by `nodes`."""
+        scheduled = {node.agent.name for node in nodes}
+        return [output for output, keys in self._outputs.items() if output not in outputs and keys
+                and all(self._writers.get(key) and self._writers[key] <= scheduled for key in keys)]
+
+    def _check_acyclic(self):
+        finished: Set[str] = set()
+        while len(finished) < len(self._dependencies):
+            ready = {name for name, deps in self._dependencies.items() if name not in finished and deps <= finished}
+            if not ready:
+                raise ValueError(f"[{self.name}] Dependency cycle among: {sorted(set(self._dependencies) - finished)}")
+            finished |= ready
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if ctx.is_resumable and self._load_agent_state(ctx, BaseAgentState) is None:
+            ctx.set_agent_state(self.name, agent_state=BaseAgentState())
+            yield self._create_agent_state_event(ctx)
+
+        if self._outputs:
+            outputs = requested_outputs(ctx.session.state, self._outputs)
+            nodes, dependencies = self.plan(outputs)
+            # Written on every run, so a session's previous run does not leave a stale list behind
+            yield Event(author=self.name, actions=EventActions(
+                state_delta={K.STATE_DEPENDENCY_OUTPUTS: self.dependency_outputs(outputs, nodes)}))
+        else:
+            nodes, dependencies = self._nodes, self._dependencies
+        done = {node.agent.name for node in nodes if ctx.end_of_agents.get(node.agent.name)}
+        started = set(done)
+        timings: Dict[str, List[float]] = {}  # agent name -> [start, end] in seconds since the DAG started
+        queue: asyncio.Queue = asyncio.Queue()
+        dag_started = time.perf_counter()
+
+        async def run_node(node: DagNode):
+            name = node.agent.name
+            timings[name] = [time.perf_counter() - dag_started, 0.0]
+            try:
+                async for event in node.agent.run_async(_branch_ctx(self, node.agent, ctx)):
+                    resume_signal = asyncio.Event()
+                    await queue.put((event, resume_signal))
+                    await resume_signal.wait()  # Wait for the runner to apply the event before continuing
+            finally:
+                timings[name][1] = time.perf_counter() - dag_started
+                await queue.put((name, None))
+
+        pause_invocation = False
+        async with asyncio.TaskGroup() as task_group:
+            def start_ready_nodes() -> int:
+                ready = [node for node in nodes
+                         if node.agent.name not in started and dependencies[node.agent.name] <= done]
+                for node in ready:
+                    started.add(node.agent.name)
+                    logging.info(f"🕸️ [{self.name}] Starting {node.agent.name}.")
+                    task_group.create_task(run_node(node))
+                return len(ready)
+
+            running = start_ready_nodes()
+            while running:
+                item, resume_signal = await queue.get()
+                if resume_signal is None:  # A node finished
+                    running -= 1
+                    done.add(item)
+                    if not pause_invocation:
+                        running += start_ready_nodes()
+                    continue
+                yield item
+                if ctx.should_pause_invocation(item):
+                    pause_invocation = True
+                resume_signal.set()
+
+        if pause_invocation:
+            return
+
+        critical_path = self.critical_path(timings, dependencies)
+        if critical_path:
+            logging.info(f"🕸️ [{self.name}] Critical path: " + " → ".join(
+                f"{step['agent']} ({step['duration_s']:.1f}s)" for step in critical_path
+            ) + f" = {critical_path[-1]['end_s']:.1f}s")
+            yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_CRITICAL_PATH: critical_path}))
+
+        if ctx.is_resumable:
+            ctx.set_agent_state(self.name, end_of_agent=True)
+            yield self._create_agent_state_event(ctx)
+
+    @staticmethod
+    def critical_path(timings: Dict[str, List[float]], dependencies: Dict[str, Set[str]]) -> List[Dict]:
+        """Walks back from the last node to finish through the dependency that finished last."""
+        if not timings:
+            return []
+        path = []
+        name = max(timings, key=lambda n: timings[n][1])
+        while name:
+            start, end = timings[name]
+            path.append({"agent": name, "start_s": round(start, 3), "end_s": round(end, 3), "duration_s": round(end - start, 3)})
+            gating = [dep for dep in dependencies[name] if dep in timings]
+            name = max(gating, key=lambda n: timings[n][1]) if gating else None
+        return path[::-1]
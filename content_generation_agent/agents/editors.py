@@ -8,6 +8,7 @@ if the content is perfect, call an 'approve' tool to signal completion.
 """
 from google.adk.agents import LlmAgent
 from .. import constants as K
+from .. import validators
 from .. import tools
 
 # Each QA agent follows the same pattern:
@@ -77,7 +78,7 @@ x_qa_editor_agent = LlmAgent(
     - X Post Draft: {{{K.STATE_X_POST_DRAFT}}}
 
     **Task:**
-    Check for conciseness (<280 chars), impact, and proper use of hashtags.
+    Check for conciseness (at most {validators.X_POST_MAX_CHARS} characters, counting every link as 23 and each CJK character or emoji as 2), impact, and proper use of hashtags.
     - **IF changes are needed:** Output ONLY actionable feedback.
     - **IF the draft is perfect:** Call the `approve_x_post` tool.
     """,
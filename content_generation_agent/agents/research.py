@@ -6,8 +6,9 @@ This includes creating a strategy, extracting search queries, performing
 the searches, and aggregating the results into a cohesive dossier.
 """
 from google.adk.agents import LlmAgent
-from google.adk.tools import google_search, agent_tool
+from google.adk.tools import google_search
 from .. import constants as K
+from .utility import SearchQueryExtractorAgent
 
 strategy_agent = LlmAgent(
     name="StrategyAgent",
@@ -25,8 +26,8 @@ strategy_agent = LlmAgent(
     output_key=K.STATE_CONTENT_BRIEF,
 )
 
-query_extractor_agent = LlmAgent(
-    name="QueryExtractorAgent",
+query_extractor_llm_agent = LlmAgent(
+    name="QueryExtractorLlmAgent",
     model=K.GEMINI_MODEL,
     instruction=f"""You are a data parsing agent.
     Read the JSON from {{{K.STATE_CONTENT_BRIEF}}}.
@@ -36,6 +37,8 @@ query_extractor_agent = LlmAgent(
     output_key=K.STATE_SEARCH_QUERIES_LIST,
 )
 
+query_extractor_agent = SearchQueryExtractorAgent(name="QueryExtractorAgent", fallback_agent=query_extractor_llm_agent)
+
 research_agent = LlmAgent(
     name="ResearchAgent",
     model=K.GEMINI_MODEL,
@@ -43,30 +46,18 @@ research_agent = LlmAgent(
     tools=[google_search],
 )
 
-single_search_agent = LlmAgent(
-    name="SingleSearchAgent",
-    model=K.GEMINI_MODEL,
-    instruction=f"""Your task is to perform research for a single query using the `ResearchAgent` tool.
-    The query is in the state key {{{K.STATE_CURRENT_SEARCH_QUERY}}}.
-    Call the `ResearchAgent` tool with this query and output ONLY the direct result.
-    """,
-    tools=[agent_tool.AgentTool(agent=research_agent)],
-    output_key=K.STATE_SINGLE_SEARCH_RESULT,
-)
-
 dossier_aggregator_agent = LlmAgent(
     name="DossierAggregatorAgent",
     model=K.GEMINI_MODEL,
-    instruction=f"""You are a silent data processing unit. Your SOLE function is to merge research findings.
+    instruction=f"""You are a silent data processing unit. Your SOLE function is to polish research findings.
 
-    **Inputs (from state):**
-    - Existing Dossier: {{{K.STATE_RESEARCH_DOSSIER}?}}
-    - Latest Search Result: {{{K.STATE_SINGLE_SEARCH_RESULT}}}
+    **Input (from state):**
+    - Deduplicated findings, one section per query, with their sources: {{{K.STATE_RESEARCH_RESULTS}}}
 
     **Task:**
-    Append the new search result to the existing dossier. Summarize and structure the combined information into a clear, updated Research Dossier, removing duplicates.
+    Organize the findings into a single, clear, well-structured Research Dossier. Keep every fact, figure and source URL; do not add information.
 
-    **CRITICAL:** Output ONLY the updated Research Dossier text. No conversational filler.
+    **CRITICAL:** Output ONLY the Research Dossier text. No conversational filler.
     """,
     output_key=K.STATE_RESEARCH_DOSSIER,
-)
\ No newline at end of file
+)
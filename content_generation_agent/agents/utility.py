@@ -2,18 +2,31 @@
 """
 Defines utility agents and custom agent classes.
 
-This includes specialized BaseAgents for controlling loops and simple LlmAgents
-whose sole purpose is to execute a specific tool.
+This includes specialized BaseAgents for controlling loops and producing media,
+and simple LlmAgents whose sole purpose is to execute a specific tool.
 """
-import logging
+import asyncio
 import json
-from typing import AsyncGenerator
+import logging
+import re
+import traceback
+from typing import AsyncGenerator, List, Optional
 
 from google.adk.agents import BaseAgent, LlmAgent
 from google.adk.events import Event, EventActions
+from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.invocation_context import InvocationContext
+from google.adk.tools import ToolContext, agent_tool
+from google.genai import types as genai_types
 from .. import constants as K
 from .. import tools
+from ..validators import Rule, run_rules
+from ..parsing import extract_json
+from ..search_cache import SearchCache, SearchFn
+from ..topic_index import TopicIndex
+from ..context_budget import ContextBudget
+from ..dossier_store import DossierStore
+from .dag import requested_outputs
 
 class CheckCompletionAgent(BaseAgent):
     """A custom agent that checks a specific state key to terminate a loop."""
@@ -28,30 +41,243 @@ class CheckCompletionAgent(BaseAgent):
             logging.info(f"🔎 [{self.name}] Detected '{self.approval_key}' is True. Escalating to stop loop.")
         yield Event(author=self.name, actions=EventActions(escalate=should_escalate))
 
-class ResearchQueryManager(BaseAgent):
-    """A custom agent that manages the list of search queries for the research loop."""
+class RuleValidatorAgent(BaseAgent):
+    """A custom agent that runs deterministic rules on a draft before its QA editor.
+
+    If any rule fails, the concrete feedback is written to `feedback_key` and the
+    editor is skipped. If all rules pass, the draft is either approved directly
+    (`skip_editor_on_pass`) or handed to the wrapped editor for the subjective review.
+    """
+    draft_key: str
+    feedback_key: str
+    approval_key: str
+    rules: List[Rule]
+    skip_editor_on_pass: bool = False
+
+    def __init__(self, name: str, editor: BaseAgent, draft_key: str, feedback_key: str, approval_key: str,
+                 rules: List[Rule], skip_editor_on_pass: bool = False):
+        super().__init__(name=name, sub_agents=[editor], draft_key=draft_key, feedback_key=feedback_key,
+                         approval_key=approval_key, rules=rules, skip_editor_on_pass=skip_editor_on_pass)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        draft = str(ctx.session.state.get(self.draft_key) or "")
+        failures = run_rules(draft, self.rules)
+        if failures:
+            logging.info(f"📏 [{self.name}] {len(failures)} rule(s) failed. Skipping editor.")
+            feedback = "Revise the draft to fix these issues:\n" + "\n".join(f"- {failure}" for failure in failures)
+            yield Event(author=self.name, actions=EventActions(state_delta={self.feedback_key: feedback}))
+            return
+
+        if self.skip_editor_on_pass:
+            logging.info(f"📏 [{self.name}] All rules passed. Approving without editor review.")
+            yield Event(author=self.name, actions=EventActions(state_delta={self.approval_key: True}))
+            return
+
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
+
+class QueryCaptureAgent(BaseAgent):
+    """A custom agent that copies the user's message straight into `user_query`.
+
+    Falls back to its LLM sub-agent only if the invocation carries no text.
+    """
+    def __init__(self, name: str, fallback_agent: BaseAgent):
+        super().__init__(name=name, sub_agents=[fallback_agent])
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        parts = ctx.user_content.parts if ctx.user_content and ctx.user_content.parts else []
+        user_query = "".join(part.text for part in parts if part.text).strip()
+        if not user_query:
+            logging.warning(f"[{self.name}] No text in the user message. Falling back to LLM capture.")
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            return
+        yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_USER_QUERY: user_query}))
+
+class SearchQueryExtractorAgent(BaseAgent):
+    """A custom agent that parses `search_queries` out of the content brief in-process.
+
+    Handles code fences and trailing text around the JSON; falls back to its LLM
+    sub-agent only if no non-empty list of query strings can be extracted.
+    """
+    def __init__(self, name: str, fallback_agent: BaseAgent):
+        super().__init__(name=name, sub_agents=[fallback_agent])
+
     async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
-        queries_data = ctx.session.state.get(K.STATE_SEARCH_QUERIES_LIST, [])
         queries = []
-        if isinstance(queries_data, str):
-            try: queries = json.loads(queries_data.strip("```json\n").strip())
-            except json.JSONDecodeError: logging.error(f"[QueryManager] Could not decode: {queries_data}")
-        elif isinstance(queries_data, list):
-            queries = queries_data
+        try:
+            brief = extract_json(ctx.session.state.get(K.STATE_CONTENT_BRIEF, ""))
+            if isinstance(brief, dict) and isinstance(brief.get("search_queries"), list):
+                queries = [str(query).strip() for query in brief["search_queries"] if str(query).strip()]
+        except ValueError as e:
+            logging.warning(f"[{self.name}] Could not parse content brief: {e}")
 
         if not queries:
-            logging.info("🔎 [QueryManager] Query list is empty. Escalating to stop loop.")
-            yield Event(author=self.name, actions=EventActions(escalate=True))
+            logging.warning(f"[{self.name}] No search queries extracted. Falling back to LLM extraction.")
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
             return
+        logging.info(f"🔎 [{self.name}] Extracted {len(queries)} search queries.")
+        yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_SEARCH_QUERIES_LIST: queries}))
 
-        current_query = queries.pop(0)
-        logging.info(f"🔎 [QueryManager] Next query: '{current_query}'. {len(queries)} remaining.")
-        yield Event(author=self.name, actions=EventActions(
-            state_delta={
-                K.STATE_CURRENT_SEARCH_QUERY: current_query,
-                K.STATE_SEARCH_QUERIES_LIST: queries,
-            }
-        ))
+class ParallelResearchAgent(BaseAgent):
+    """A custom agent that runs every search query from the content brief concurrently.
+
+    Each query is searched by `search_agent` in its own isolated sub-session (the same
+    mechanism `AgentTool` uses), at most `max_parallel` at a time. Only the first
+    `max_queries` queries are searched. Results are appended to a `DossierStore` (in
+    query order, as soon as every earlier query has finished), which drops paragraphs
+    an earlier result already covered. The deduplicated findings are rendered once
+    into `research_results` and kept, with their sources, in `dossier_findings`.
+
+    With a `search_cache`, fresh results for equivalent queries are reused across
+    sessions and identical in-flight searches share one call. `search_backend`
+    replaces `search_agent` (e.g. with the offline `LocalSearchBackend`).
+    """
+    max_queries: int
+    max_parallel: int
+
+    def __init__(self, name: str, search_agent: LlmAgent, max_queries: int = 5, max_parallel: int = 5,
+                 search_cache: Optional[SearchCache] = None, search_backend: Optional[SearchFn] = None):
+        super().__init__(name=name, max_queries=max_queries, max_parallel=max_parallel)
+        self._search_tool = agent_tool.AgentTool(agent=search_agent)
+        self._search_cache = search_cache
+        self._search_backend = search_backend
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        queries_data = ctx.session.state.get(K.STATE_SEARCH_QUERIES_LIST, [])
+        queries = queries_data if isinstance(queries_data, list) else []
+        if isinstance(queries_data, str):
+            try: queries = extract_json(queries_data)
+            except ValueError: logging.error(f"[{self.name}] Could not decode: {queries_data}")
+        queries = [str(query) for query in queries if str(query).strip()][:self.max_queries]
+        if not queries:
+            logging.info(f"🔎 [{self.name}] No search queries to run.")
+            yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_RESEARCH_RESULTS: ""}))
+            return
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def run_search(query: str) -> str:
+            if self._search_backend:
+                return await self._search_backend(query)
+            return str(await self._search_tool.run_async(args={"request": query}, tool_context=ToolContext(ctx)))
+
+        store = DossierStore.from_env()
+        results: List[Optional[str]] = [None] * len(queries)
+        appended = 0
+
+        def append_finished():
+            # Appending in query order keeps the dossier (and its LLM cache key) stable across runs
+            nonlocal appended
+            while appended < len(queries) and results[appended] is not None:
+                new = store.add_result(queries[appended], results[appended])
+                logging.info(f"🗂️ [{self.name}] Appended {new} new paragraph(s) for '{queries[appended]}'.")
+                appended += 1
+
+        async def search(index: int, query: str):
+            async with semaphore:
+                try:
+                    if self._search_cache:
+                        result, outcome = await self._search_cache.search(query, run_search)
+                    else:
+                        result, outcome = await run_search(query), "miss"
+                    logging.info(f"🔎 [{self.name}] Finished query ({outcome}): '{query}'.")
+                except Exception as e:
+                    logging.error(f"❌ [{self.name}] Search failed for '{query}': {e}")
+                    result = ""
+            results[index] = result
+            append_finished()
+
+        logging.info(f"🔎 [{self.name}] Running {len(queries)} queries, up to {self.max_parallel} at a time.")
+        await asyncio.gather(*(search(index, query) for index, query in enumerate(queries)))
+        logging.info(f"🗂️ [{self.name}] Dossier has {len(store.findings)} findings from {store.counts['paragraphs']} paragraphs "
+                     f"({store.counts['exact_duplicates']} exact and {store.counts['near_duplicates']} near duplicates).")
+        yield Event(author=self.name, actions=EventActions(state_delta={
+            K.STATE_RESEARCH_RESULTS: store.render(),
+            K.STATE_DOSSIER_FINDINGS: store.findings,
+        }))
+
+class DossierPolishAgent(BaseAgent):
+    """A custom agent that materializes `research_dossier` from the rendered findings.
+
+    The findings are used as they are, or rewritten by the `polish_agent` sub-agent
+    in a single pass when `use_llm_polish` is set.
+    """
+    use_llm_polish: bool = True
+
+    def __init__(self, name: str, polish_agent: BaseAgent, use_llm_polish: bool = True):
+        super().__init__(name=name, sub_agents=[polish_agent], use_llm_polish=use_llm_polish)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        research_results = ctx.session.state.get(K.STATE_RESEARCH_RESULTS, "")
+        if self.use_llm_polish and research_results:
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            return
+        yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_RESEARCH_DOSSIER: research_results}))
+
+class WarmStartAgent(BaseAgent):
+    """A custom agent that reuses the brief and dossier of a near-duplicate past topic.
+
+    The user query is looked up in `topic_index`. In "auto" mode a match replaces
+    `cold_path_agent` (strategy and research) entirely, unless the two queries
+    contain different numbers (such as years), in which case it is only offered. In
+    "offer" mode the match is only reported in `warm_start` and the cold path still
+    runs. The mode comes from `warm_start_mode` in state, else `default_mode`.
+    Cold-path results are added to the index for later runs, except in "off" mode:
+    a user who opted out is neither served nor stored.
+    """
+    default_mode: str
+
+    def __init__(self, name: str, cold_path_agent: BaseAgent, topic_index: TopicIndex, default_mode: str = "offer"):
+        super().__init__(name=name, sub_agents=[cold_path_agent], default_mode=default_mode)
+        self._topic_index = topic_index
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        user_query = ctx.session.state.get(K.STATE_USER_QUERY, "")
+        mode = ctx.session.state.get(K.STATE_WARM_START_MODE) or self.default_mode
+        match = self._topic_index.lookup(user_query) if user_query and mode != "off" else None
+
+        if match:
+            apply = mode == "auto" and match["numbers_match"]
+            warm_start = {"matched_query": match["query"], "score": match["score"], "applied": apply}
+            if mode == "auto" and not apply:
+                warm_start["reason"] = "numbers_differ"
+                logging.info(f"🧭 [{self.name}] '{match['query']}' differs in its numbers. Offering it instead of reusing it.")
+            if apply:
+                logging.info(f"🧭 [{self.name}] Warm start from '{match['query']}'. Skipping strategy and research.")
+                yield Event(author=self.name, actions=EventActions(state_delta={
+                    K.STATE_CONTENT_BRIEF: match["content_brief"],
+                    K.STATE_RESEARCH_DOSSIER: match["research_dossier"],
+                    K.STATE_WARM_START: warm_start,
+                }))
+                return
+            yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_WARM_START: warm_start}))
+
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
+        if mode == "off":
+            return
+        self._topic_index.add(user_query, ctx.session.state.get(K.STATE_CONTENT_BRIEF, ""),
+                              ctx.session.state.get(K.STATE_RESEARCH_DOSSIER, ""))
+
+class ContextCompactionAgent(BaseAgent):
+    """A custom agent that condenses the brief and dossier into per-platform writer views.
+
+    Runs once after research, so every writer iteration reuses the same views. What
+    was truncated or dropped from each view is written to `context_audit`.
+    """
+
+    def __init__(self, name: str, context_budget: ContextBudget):
+        super().__init__(name=name)
+        self._context_budget = context_budget
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state_delta, audit = self._context_budget.views(ctx.session.state.get(K.STATE_CONTENT_BRIEF, ""),
+                                                        ctx.session.state.get(K.STATE_RESEARCH_DOSSIER, ""))
+        state_delta[K.STATE_CONTEXT_AUDIT] = audit
+        yield Event(author=self.name, actions=EventActions(state_delta=state_delta))
 
 image_generator_agent = LlmAgent(
     name="ImageGeneratorAgent",
@@ -63,69 +289,143 @@ image_generator_agent = LlmAgent(
     output_key=K.STATE_IMAGE_GENERATION_STATUS,
 )
 
-audio_producer_agent = LlmAgent(
-    name="AudioProducerAgent",
-    model=K.GEMINI_MODEL,
-    instruction=f"""You are a robotics process automation (RPA) unit. Your single function is to execute the `generate_podcast_audio_tool`.
+class PodcastAudioAgent(BaseAgent):
+    """A custom agent that synthesizes the approved podcast script and publishes it while it renders.
 
-    The script to process is in state key: {{{K.STATE_PODCAST_SCRIPT}}}.
-    You MUST check if the script is present and not empty, then call the tool with the full script text.
-    Your job is only to call the tool.
-    """,
-    tools=[tools.generate_podcast_audio_tool],
-    output_key=K.STATE_AUDIO_GENERATION_STATUS,
-)
+    Every run of segments that finished in script order is saved as a part artifact
+    and announced with an `audio_progress` event, so clients can start playback once
+    the first segment is ready. The full episode is saved as `podcast_episode.wav` at
+    the end. Its status report goes to `audio_generation_status`, as the tool's does.
+    """
 
-synthesis_agent = LlmAgent(
-    name="SynthesisAgent",
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        script = str(ctx.session.state.get(K.STATE_PODCAST_SCRIPT) or "").strip()
+        if not script:
+            status = {"status": "error", "message": "The podcast script is empty."}
+            yield Event(author=self.name, actions=EventActions(state_delta={K.STATE_AUDIO_GENERATION_STATUS: json.dumps(status)}))
+            return
+
+        logging.info(f"🎙️ [{self.name}] Generating multi-speaker audio...")
+        parts: asyncio.Queue = asyncio.Queue()
+        publish = asyncio.ensure_future(tools.publish_podcast_audio(script, CallbackContext(ctx), on_part=parts.put))
+        publish.add_done_callback(lambda _: parts.put_nowait(None))
+        try:
+            while (part := await parts.get()) is not None:
+                yield Event(author=self.name, actions=EventActions(
+                    state_delta={K.STATE_AUDIO_PROGRESS: part}, artifact_delta={part["artifact_name"]: part["version"]}))
+            status = publish.result()
+        except Exception as e:
+            logging.error(f"❌ [{self.name}] Error: {e}\n{traceback.format_exc()}")
+            status = {"status": "error", "message": str(e) or type(e).__name__}
+        finally:
+            publish.cancel()
+        artifact_delta = {status["artifact_name"]: status["version"]} if status["status"] == "success" else {}
+        yield Event(author=self.name, actions=EventActions(
+            state_delta={K.STATE_AUDIO_GENERATION_STATUS: json.dumps(status)}, artifact_delta=artifact_delta))
+
+audio_producer_agent = PodcastAudioAgent(name="AudioProducerAgent")
+
+media_status_agent = LlmAgent(
+    name="MediaStatusAgent",
     model=K.GEMINI_MODEL,
-    instruction=f"""You are the Final Packager. Assemble all final approved content and status into a clean, human-readable markdown report for the user.
-    You MUST use the exact headings and markers provided below.
-
-    ---
-    **BLOG_POST_START**
-    ## Generated Blog Post
-    {{{K.STATE_BLOG_DRAFT}}}
-    **BLOG_POST_END**
-    ---
-    **LINKEDIN_POST_START**
-    ## Generated LinkedIn Post
-    {{{K.STATE_LINKEDIN_DRAFT}}}
-    **LINKEDIN_POST_END**
-    ---
-    **X_POST_START**
-    ## Generated X (Twitter) Post
-    {{{K.STATE_X_POST_DRAFT}}}
-    **X_POST_END**
-    ---
-    **THREADS_POST_START**
-    ## Generated Threads Post
-    {{{K.STATE_THREADS_POST_DRAFT}}}
-    **THREADS_POST_END**
-    ---
-    **PODCAST_SCRIPT_START**
-    ## Generated Podcast Script
-    {{{K.STATE_PODCAST_SCRIPT}}}
-    **PODCAST_SCRIPT_END**
-    ---
-    **IMAGE_PROMPT_START**
-    ## Final Approved Image Prompt
-    The following prompt was used to generate the images:
-    "{{{K.STATE_IMAGE_PROMPT}}}"
-    **IMAGE_PROMPT_END**
-    ---
-    **MEDIA_STATUS_START**
-    ## Media Generation Status
+    instruction=f"""You are a status reporter. Summarize the media generation results in two markdown bullets.
+
     - **Podcast Audio:** Based on the status report `{{{K.STATE_AUDIO_GENERATION_STATUS}?}}`, confirm if "podcast_episode.wav" was created successfully or if an error occurred.
     - **Generated Images:** Based on the status report `{{{K.STATE_IMAGE_GENERATION_STATUS}?}}`, confirm if the 4 images were created successfully or if an error occurred.
-    **MEDIA_STATUS_END**
-    ---
+    Output ONLY the two bullets.
     """,
+    output_key=K.STATE_MEDIA_STATUS_SUMMARY,
 )
 
-entry_point_agent = LlmAgent(
-    name="QueryCaptureAgent",
+# (marker, heading, state key, output) in report order. The markers are parsed by the UI.
+REPORT_SECTIONS = [
+    ("BLOG_POST", "Generated Blog Post", K.STATE_BLOG_DRAFT, "blog"),
+    ("LINKEDIN_POST", "Generated LinkedIn Post", K.STATE_LINKEDIN_DRAFT, "linkedin"),
+    ("X_POST", "Generated X (Twitter) Post", K.STATE_X_POST_DRAFT, "x"),
+    ("THREADS_POST", "Generated Threads Post", K.STATE_THREADS_POST_DRAFT, "threads"),
+    ("PODCAST_SCRIPT", "Generated Podcast Script", K.STATE_PODCAST_SCRIPT, "podcast"),
+]
+
+def produced_outputs(state) -> frozenset:
+    """The requested outputs plus those the DAG scheduled as their dependencies."""
+    return requested_outputs(state) | frozenset(state.get(K.STATE_DEPENDENCY_OUTPUTS) or [])
+
+def describe_media_status(status_text: Optional[str], success_message: str) -> str:
+    """Turns a media tool's status report into a one-line, human-readable result."""
+    if not status_text:
+        return "⚠️ No status was reported."
+    try:
+        status = extract_json(status_text)
+    except ValueError:
+        status = None
+    if isinstance(status, dict) and status.get("status") == "success":
+        return f"✅ {success_message}"
+    if isinstance(status, dict) and status.get("status") == "error":
+        return f"❌ Generation failed: {status.get('message', 'unknown error')}"
+    if re.search(r"\b(error|fail(ed|ure)?)\b", status_text, re.IGNORECASE):
+        return f"❌ Generation failed: {status_text.strip()[:300]}"
+    if re.search(r"\bsuccess(ful(ly)?)?\b", status_text, re.IGNORECASE):
+        return f"✅ {success_message}"
+    return f"⚠️ Unrecognized status: {status_text.strip()[:300]}"
+
+class ReportSynthesisAgent(BaseAgent):
+    """A custom agent that assembles the final report from session state with a template.
+
+    Approved drafts are copied verbatim between the `*_START`/`*_END` markers, so no
+    output tokens are spent repeating them, and only the requested outputs get a
+    section. The media status is summarized deterministically, or by the optional
+    `media_status_agent` sub-agent when `use_llm_media_summary` is set.
+    """
+    use_llm_media_summary: bool = False
+
+    def __init__(self, name: str, media_status_agent: BaseAgent, use_llm_media_summary: bool = False):
+        super().__init__(name=name, sub_agents=[media_status_agent], use_llm_media_summary=use_llm_media_summary)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        media_status = None
+        if self.use_llm_media_summary:
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            media_status = ctx.session.state.get(K.STATE_MEDIA_STATUS_SUMMARY)
+        if not media_status:
+            state = ctx.session.state
+            outputs = produced_outputs(state)
+            lines = []
+            if "podcast_audio" in outputs:
+                lines.append(f"- **Podcast Audio:** {describe_media_status(state.get(K.STATE_AUDIO_GENERATION_STATUS), '`podcast_episode.wav` was created successfully.')}")
+            if "images" in outputs:
+                lines.append(f"- **Generated Images:** {describe_media_status(state.get(K.STATE_IMAGE_GENERATION_STATUS), 'The 4 images were created successfully.')}")
+            media_status = "\n".join(lines) or "- No media was requested for this run."
+
+        yield Event(
+            author=self.name,
+            content=genai_types.Content(role="model", parts=[genai_types.Part(text=self.render_report(ctx.session.state, media_status))]),
+        )
+
+    @staticmethod
+    def render_report(state, media_status: str) -> str:
+        outputs = produced_outputs(state)
+        dependencies = set(state.get(K.STATE_DEPENDENCY_OUTPUTS) or [])
+        blocks = [
+            f"**{marker}_START**\n## {heading}{' (produced as a dependency)' if output in dependencies else ''}\n"
+            f"{state.get(key) or '_Not generated._'}\n**{marker}_END**"
+            for marker, heading, key, output in REPORT_SECTIONS if output in outputs
+        ]
+        if "images" in outputs:
+            blocks.append(
+                "**IMAGE_PROMPT_START**\n## Final Approved Image Prompt\nThe following prompt was used to generate the images:\n"
+                f"\"{state.get(K.STATE_IMAGE_PROMPT) or ''}\"\n**IMAGE_PROMPT_END**"
+            )
+        blocks.append(f"**MEDIA_STATUS_START**\n## Media Generation Status\n{media_status}\n**MEDIA_STATUS_END**")
+        return "---\n" + "\n---\n".join(blocks) + "\n---"
+
+synthesis_agent = ReportSynthesisAgent(name="SynthesisAgent", media_status_agent=media_status_agent)
+
+query_capture_llm_agent = LlmAgent(
+    name="QueryCaptureLlmAgent",
     model=K.GEMINI_MODEL,
     instruction="You are a routing agent. Your only job is to save the user's query.",
     output_key=K.STATE_USER_QUERY
-)
\ No newline at end of file
+)
+
+entry_point_agent = QueryCaptureAgent(name="QueryCaptureAgent", fallback_agent=query_capture_llm_agent)
\ No newline at end of file
@@ -4,10 +4,12 @@ Defines the "creative" agents responsible for drafting initial content.
 
 Each agent takes a content brief and research dossier as input and produces
 a first draft for a specific platform (Blog, LinkedIn, etc.). They also
-handle revisions based on feedback from the editor agents.
+handle revisions based on feedback from the editor agents. Both inputs are the
+condensed views built for the agent's platform by `ContextCompactionAgent`.
 """
 from google.adk.agents import LlmAgent
 from .. import constants as K
+from .. import validators
 
 # Note: The lengthy instruction prompts are kept here as they are integral
 # to the agent's definition. Using constants for state keys makes them cleaner.
@@ -18,8 +20,8 @@ blog_post_writer_agent = LlmAgent(
     instruction=f"""You are an expert content creator specializing in compelling, professional blog posts.
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_BLOG_DOSSIER_VIEW}}}
     - Optional feedback for revision: {{{K.STATE_BLOG_FEEDBACK}?}}
 
     **Task:**
@@ -42,8 +44,8 @@ linkedin_post_writer_agent = LlmAgent(
     instruction=f"""You are a social media marketing expert specializing in high-impact LinkedIn posts.
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_LINKEDIN_DOSSIER_VIEW}}}
     - Optional feedback for revision: {{{K.STATE_LINKEDIN_FEEDBACK}?}}
 
     **Task:**
@@ -65,8 +67,8 @@ podcast_script_writer_agent = LlmAgent(
     instruction=f"""You are a creative podcast scriptwriter for a two-host show ("Alex" and "Ben").
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_PODCAST_DOSSIER_VIEW}}}
     - Optional feedback for revision: {{{K.STATE_PODCAST_FEEDBACK}?}}
 
     **Task:**
@@ -82,11 +84,11 @@ podcast_script_writer_agent = LlmAgent(
 x_post_writer_agent = LlmAgent(
     name="XPostWriterAgent",
     model=K.GEMINI_MODEL,
-    instruction=f"""You are a viral content creator for X (formerly Twitter). Your task is to write a punchy, engaging post under 280 characters.
+    instruction=f"""You are a viral content creator for X (formerly Twitter). Your task is to write a punchy, engaging post of at most {validators.X_POST_MAX_CHARS} characters (X counts every link as 23 and each CJK character or emoji as 2).
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_X_POST_DOSSIER_VIEW}}}
     - Optional Feedback: {{{K.STATE_X_POST_FEEDBACK}?}}
 
     **Task:**
@@ -104,8 +106,8 @@ threads_post_writer_agent = LlmAgent(
     instruction=f"""You are a community manager creating content for Threads. Write a conversational and informative post that encourages discussion.
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_THREADS_POST_DOSSIER_VIEW}}}
     - Optional Feedback: {{{K.STATE_THREADS_POST_FEEDBACK}?}}
 
     **Task:**
@@ -123,8 +125,8 @@ image_prompt_generator_agent = LlmAgent(
     instruction=f"""You are a specialist in creating prompts for AI-generated social media graphics.
 
     **Inputs (from session state):**
-    - Content Brief: {{{K.STATE_CONTENT_BRIEF}}}
-    - Research Dossier: {{{K.STATE_RESEARCH_DOSSIER}}}
+    - Content Brief: {{{K.STATE_BRIEF_VIEW}}}
+    - Research Dossier: {{{K.STATE_IMAGE_PROMPT_DOSSIER_VIEW}}}
     - Optional feedback: {{{K.STATE_IMAGE_PROMPT_FEEDBACK}?}}
 
     **Task:**
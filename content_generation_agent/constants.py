@@ -35,12 +35,39 @@ STATE_IMAGE_PROMPT_APPROVED = "image_prompt_is_approved"
 
 # --- Media Generation Status ---
 STATE_IMAGE_GENERATION_STATUS = "image_generation_status"
+STATE_IMAGE_ARTIFACTS = "image_artifacts" # Full and preview artifact of each image, with versions and content hashes
 STATE_AUDIO_GENERATION_STATUS = "audio_generation_status"
+STATE_AUDIO_PROGRESS = "audio_progress" # The latest published part of the podcast episode (artifact name, version, progress)
+STATE_MEDIA_STATUS_SUMMARY = "media_status_summary"
 
-# --- Research Loop State ---
+# --- Research Stage State ---
 STATE_SEARCH_QUERIES_LIST = "search_queries_list"
-STATE_CURRENT_SEARCH_QUERY = "current_search_query"
-STATE_SINGLE_SEARCH_RESULT = "single_search_result"
+STATE_RESEARCH_RESULTS = "research_results" # Deduplicated findings rendered one section per query
+STATE_DOSSIER_FINDINGS = "dossier_findings" # The same findings with the queries and source URLs of each
+
+# --- Writer Context (condensed once after research; see context_budget.py) ---
+STATE_BRIEF_VIEW = "content_brief_view" # The brief without the research-only fields
+STATE_BLOG_DOSSIER_VIEW = "blog_dossier_view"
+STATE_LINKEDIN_DOSSIER_VIEW = "linkedin_dossier_view"
+STATE_PODCAST_DOSSIER_VIEW = "podcast_dossier_view"
+STATE_X_POST_DOSSIER_VIEW = "x_post_dossier_view"
+STATE_THREADS_POST_DOSSIER_VIEW = "threads_post_dossier_view"
+STATE_IMAGE_PROMPT_DOSSIER_VIEW = "image_prompt_dossier_view"
+STATE_CONTEXT_AUDIT = "context_audit" # Token counts and truncated/dropped paragraphs of each view
+
+# --- Warm Start (near-duplicate topics) ---
+STATE_WARM_START_MODE = "warm_start_mode" # Per-run override: "auto", "offer" or "off"
+STATE_WARM_START = "warm_start" # The matched past topic, its score, and whether it was reused
+
+# --- Orchestration ---
+STATE_CRITICAL_PATH = "critical_path" # Written by the DAG orchestrator at the end of each run
+STATE_REQUESTED_OUTPUTS = "requested_outputs" # Per-run list of outputs to produce; missing or empty means all
+STATE_DEPENDENCY_OUTPUTS = "dependency_outputs" # Outputs not requested but produced because a requested one needs them
+
+# --- Selectable Outputs ---
+ALL_OUTPUTS = ("blog", "linkedin", "x", "threads", "podcast", "podcast_audio", "images")
 
 # --- Model Configuration ---
-GEMINI_MODEL = "gemini-2.0-flash" # Use a more recent model if available
\ No newline at end of file
+GEMINI_MODEL = "gemini-2.0-flash" # Use a more recent model if available
+IMAGEN_MODEL = "imagen-4.0-fast-generate-preview-06-06"
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
@@ -0,0 +1,178 @@
+# content_generation_agent/context_budget.py
+"""
+Token budgets for the research context handed to each writer.
+
+Every writer sees the brief and dossier on every loop iteration, but an X post
+needs far less of the dossier than a blog post does. Right after research, the
+dossier is condensed once into one view per platform that fits that platform's
+token budget, and the brief is cut down to the fields writers use. The views are
+then reused by every iteration.
+
+Condensing is extractive. The dossier is split into paragraphs under their
+section headings, and each paragraph is ranked by the brief keywords and topic
+words it mentions (plus a small bonus for early and numeric paragraphs). The
+best paragraphs are kept, in their original order, until the budget is spent.
+The last paragraph that does not fit is cut at a sentence boundary. Every
+truncated or dropped paragraph is recorded so regressions can be audited.
+
+Configuration (environment variables):
+    CONTEXT_BUDGET_ENABLED   "0" passes the full dossier and brief to every writer (default "1").
+    CONTEXT_BUDGETS          JSON object of per-view token budgets overriding `DEFAULT_BUDGETS`.
+"""
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from . import constants as K
+from .parsing import extract_json
+from .search_cache import STOPWORDS
+
+# Tokens of dossier each view may use
+DEFAULT_BUDGETS = {"blog": 3000, "podcast": 2500, "threads": 1000, "linkedin": 800, "image_prompt": 400, "x": 300}
+
+VIEW_KEYS = {
+    "blog": K.STATE_BLOG_DOSSIER_VIEW,
+    "linkedin": K.STATE_LINKEDIN_DOSSIER_VIEW,
+    "podcast": K.STATE_PODCAST_DOSSIER_VIEW,
+    "x": K.STATE_X_POST_DOSSIER_VIEW,
+    "threads": K.STATE_THREADS_POST_DOSSIER_VIEW,
+    "image_prompt": K.STATE_IMAGE_PROMPT_DOSSIER_VIEW,
+}
+
+BRIEF_FIELDS = ("topic", "audience", "goal", "tone", "keywords")  # `search_queries` only matters to research
+
+_TOKEN = re.compile(r"\w{1,8}|[^\w\s]")  # Long words count as several sub-word tokens
+_HEADING = re.compile(r"^\s*(#{1,6}\s+.+|\*\*[^*]+\*\*:?)\s*$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_MIN_TRUNCATED_TOKENS = 40  # Smaller leftovers are not worth a partial paragraph
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate: words in chunks of up to 8 characters, plus punctuation."""
+    return len(_TOKEN.findall(text or ""))
+
+def compact_brief(raw_brief: str) -> str:
+    """The brief as compact JSON with only `BRIEF_FIELDS`, or unchanged if it is not JSON."""
+    try:
+        brief = extract_json(raw_brief)
+    except ValueError:
+        return raw_brief
+    if not isinstance(brief, dict):
+        return raw_brief
+    return json.dumps({field: brief[field] for field in BRIEF_FIELDS if field in brief}, ensure_ascii=False)
+
+def brief_terms(raw_brief: str) -> List[str]:
+    """Lowercased content words of the brief's topic and keywords, used to rank paragraphs."""
+    try:
+        brief = extract_json(raw_brief)
+    except ValueError:
+        brief = None
+    if not isinstance(brief, dict):
+        text = raw_brief or ""
+    else:
+        keywords = brief.get("keywords") or []
+        text = " ".join([str(brief.get("topic", ""))] + [str(k) for k in (keywords if isinstance(keywords, list) else [keywords])])
+    return sorted({word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS and len(word) > 2})
+
+def split_paragraphs(dossier: str) -> List[Tuple[str, str]]:
+    """Splits the dossier into (section heading, paragraph) pairs; list items stay with their paragraph."""
+    paragraphs, heading = [], ""
+    for block in re.split(r"\n\s*\n", dossier or ""):
+        lines = [line for line in block.strip().splitlines() if line.strip()]
+        while lines and _HEADING.match(lines[0]):
+            heading = lines.pop(0).strip()
+        if lines:
+            paragraphs.append((heading, "\n".join(lines)))
+    return paragraphs
+
+def _snippet(section: str, paragraph: str) -> str:
+    text = " ".join(paragraph.split())
+    return (f"{section} / " if section else "") + (text[:80] + "…" if len(text) > 80 else text)
+
+def _truncate(paragraph: str, budget: int) -> str:
+    """The leading whole sentences of `paragraph` that fit in `budget` tokens."""
+    sentences, used = [], 0
+    for sentence in _SENTENCE_END.split(paragraph):
+        used += estimate_tokens(sentence)
+        if used > budget:
+            break
+        sentences.append(sentence)
+    return " ".join(sentences)
+
+def condense(dossier: str, budget: int, terms: List[str]) -> Tuple[str, Dict]:
+    """Returns the dossier cut down to about `budget` tokens, and an audit of what was cut."""
+    tokens_in = estimate_tokens(dossier)
+    audit = {"budget": budget, "tokens_in": tokens_in, "tokens_out": tokens_in, "truncated": [], "dropped": []}
+    if tokens_in <= budget:
+        return dossier, audit
+
+    paragraphs = split_paragraphs(dossier)
+    term_set = set(terms)
+
+    def score(index: int) -> float:
+        words = set(re.findall(r"\w+", paragraphs[index][1].lower()))
+        return len(words & term_set) + 1 / (1 + index) + (0.5 if re.search(r"\d", paragraphs[index][1]) else 0)
+
+    kept: Dict[int, str] = {}
+    headings = set()
+    remaining = budget
+    for index in sorted(range(len(paragraphs)), key=score, reverse=True):
+        section, paragraph = paragraphs[index]
+        heading_cost = estimate_tokens(section) if section and section not in headings else 0
+        if heading_cost + estimate_tokens(paragraph) <= remaining:
+            kept[index] = paragraph
+        else:
+            allowance = remaining - heading_cost
+            shortened = _truncate(paragraph, allowance) if allowance >= _MIN_TRUNCATED_TOKENS else ""
+            if not shortened:
+                audit["dropped"].append(_snippet(section, paragraph))
+                continue
+            kept[index] = shortened
+            audit["truncated"].append(_snippet(section, paragraph))
+        remaining -= heading_cost + estimate_tokens(kept[index])
+        headings.add(section)
+
+    blocks, current = [], None
+    for index in sorted(kept):
+        section = paragraphs[index][0]
+        if section and section != current:
+            blocks.append(section)
+            current = section
+        blocks.append(kept[index])
+    text = "\n\n".join(blocks)
+    audit["tokens_out"] = estimate_tokens(text)
+    return text, audit
+
+class ContextBudget:
+    """Builds the per-platform dossier views and the compact brief."""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, enabled: bool = True):
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> "ContextBudget":
+        return cls(
+            budgets={view: int(tokens) for view, tokens in json.loads(os.environ.get("CONTEXT_BUDGETS", "{}")).items()},
+            enabled=os.environ.get("CONTEXT_BUDGET_ENABLED", "1") == "1",
+        )
+
+    def views(self, content_brief: str, research_dossier: str) -> Tuple[Dict[str, str], Dict]:
+        """Returns the state delta of all views and an audit record of each one."""
+        if not self.enabled:
+            delta = {key: research_dossier for key in VIEW_KEYS.values()}
+            delta[K.STATE_BRIEF_VIEW] = content_brief
+            return delta, {"enabled": False}
+
+        terms = brief_terms(content_brief)
+        delta = {K.STATE_BRIEF_VIEW: compact_brief(content_brief)}
+        audit = {"enabled": True, "brief_tokens_in": estimate_tokens(content_brief),
+                 "brief_tokens_out": estimate_tokens(delta[K.STATE_BRIEF_VIEW]), "views": {}}
+        for view, key in VIEW_KEYS.items():
+            delta[key], audit["views"][view] = condense(research_dossier, self.budgets.get(view, DEFAULT_BUDGETS["blog"]), terms)
+        logging.info("✂️ [Context Budget] Dossier views: " + ", ".join(
+            f"{view} {record['tokens_in']}→{record['tokens_out']}" for view, record in audit["views"].items()))
+        return delta, audit
+
+context_budget = ContextBudget.from_env()
@@ -0,0 +1,139 @@
+# content_generation_agent/dossier_store.py
+"""
+Append-only store of research findings with paragraph-level dedupe.
+
+Each search result is split into paragraphs (list items count as their own
+paragraph) and appended as it arrives. A paragraph is dropped if an earlier
+finding already says the same thing:
+
+- its normalized text hashes to an existing finding's (exact duplicate); or
+- most of its word trigrams appear in one existing finding (near duplicate).
+
+A new paragraph that contains most of an existing one replaces that finding's
+text instead, so no fact is lost. Either way the duplicate's query and URLs are
+added to the surviving finding's attribution. Work per paragraph is bounded by
+the trigrams it shares with existing findings, so a run's cost grows linearly
+with the number of queries.
+
+The findings are rendered once, after the last search, as the compact dossier
+draft for the optional LLM polish pass (or for the writers directly).
+
+Configuration (environment variables):
+    DOSSIER_LLM_POLISH                 "0" uses the rendered findings as the dossier without an LLM pass (default "1").
+    DOSSIER_NEAR_DUPLICATE_THRESHOLD   Share of a paragraph's trigrams that makes it a near duplicate (default 0.8).
+"""
+import hashlib
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from .context_budget import split_paragraphs
+
+_URL = re.compile(r"https?://[^\s)\]>\"'<]+")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+")
+
+def normalize_paragraph(text: str) -> str:
+    """Lowercase words without URLs, so formatting, punctuation and citations do not affect matching."""
+    return " ".join(re.findall(r"\w+", _URL.sub("", _LIST_ITEM.sub("", text)).lower()))
+
+def word_trigrams(normalized: str) -> Set[str]:
+    words = normalized.split()
+    if len(words) < 3:
+        return {normalized} if normalized else set()
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+def split_findings(result: str) -> List[str]:
+    """The paragraphs of a search result, with each list item as its own paragraph."""
+    findings = []
+    for _, paragraph in split_paragraphs(result):
+        lines = paragraph.splitlines()
+        if len(lines) > 1 and all(_LIST_ITEM.match(line) for line in lines[1:]):
+            findings += [line.strip() for line in lines]
+        else:
+            findings.append(paragraph.strip())
+    return findings
+
+class DossierStore:
+    """Deduplicated findings with the queries and URLs they came from."""
+
+    def __init__(self, near_duplicate_threshold: float = 0.8):
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.findings: List[Dict] = []  # {"text", "queries", "sources"}, in arrival order
+        self._hashes: Dict[str, int] = {}
+        self._trigrams: List[Set[str]] = []
+        self._index: Dict[str, Set[int]] = defaultdict(set)  # trigram -> findings containing it
+        self.counts = {"paragraphs": 0, "exact_duplicates": 0, "near_duplicates": 0}
+
+    @classmethod
+    def from_env(cls) -> "DossierStore":
+        return cls(float(os.environ.get("DOSSIER_NEAR_DUPLICATE_THRESHOLD", 0.8)))
+
+    def add_result(self, query: str, result: str) -> int:
+        """Appends the new paragraphs of one search result and returns how many were new."""
+        return sum(self.add_paragraph(paragraph, query) for paragraph in split_findings(result))
+
+    def add_paragraph(self, text: str, query: str, sources: Optional[List[str]] = None) -> bool:
+        """Appends `text` unless it duplicates a finding; returns whether it was new."""
+        normalized = normalize_paragraph(text)
+        if not normalized:
+            return False
+        self.counts["paragraphs"] += 1
+        sources = list(dict.fromkeys((sources or []) + _URL.findall(text)))
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if digest in self._hashes:
+            self.counts["exact_duplicates"] += 1
+            self._attribute(self._hashes[digest], query, sources)
+            return False
+
+        trigrams = word_trigrams(normalized)
+        shared: Dict[int, int] = defaultdict(int)
+        for trigram in trigrams:
+            for index in self._index.get(trigram, ()):
+                shared[index] += 1
+        for index, overlap in sorted(shared.items(), key=lambda item: item[1], reverse=True):
+            if overlap >= self.near_duplicate_threshold * len(trigrams):  # Mostly said already
+                self.counts["near_duplicates"] += 1
+                self._attribute(index, query, sources)
+                return False
+            if overlap >= self.near_duplicate_threshold * len(self._trigrams[index]):  # Says more than an earlier finding
+                self.counts["near_duplicates"] += 1
+                self.findings[index]["text"] = text.strip()
+                self._hashes[digest] = index
+                self._index_trigrams(index, trigrams)
+                self._attribute(index, query, sources)
+                return False
+
+        index = len(self.findings)
+        self.findings.append({"text": text.strip(), "queries": [query], "sources": sources})
+        self._hashes[digest] = index
+        self._trigrams.append(set())
+        self._index_trigrams(index, trigrams)
+        return True
+
+    def _index_trigrams(self, index: int, trigrams: Set[str]):
+        self._trigrams[index] |= trigrams
+        for trigram in trigrams:
+            self._index[trigram].add(index)
+
+    def _attribute(self, index: int, query: str, sources: List[str]):
+        finding = self.findings[index]
+        if query and query not in finding["queries"]:
+            finding["queries"].append(query)
+        finding["sources"] = list(dict.fromkeys(finding["sources"] + sources))
+
+    def render(self) -> str:
+        """One section per query, holding the findings first found for it, with sources not already in the text."""
+        sections: Dict[str, str] = {}
+        for finding in self.findings:
+            extra_sources = [url for url in finding["sources"] if url not in finding["text"]]
+            text = finding["text"] + (f" (Sources: {', '.join(extra_sources)})" if extra_sources else "")
+            query = finding["queries"][0]
+            if query not in sections:
+                sections[query] = text
+            else:  # Consecutive list items stay one list
+                both_items = _LIST_ITEM.match(text) and _LIST_ITEM.match(sections[query].rsplit("\n", 1)[-1])
+                sections[query] += ("\n" if both_items else "\n\n") + text
+        return "\n\n".join(f"### Query: {query}\n{text}" for query, text in sections.items())
+
+llm_polish = os.environ.get("DOSSIER_LLM_POLISH", "1") == "1"
@@ -0,0 +1,182 @@
+# content_generation_agent/hedging.py
+"""
+Hedged model calls for agents on the critical path.
+
+Every model call's time to first response is recorded in a per-agent latency
+histogram. For agents that opt in, a call that has not produced its first
+response by the agent's latency percentile (e.g. p95) gets a duplicate request;
+whichever attempt responds successfully first is streamed and the other is
+cancelled. Hedges are capped at a share of all calls, and are only sent when the
+caller reports spare capacity (so they cooperate with the rate governor).
+
+Hedging sends paid duplicate requests, so it is off unless `HEDGE_ENABLED=1`. The
+default agent list (`DEFAULT_HEDGE_AGENTS`) covers the critical path: strategy,
+research, the dossier and the creation-loop writers, since any of them can be the
+slowest loop.
+
+Configuration (environment variables):
+    HEDGE_ENABLED          "1" enables hedging; latencies are recorded either way (default "0").
+    HEDGE_AGENTS           Comma-separated agent names that may hedge (default `DEFAULT_HEDGE_AGENTS`).
+    HEDGE_PERCENTILE       Latency percentile used as the hedge deadline (default 95).
+    HEDGE_BUDGET_PERCENT   Maximum hedges as a percentage of calls (default 5).
+    HEDGE_MIN_SAMPLES      Calls an agent needs before its deadline is trusted (default 20).
+    HEDGE_MIN_DELAY_SECONDS  Lower bound on any hedge deadline (default 1).
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Set
+
+from .stats import bucket_percentile
+from .tracing import count_on_span
+
+class LatencyHistogram:
+    """Log-spaced latency buckets (50 ms to ~6 min, 25% apart) whose counts decay by half as they fill."""
+    BOUNDS = [0.05 * 1.25 ** i for i in range(40)]
+
+    def __init__(self, max_count: int = 1000):
+        self.max_count = max_count
+        self.counts = [0.0] * (len(self.BOUNDS) + 1)
+        self.samples = 0
+
+    def record(self, seconds: float):
+        index = next((i for i, bound in enumerate(self.BOUNDS) if seconds <= bound), len(self.BOUNDS))
+        self.counts[index] += 1
+        self.samples += 1
+        if sum(self.counts) > self.max_count:
+            self.counts = [count / 2 for count in self.counts]
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the `pct` percentile."""
+        return bucket_percentile(self.BOUNDS, self.counts, pct)
+
+DEFAULT_HEDGE_AGENTS = (
+    "StrategyAgent", "ResearchAgent", "DossierAggregatorAgent",
+    "BlogPostWriterAgent", "LinkedInPostWriterAgent", "PodcastScriptWriterAgent", "XPostWriterAgent",
+    "ThreadsPostWriterAgent", "ImagePromptGeneratorAgent",
+)
+
+class HedgePolicy:
+    """Per-agent latency histograms, hedge deadlines and the hedge budget."""
+
+    def __init__(self, agents: Set[str], enabled: bool = True, percentile: float = 95, budget_percent: float = 5,
+                 min_samples: int = 20, min_delay: float = 1.0):
+        self.agents = agents
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget_percent = budget_percent
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self._counts = {"calls": 0, "hedges": 0, "hedge_wins": 0, "skipped_budget": 0, "skipped_capacity": 0}
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        agents = os.environ.get("HEDGE_AGENTS", ",".join(DEFAULT_HEDGE_AGENTS))
+        return cls(
+            agents={name.strip() for name in agents.split(",") if name.strip()},
+            enabled=os.environ.get("HEDGE_ENABLED", "0") == "1",
+            percentile=float(os.environ.get("HEDGE_PERCENTILE", 95)),
+            budget_percent=float(os.environ.get("HEDGE_BUDGET_PERCENT", 5)),
+            min_samples=int(os.environ.get("HEDGE_MIN_SAMPLES", 20)),
+            min_delay=float(os.environ.get("HEDGE_MIN_DELAY_SECONDS", 1)),
+        )
+
+    def deadline(self, agent: str) -> Optional[float]:
+        """Seconds after which a call by `agent` should be hedged, or None if it must not be."""
+        histogram = self.histograms.get(agent)
+        if not self.enabled or agent not in self.agents or not histogram or histogram.samples < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def _spend_budget(self) -> bool:
+        if self._counts["hedges"] + 1 > self._counts["calls"] * self.budget_percent / 100:
+            self._counts["skipped_budget"] += 1
+            return False
+        self._counts["hedges"] += 1
+        return True
+
+    async def run(self, agent: str, make_attempt: Callable[[], AsyncGenerator[Any, None]],
+                  has_capacity: Callable[[], bool] = lambda: True) -> AsyncGenerator[Any, None]:
+        """Streams the items of `make_attempt()`, hedging it with a second attempt past the agent's deadline.
+
+        Only the time to an attempt's first item counts: once an attempt has produced
+        one, it is the winner and every other attempt is cancelled.
+        """
+        self._counts["calls"] += 1
+        deadline = self.deadline(agent)
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        started: List[float] = []
+
+        async def pump(attempt: int):
+            try:
+                async for item in make_attempt():
+                    await queue.put((attempt, "item", item))
+                await queue.put((attempt, "done", None))
+            except Exception as e:
+                await queue.put((attempt, "error", e))
+
+        def launch():
+            started.append(time.monotonic())
+            tasks.append(asyncio.ensure_future(pump(len(tasks))))
+
+        launch()
+        winner: Optional[int] = None
+        failed: Set[int] = set()
+        try:
+            while True:
+                timeout = None
+                if winner is None and len(tasks) == 1 and deadline is not None:
+                    timeout = max(0.0, started[0] + deadline - time.monotonic())
+                try:
+                    attempt, kind, payload = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    deadline = None  # Decide about the hedge only once
+                    if not has_capacity():
+                        self._counts["skipped_capacity"] += 1
+                    elif self._spend_budget():
+                        logging.info(f"🏇 [Hedging] {agent} has no response after {time.monotonic() - started[0]:.1f}s; sending a hedge.")
+                        count_on_span("hedges")
+                        launch()
+                    continue
+
+                if winner is None:
+                    if kind == "error":
+                        failed.add(attempt)
+                        if len(failed) == len(tasks):
+                            raise payload
+                        continue
+                    winner = attempt
+                    self.histograms[agent].record(time.monotonic() - started[winner])
+                    if winner:
+                        self._counts["hedge_wins"] += 1
+                        self.histograms[agent].record(time.monotonic() - started[0])  # The primary took at least this long
+                    for index, task in enumerate(tasks):
+                        if index != winner:
+                            task.cancel()
+                if attempt != winner:
+                    continue
+                if kind == "item":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def metrics(self) -> Dict:
+        """Returns hedge counts and each agent's p50/p95/p99 time to first response."""
+        return {
+            **self._counts,
+            "latency_s": {
+                agent: {f"p{pct}": round(histogram.percentile(pct), 3) for pct in (50, 95, 99)}
+                for agent, histogram in self.histograms.items()
+            },
+        }
+
+hedge_policy = HedgePolicy.from_env()
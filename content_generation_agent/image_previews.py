@@ -0,0 +1,82 @@
+# content_generation_agent/image_previews.py
+"""
+Compact preview derivatives of generated images.
+
+Imagen returns full-size 16:9 PNGs (about 1.5 MB each), but the UI gallery shows
+them at thumbnail size. For every image, `generate_images_tool` also saves a
+downscaled, lossy-encoded preview, and records both artifacts with a SHA-256 of
+their bytes in the `image_artifacts` manifest. Clients load the previews for the
+gallery. They fetch a full-resolution PNG only when it is opened or downloaded,
+and they skip any download whose hash is already in their media cache.
+
+Pillow is optional. Without it no previews are made, and clients fall back to the
+full PNGs.
+
+Configuration (environment variables):
+    IMAGE_PREVIEWS_ENABLED     "0" saves only the full PNGs (default "1").
+    IMAGE_PREVIEW_WIDTH        Width of a preview in pixels; the aspect ratio is kept (default 640).
+    IMAGE_PREVIEW_FORMAT       "webp" or "jpeg" (default "webp").
+    IMAGE_PREVIEW_QUALITY      Encoder quality, 1-95 (default 80).
+"""
+import hashlib
+import io
+import logging
+import os
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Previews are an optimization; the full PNGs are always saved
+    Image = None
+
+MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+class ImagePreviewer:
+    """Encodes a downscaled preview of an image's bytes."""
+
+    def __init__(self, width: int = 640, image_format: str = "webp", quality: int = 80):
+        if image_format not in MIME_TYPES:
+            raise ValueError(f"Unsupported preview format '{image_format}' (expected one of {', '.join(MIME_TYPES)}).")
+        self.width = width
+        self.format = image_format
+        self.quality = quality
+
+    @classmethod
+    def from_env(cls) -> Optional["ImagePreviewer"]:
+        if os.environ.get("IMAGE_PREVIEWS_ENABLED", "1") != "1":
+            return None
+        if Image is None:
+            logging.warning("⚠️ [Images] Pillow is not installed; image previews are disabled.")
+            return None
+        return cls(
+            width=int(os.environ.get("IMAGE_PREVIEW_WIDTH", 640)),
+            image_format=os.environ.get("IMAGE_PREVIEW_FORMAT", "webp").lower(),
+            quality=int(os.environ.get("IMAGE_PREVIEW_QUALITY", 80)),
+        )
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES[self.format]
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else self.format
+
+    def preview(self, data: bytes) -> Dict:
+        """Returns the preview's bytes, size and content hash. CPU-bound, so call it off the event loop."""
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGB")
+            if image.width > self.width:
+                image = image.resize((self.width, round(image.height * self.width / image.width)), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if self.format == "webp":
+                image.save(buffer, format="WEBP", quality=self.quality, method=4)
+            else:
+                image.save(buffer, format="JPEG", quality=self.quality, optimize=True, progressive=True)
+        preview = buffer.getvalue()
+        return {"data": preview, "width": image.width, "height": image.height, "sha256": content_hash(preview)}
+
+image_previewer = ImagePreviewer.from_env()
@@ -0,0 +1,200 @@
+# content_generation_agent/llm_cache.py
+"""
+Content-addressed cache of model responses, shared across sessions.
+
+`LlmCachePlugin` hooks every LlmAgent's model call. The key is a hash of the model
+name, the fully rendered request config (system instruction after state-key
+substitution, tool declarations, generation settings) and the request contents,
+so identical prompts in a re-run are answered without calling Gemini. Responses
+live in an in-memory LRU in front of an optional SQLite store.
+
+By default only the deterministic stages are cached: query capture, strategy, query
+extraction, research and the dossier (`DEFAULT_CACHED_AGENTS`). Writers and
+editors are left out. Otherwise a user who regenerates a topic would silently get
+byte-identical drafts back instead of fresh ones.
+
+Configuration (environment variables):
+    LLM_CACHE_ENABLED            "0" disables the cache (default "1").
+    LLM_CACHE_MAX_ENTRIES        In-memory LRU size (default 1024).
+    LLM_CACHE_TTL_SECONDS        Freshness of an entry (default 86400).
+    LLM_CACHE_DB                 Path of the SQLite store; unset keeps the cache in memory only.
+    LLM_CACHE_MAX_DB_ENTRIES     Rows kept in the SQLite store (default 50000).
+    LLM_CACHE_DISABLED_AGENTS    Comma-separated agent names that never use the cache.
+    LLM_CACHE_ENABLED_AGENTS     Comma-separated agent names that use the cache, or "*" for every agent
+                                 (default: `DEFAULT_CACHED_AGENTS`).
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+DEFAULT_CACHED_AGENTS = {
+    "QueryCaptureLlmAgent", "StrategyAgent", "QueryExtractorLlmAgent", "ResearchAgent", "DossierAggregatorAgent",
+}
+
+def cache_key(llm_request: LlmRequest) -> str:
+    """Hashes everything that determines the model's answer to `llm_request`."""
+    config = llm_request.config.model_dump(mode="json", exclude_none=True) if llm_request.config else {}
+    config.pop("http_options", None)
+    payload = {
+        "model": llm_request.model,
+        "config": config,
+        "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class LlmResponseCache:
+    """An in-memory LRU with TTL, optionally backed by a size-capped SQLite table.
+
+    The LRU holds at most `max_entries` values and, if `max_bytes` is set, at most
+    that many characters of values in total.
+    """
+    TABLE = "llm_cache"
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, db_path: Optional[str] = None,
+                 max_db_entries: int = 50000, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_db_entries = max_db_entries
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (stored_at, response JSON)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {self.TABLE} (key TEXT PRIMARY KEY, stored_at REAL, response TEXT)")
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {self.TABLE}_stored_at ON {self.TABLE} (stored_at)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                return entry[1]
+            self._forget(key)
+            if not self._db:
+                return None
+            row = self._db.execute(f"SELECT stored_at, response FROM {self.TABLE} WHERE key = ?", (key,)).fetchone()
+            if not row or now - row[0] > self.ttl_seconds:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[1]
+
+    def put(self, key: str, response_json: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response_json)
+            if self._db:
+                self._db.execute(f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?)", (key, now, response_json))
+                self._db.execute(
+                    f"DELETE FROM {self.TABLE} WHERE stored_at < ? OR key NOT IN "
+                    f"(SELECT key FROM {self.TABLE} ORDER BY stored_at DESC LIMIT ?)",
+                    (now - self.ttl_seconds, self.max_db_entries),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, stored_at: float, response_json: str):
+        self._forget(key)
+        self._memory[key] = (stored_at, response_json)
+        self._memory_bytes += len(response_json)
+        while len(self._memory) > self.max_entries or (
+                self.max_bytes is not None and self._memory_bytes > self.max_bytes and self._memory):
+            self._forget(next(iter(self._memory)))
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry:
+            self._memory_bytes -= len(entry[1])
+
+class LlmCachePlugin(BasePlugin):
+    """Answers model calls from `LlmResponseCache` and records hit/miss metrics per agent.
+
+    Only complete responses are stored: streamed partial chunks and error responses
+    are skipped. Responses served from the cache carry `custom_metadata["llm_cache"] == "hit"`.
+    """
+
+    def __init__(self, cache: LlmResponseCache, disabled_agents: Optional[Set[str]] = None,
+                 enabled_agents: Optional[Set[str]] = None):
+        super().__init__(name="llm_cache")
+        self.cache = cache
+        self.disabled_agents = disabled_agents or set()
+        self.enabled_agents = enabled_agents
+        self._pending: Dict[Tuple[str, str], str] = {}  # (invocation_id, agent_name) -> key awaiting a response
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    @classmethod
+    def from_env(cls) -> Optional["LlmCachePlugin"]:
+        if os.environ.get("LLM_CACHE_ENABLED", "1") != "1":
+            return None
+        cache = LlmResponseCache(
+            max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024)),
+            ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", 86400)),
+            db_path=os.environ.get("LLM_CACHE_DB") or None,
+            max_db_entries=int(os.environ.get("LLM_CACHE_MAX_DB_ENTRIES", 50000)),
+        )
+        names = lambda var: {name.strip() for name in os.environ.get(var, "").split(",") if name.strip()}
+        enabled_agents = names("LLM_CACHE_ENABLED_AGENTS") or DEFAULT_CACHED_AGENTS
+        return cls(cache, disabled_agents=names("LLM_CACHE_DISABLED_AGENTS"),
+                   enabled_agents=None if "*" in enabled_agents else enabled_agents)
+
+    def _is_enabled_for(self, agent_name: str) -> bool:
+        if agent_name in self.disabled_agents:
+            return False
+        return self.enabled_agents is None or agent_name in self.enabled_agents
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        agent_name = callback_context.agent_name
+        if not self._is_enabled_for(agent_name):
+            return None
+        key = cache_key(llm_request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._counts[agent_name]["hits"] += 1
+            logging.info(f"♻️ [LLM Cache] Hit for {agent_name}.")
+            response = LlmResponse.model_validate_json(cached)
+            response.custom_metadata = {**(response.custom_metadata or {}), "llm_cache": "hit"}
+            return response
+        self._counts[agent_name]["misses"] += 1
+        self._pending[(callback_context.invocation_id, agent_name)] = key
+        return None
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key and llm_response.content and not llm_response.error_code:
+            self.cache.put(key, llm_response.model_dump_json(exclude_none=True))
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest,
+                                      error: Exception) -> Optional[LlmResponse]:
+        self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        metrics = self.metrics()
+        logging.info(f"♻️ [LLM Cache] {metrics['hits']} hits / {metrics['misses']} misses so far (hit rate {metrics['hit_rate']:.0%}).")
+
+    def metrics(self) -> Dict:
+        """Returns overall and per-agent hit/miss counts."""
+        hits = sum(counts["hits"] for counts in self._counts.values())
+        misses = sum(counts["misses"] for counts in self._counts.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "per_agent": {agent: dict(counts) for agent, counts in self._counts.items()},
+        }
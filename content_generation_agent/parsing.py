@@ -0,0 +1,36 @@
+# content_generation_agent/parsing.py
+"""
+Helpers for pulling structured data out of free-form LLM output.
+
+Model responses often wrap JSON in Markdown code fences or surround it with
+commentary, so a plain `json.loads` is not enough.
+"""
+import json
+import re
+from typing import Any
+
+_CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+def extract_json(text: str) -> Any:
+    """Returns the first JSON object or array found in `text`.
+
+    Tries, in order: the whole text, the contents of each ``` code fence, and the
+    first position where a `{` or `[` starts a complete JSON value (ignoring any
+    trailing text). Raises ValueError if nothing decodes.
+    """
+    if not isinstance(text, str):
+        raise ValueError(f"Expected a string, got {type(text).__name__}.")
+    candidates = [text.strip()] + [block.strip() for block in _CODE_FENCE.findall(text)]
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            pass
+    for match in re.finditer(r"[\[{]", text):
+        try:
+            value, _ = _DECODER.raw_decode(text, match.start())
+            return value
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("No JSON object or array found in text.")
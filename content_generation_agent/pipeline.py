@@ -2,15 +2,20 @@
 """
 Defines the overall multi-agent pipeline architecture.
 
-This file imports all the individual agents and composes them into a series of
-sequential, parallel, and looping workflows. The final `root_agent` is the
+This file imports all the individual agents and composes them into sequential
+and looping workflows, wired together by a dependency-driven DAG orchestrator. The final `root_agent` is the
 single entry point for the entire content generation process.
 """
-from google.adk.agents import SequentialAgent, ParallelAgent, LoopAgent
+from google.adk.agents import SequentialAgent, LoopAgent
 
 # Import agent definitions
-from .agents import writers, editors, research, utility
+from .agents import writers, editors, research, utility, dag
 from . import constants as K
+from . import validators
+from .search_cache import search_cache, local_search_backend
+from .topic_index import topic_index, warm_start_mode
+from .context_budget import context_budget
+from .dossier_store import llm_polish
 
 # --- Define Reusable Write-Review-Approve Loops ---
 
@@ -18,7 +23,10 @@ blog_creation_loop = LoopAgent(
     name="BlogCreationLoop",
     sub_agents=[
         writers.blog_post_writer_agent,
-        editors.blog_qa_editor_agent,
+        utility.RuleValidatorAgent(
+            name="BlogRuleValidator", editor=editors.blog_qa_editor_agent, rules=validators.BLOG_RULES,
+            draft_key=K.STATE_BLOG_DRAFT, feedback_key=K.STATE_BLOG_FEEDBACK, approval_key=K.STATE_BLOG_APPROVED,
+        ),
         utility.CheckCompletionAgent(name="BlogCompletionChecker", approval_key=K.STATE_BLOG_APPROVED),
     ],
     max_iterations=3,
@@ -38,7 +46,10 @@ podcast_creation_loop = LoopAgent(
     name="PodcastCreationLoop",
     sub_agents=[
         writers.podcast_script_writer_agent,
-        editors.podcast_qa_editor_agent,
+        utility.RuleValidatorAgent(
+            name="PodcastRuleValidator", editor=editors.podcast_qa_editor_agent, rules=validators.PODCAST_RULES,
+            draft_key=K.STATE_PODCAST_SCRIPT, feedback_key=K.STATE_PODCAST_FEEDBACK, approval_key=K.STATE_PODCAST_APPROVED,
+        ),
         utility.CheckCompletionAgent(name="PodcastCompletionChecker", approval_key=K.STATE_PODCAST_APPROVED),
     ],
     max_iterations=3,
@@ -48,7 +59,12 @@ x_creation_loop = LoopAgent(
     name="XCreationLoop",
     sub_agents=[
         writers.x_post_writer_agent,
-        editors.x_qa_editor_agent,
+        # The rules cover length and hashtags; the editor still judges impact unless X_SKIP_EDITOR_ON_PASS=1.
+        utility.RuleValidatorAgent(
+            name="XRuleValidator", editor=editors.x_qa_editor_agent, rules=validators.X_POST_RULES,
+            draft_key=K.STATE_X_POST_DRAFT, feedback_key=K.STATE_X_POST_FEEDBACK, approval_key=K.STATE_X_POST_APPROVED,
+            skip_editor_on_pass=validators.x_skip_editor_on_pass,
+        ),
         utility.CheckCompletionAgent(name="XCompletionChecker", approval_key=K.STATE_X_POST_APPROVED),
     ],
     max_iterations=3,
@@ -74,60 +90,101 @@ image_prompt_creation_loop = LoopAgent(
     max_iterations=3,
 )
 
-# --- Define High-Level Pipelines ---
-
-# Pipeline for creating the image (prompt loop -> generation)
-image_creation_pipeline = SequentialAgent(
-    name="FullImageCreationPipeline",
-    sub_agents=[image_prompt_creation_loop, utility.image_generator_agent],
-)
-
-# Parallel agent to create all text/image content simultaneously
-parallel_creation_agent = ParallelAgent(
-    name="ParallelCreationAgent",
+# Research stage (search all queries concurrently, appending deduplicated findings -> materialize the dossier once)
+research_stage = SequentialAgent(
+    name="ResearchStage",
     sub_agents=[
-        blog_creation_loop,
-        linkedin_creation_loop,
-        podcast_creation_loop,
-        x_creation_loop,
-        threads_creation_loop,
-        image_creation_pipeline,
+        utility.ParallelResearchAgent(
+            name="ParallelResearchAgent",
+            search_agent=research.research_agent,
+            max_queries=8, # Query budget: at most 8 searches per run
+            max_parallel=5,
+            search_cache=search_cache, # Shared across sessions; see search_cache.py
+            search_backend=local_search_backend, # None unless SEARCH_BACKEND=local
+        ),
+        utility.DossierPolishAgent(
+            name="DossierPolishAgent",
+            polish_agent=research.dossier_aggregator_agent,
+            use_llm_polish=llm_polish, # DOSSIER_LLM_POLISH; see dossier_store.py
+        ),
     ],
 )
 
-# Pipeline for iterative research (manage query -> search -> aggregate)
-research_loop = LoopAgent(
-    name="IterativeResearchLoop",
-    sub_agents=[
-        SequentialAgent(
-            name="ResearchIteration",
-            sub_agents=[
-                utility.ResearchQueryManager(name="QueryManager"),
-                research.single_search_agent,
-                research.dossier_aggregator_agent,
-            ],
-        )
-    ],
-    max_iterations=5, # Allow for up to 5 search queries
+# Strategy -> query extraction -> research, behind a near-duplicate topic lookup
+warm_start_agent = utility.WarmStartAgent(
+    name="WarmStartAgent",
+    cold_path_agent=SequentialAgent(
+        name="StrategyAndResearchStage",
+        sub_agents=[
+            # 1. Define strategy and extract search terms
+            research.strategy_agent,
+            research.query_extractor_agent,
+            # 2. Run all searches in parallel and build the dossier
+            research_stage,
+        ],
+    ),
+    topic_index=topic_index,
+    default_mode=warm_start_mode, # TOPIC_WARM_START; see topic_index.py
 )
 
 # --- Assemble the Master Pipeline ---
 
-content_pipeline_agent = SequentialAgent(
+# Written by strategy and research, or by a warm start
+BRIEF_AND_DOSSIER = [K.STATE_CONTENT_BRIEF, K.STATE_RESEARCH_DOSSIER]
+
+# Condensed per-platform views of the brief and dossier, built once for all writer iterations
+context_compaction_agent = utility.ContextCompactionAgent(name="ContextCompactionAgent", context_budget=context_budget)
+WRITER_VIEWS = [K.STATE_BRIEF_VIEW, K.STATE_BLOG_DOSSIER_VIEW, K.STATE_LINKEDIN_DOSSIER_VIEW, K.STATE_PODCAST_DOSSIER_VIEW,
+                K.STATE_X_POST_DOSSIER_VIEW, K.STATE_THREADS_POST_DOSSIER_VIEW, K.STATE_IMAGE_PROMPT_DOSSIER_VIEW]
+
+# The state keys behind each selectable output (`requested_outputs` in the run request)
+OUTPUT_KEYS = {
+    "blog": [K.STATE_BLOG_DRAFT],
+    "linkedin": [K.STATE_LINKEDIN_DRAFT],
+    "x": [K.STATE_X_POST_DRAFT],
+    "threads": [K.STATE_THREADS_POST_DRAFT],
+    "podcast": [K.STATE_PODCAST_SCRIPT],
+    "podcast_audio": [K.STATE_AUDIO_GENERATION_STATUS],
+    "images": [K.STATE_IMAGE_GENERATION_STATUS],
+}
+
+# Each node starts as soon as the nodes writing its inputs have finished, e.g. TTS
+# starts when the podcast loop ends, not when the slowest creation loop does. Only
+# the nodes behind the requested outputs run; synthesis always runs last.
+content_pipeline_agent = dag.DagAgent(
     name="ContentPipelineAgent",
-    sub_agents=[
-        # 1. Define strategy and extract search terms
-        research.strategy_agent,
-        research.query_extractor_agent,
-        # 2. Execute research loop to build the dossier
-        research_loop,
-        # 3. Create all content in parallel
-        parallel_creation_agent,
-        # 4. Generate audio from the final podcast script
-        utility.audio_producer_agent,
-        # 5. Synthesize the final report for the user
-        utility.synthesis_agent,
-    ]
+    outputs=OUTPUT_KEYS,
+    nodes=[
+        # 1-2. Strategy and research, skipped when a near-duplicate past topic is reused
+        dag.DagNode(warm_start_agent, reads=[K.STATE_USER_QUERY], writes=BRIEF_AND_DOSSIER),
+        # 3. Condense the research into each writer's token budget
+        dag.DagNode(context_compaction_agent, reads=BRIEF_AND_DOSSIER, writes=WRITER_VIEWS + [K.STATE_CONTEXT_AUDIT]),
+        # 4. Create all content concurrently
+        dag.DagNode(blog_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_BLOG_DOSSIER_VIEW],
+                    writes=[K.STATE_BLOG_DRAFT, K.STATE_BLOG_FEEDBACK, K.STATE_BLOG_APPROVED]),
+        dag.DagNode(linkedin_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_LINKEDIN_DOSSIER_VIEW],
+                    writes=[K.STATE_LINKEDIN_DRAFT, K.STATE_LINKEDIN_FEEDBACK, K.STATE_LINKEDIN_APPROVED]),
+        dag.DagNode(podcast_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_PODCAST_DOSSIER_VIEW],
+                    writes=[K.STATE_PODCAST_SCRIPT, K.STATE_PODCAST_FEEDBACK, K.STATE_PODCAST_APPROVED]),
+        dag.DagNode(x_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_X_POST_DOSSIER_VIEW],
+                    writes=[K.STATE_X_POST_DRAFT, K.STATE_X_POST_FEEDBACK, K.STATE_X_POST_APPROVED]),
+        dag.DagNode(threads_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_THREADS_POST_DOSSIER_VIEW],
+                    writes=[K.STATE_THREADS_POST_DRAFT, K.STATE_THREADS_POST_FEEDBACK, K.STATE_THREADS_POST_APPROVED]),
+        dag.DagNode(image_prompt_creation_loop, reads=[K.STATE_BRIEF_VIEW, K.STATE_IMAGE_PROMPT_DOSSIER_VIEW],
+                    writes=[K.STATE_IMAGE_PROMPT, K.STATE_IMAGE_PROMPT_FEEDBACK, K.STATE_IMAGE_PROMPT_APPROVED]),
+        # 5. Generate media as soon as its input is approved
+        dag.DagNode(utility.image_generator_agent, reads=[K.STATE_IMAGE_PROMPT], writes=[K.STATE_IMAGE_GENERATION_STATUS]),
+        dag.DagNode(utility.audio_producer_agent, reads=[K.STATE_PODCAST_SCRIPT], writes=[K.STATE_AUDIO_GENERATION_STATUS]),
+        # 6. Synthesize the final report for the user
+        dag.DagNode(
+            utility.synthesis_agent,
+            reads=[K.STATE_BLOG_DRAFT, K.STATE_LINKEDIN_DRAFT, K.STATE_X_POST_DRAFT, K.STATE_THREADS_POST_DRAFT,
+                   K.STATE_PODCAST_SCRIPT, K.STATE_IMAGE_PROMPT, K.STATE_IMAGE_GENERATION_STATUS,
+                   K.STATE_AUDIO_GENERATION_STATUS],
+            writes=[K.STATE_MEDIA_STATUS_SUMMARY],
+            always=True,
+        ),
+    ],
 )
 
 # The final, top-level agent that is exposed to the ADK framework.
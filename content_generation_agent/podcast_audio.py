@@ -0,0 +1,245 @@
+# content_generation_agent/podcast_audio.py
+"""
+Chunked, parallel TTS synthesis of podcast scripts.
+
+A script is split at `Alex:`/`Ben:` turn boundaries into segments of at most
+`max_chars` characters. A turn that is longer than that on its own is split at
+sentence boundaries, and each piece keeps the speaker label. Segments are
+synthesized concurrently, up to `parallelism` at a time. A failed segment is
+retried on its own. The 24 kHz mono PCM of all segments is then stitched into
+one WAV, with `pause_ms` of silence between segments. Callers can also receive
+the audio in order as segments finish, to publish the episode while later
+segments are still rendering.
+
+Segment audio is cached under a hash of the segment text and the voice setup.
+Where a segment ends depends only on the turns near it. A segment closes after a
+turn whose text hash picks it as a boundary, or when the next turn would not
+fit. Revising some lines therefore changes only the segments holding them, and
+re-synthesizing a revised script only renders those segments.
+
+Configuration (environment variables):
+    TTS_SEGMENT_MAX_CHARS              Longest segment sent in one TTS request (default 1500).
+    TTS_PARALLELISM                    Segments synthesized at the same time per script (default 4).
+    TTS_SEGMENT_RETRIES                Retries of a failed segment (default 2).
+    TTS_SEGMENT_PAUSE_MS               Silence between stitched segments (default 150; 0 for none).
+    TTS_SEGMENT_CACHE_ENABLED          "0" disables the segment cache (default "1").
+    TTS_SEGMENT_CACHE_MAX_MB           Memory held by cached segment audio (default 64).
+    TTS_SEGMENT_CACHE_MAX_ENTRIES      Segments kept in memory (default 64).
+    TTS_SEGMENT_CACHE_TTL_SECONDS      Freshness of a cached segment (default 604800).
+    TTS_SEGMENT_CACHE_DB               Path of the SQLite store; unset keeps the cache in memory only.
+    TTS_SEGMENT_CACHE_MAX_DB_ENTRIES   Segments kept in the SQLite store (default 500).
+
+A full 1500-character segment is about 1.5 minutes of speech, or 4-5 MB of PCM
+(about 6 MB as stored base64), so the memory tier is bounded by size rather than
+by entry count alone. The default keeps roughly the last ten full segments.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import os
+import random
+import re
+import wave
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .llm_cache import LlmResponseCache
+from .tracing import count_on_span
+
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2  # 16-bit mono PCM
+
+SegmentFn = Callable[[str], Awaitable[bytes]]
+ChunkFn = Callable[[bytes, int, int], Awaitable[None]]
+
+_TURN = re.compile(r"^\W*(Alex|Ben)\W*:", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_turns(script: str) -> List[str]:
+    """Speaker turns of `script`, each starting with its speaker label; unlabeled lines join the turn above."""
+    turns: List[str] = []
+    for line in script.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _TURN.match(line) or not turns:
+            turns.append(line)
+        else:
+            turns[-1] += "\n" + line
+    return turns
+
+def _split_long_turn(turn: str, max_chars: int) -> List[str]:
+    """Splits one over-long turn at sentence ends into pieces that each carry the speaker label."""
+    match = _TURN.match(turn)
+    label = f"{match.group(1)}: " if match else ""
+    text = turn[match.end():].strip(" *_") if match else turn
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text):
+        if current and len(label) + len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(label + current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(label + current)
+    return pieces
+
+def _is_boundary(turn: str) -> bool:
+    """Content-defined segment boundary: about one turn in four ends a segment."""
+    return hashlib.sha256(turn.encode("utf-8")).digest()[0] % 4 == 0
+
+def split_script(script: str, max_chars: int = 1500) -> List[str]:
+    """Groups the turns of `script` into segments of at most `max_chars` characters."""
+    turns = []
+    for turn in split_turns(script):
+        turns += [turn] if len(turn) <= max_chars else _split_long_turn(turn, max_chars)
+    segments, current = [], []
+    for turn in turns:
+        if current and len("\n".join(current + [turn])) > max_chars:
+            segments.append("\n".join(current))
+            current = []
+        current.append(turn)
+        if _is_boundary(turn) and len("\n".join(current)) >= max_chars // 4:
+            segments.append("\n".join(current))
+            current = []
+    if current:
+        segments.append("\n".join(current))
+    return segments
+
+def silence(ms: int) -> bytes:
+    return b"\x00" * (SAMPLE_RATE * ms // 1000 * SAMPLE_WIDTH)
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    with io.BytesIO() as in_memory_file:
+        with wave.open(in_memory_file, 'wb') as wf:
+            wf.setnchannels(1); wf.setsampwidth(SAMPLE_WIDTH); wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm)
+        return in_memory_file.getvalue()
+
+def stitch(segments: List[bytes], pause_ms: int = 0) -> bytes:
+    """Joins PCM segments with `pause_ms` of silence between them."""
+    # A segment with an odd byte count would shift every later sample by one byte.
+    segments = [pcm[:len(pcm) - len(pcm) % SAMPLE_WIDTH] for pcm in segments]
+    return silence(pause_ms).join(segments)
+
+class SegmentRejected(ValueError):
+    """TTS refused a segment (e.g. a safety block). Retrying the same text will not help, so it is not retried."""
+
+class SegmentAudioStore(LlmResponseCache):
+    """The `LlmResponseCache` LRU/SQLite store, in its own table, holding base64 PCM.
+
+    Sized for audio: the LRU is bounded by bytes (`max_bytes`) as well as entries.
+    """
+    TABLE = "tts_segment_cache"
+
+    def __init__(self, max_entries: int = 64, ttl_seconds: float = 604800, db_path: Optional[str] = None,
+                 max_db_entries: int = 500, max_bytes: Optional[int] = 64 * 1024 * 1024):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds, db_path=db_path,
+                         max_db_entries=max_db_entries, max_bytes=max_bytes)
+
+class PodcastSynthesizer:
+    """Renders a script as concurrently synthesized, cached segments and stitches them into one WAV."""
+
+    def __init__(self, store: Optional[SegmentAudioStore] = None, max_chars: int = 1500, parallelism: int = 4,
+                 retries: int = 2, pause_ms: int = 150, retry_base_seconds: float = 1.0):
+        self.store = store
+        self.max_chars = max_chars
+        self.parallelism = parallelism
+        self.retries = retries
+        self.pause_ms = pause_ms
+        self.retry_base_seconds = retry_base_seconds
+        self._counts = {"segments": 0, "cache_hits": 0, "synthesized": 0, "retries": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls) -> "PodcastSynthesizer":
+        store = None
+        if os.environ.get("TTS_SEGMENT_CACHE_ENABLED", "1") == "1":
+            store = SegmentAudioStore(
+                max_entries=int(os.environ.get("TTS_SEGMENT_CACHE_MAX_ENTRIES", 64)),
+                ttl_seconds=float(os.environ.get("TTS_SEGMENT_CACHE_TTL_SECONDS", 604800)),
+                db_path=os.environ.get("TTS_SEGMENT_CACHE_DB") or None,
+                max_db_entries=int(os.environ.get("TTS_SEGMENT_CACHE_MAX_DB_ENTRIES", 500)),
+                max_bytes=int(float(os.environ.get("TTS_SEGMENT_CACHE_MAX_MB", 64)) * 1024 * 1024),
+            )
+        return cls(
+            store=store,
+            max_chars=int(os.environ.get("TTS_SEGMENT_MAX_CHARS", 1500)),
+            parallelism=int(os.environ.get("TTS_PARALLELISM", 4)),
+            retries=int(os.environ.get("TTS_SEGMENT_RETRIES", 2)),
+            pause_ms=int(os.environ.get("TTS_SEGMENT_PAUSE_MS", 150)),
+        )
+
+    async def synthesize(self, script: str, synthesize_segment: SegmentFn, voice_key: str = "",
+                         on_chunk: Optional[ChunkFn] = None) -> Tuple[bytes, Dict]:
+        """Returns the script's WAV bytes and per-run counts.
+
+        `synthesize_segment(text)` returns the raw PCM of one segment. `voice_key`
+        names the model and voices, so cached audio is not reused across them.
+        `on_chunk(pcm, ready, total)` is awaited with the PCM of each run of segments
+        that finished in script order. `ready` counts the segments published so far.
+        Concatenated, the chunks are exactly the stitched episode.
+        """
+        segments = split_script(script, self.max_chars)
+        if not segments:
+            raise ValueError("The podcast script has no lines to synthesize.")
+        keys = [hashlib.sha256(f"{voice_key}\n{text}".encode("utf-8")).hexdigest() for text in segments]
+        run = {"segments": len(segments), "cache_hits": 0, "synthesized": 0, "retries": 0}
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async def render(key: str, text: str) -> bytes:
+            cached = self.store.get(key) if self.store else None
+            if cached is not None:
+                run["cache_hits"] += 1
+                return base64.b64decode(cached)
+            async with semaphore:
+                pcm = await self._with_retries(text, synthesize_segment, run)
+            run["synthesized"] += 1
+            if self.store:
+                self.store.put(key, base64.b64encode(pcm).decode("ascii"))
+            return pcm
+
+        # Identical segments (e.g. a repeated sign-off) are rendered once.
+        tasks = {key: asyncio.ensure_future(render(key, text)) for key, text in dict(zip(keys, segments, strict=True)).items()}
+        chunks: List[bytes] = []
+        ready = 0
+        try:
+            while ready < len(keys):
+                # Wait for the next segment in script order, then take every later one that is already done.
+                batch = [await tasks[keys[ready]]]
+                ready += 1
+                while ready < len(keys) and tasks[keys[ready]].done():
+                    batch.append(tasks[keys[ready]].result())
+                    ready += 1
+                chunk = (silence(self.pause_ms) if chunks else b"") + stitch(batch, self.pause_ms)
+                chunks.append(chunk)
+                if on_chunk:
+                    await on_chunk(chunk, ready, len(keys))
+        finally:
+            for task in tasks.values():
+                task.cancel()  # Only still-pending segments of a failed run are affected
+        for counter in ("segments", "cache_hits", "synthesized", "retries"):
+            self._counts[counter] += run[counter]
+        logging.info(f"🎙️ [TTS] {run['segments']} segments: {run['cache_hits']} cached, "
+                     f"{run['synthesized']} synthesized, {run['retries']} retries.")
+        return pcm_to_wav(b"".join(chunks)), run
+
+    async def _with_retries(self, text: str, synthesize_segment: SegmentFn, run: Dict) -> bytes:
+        for attempt in range(self.retries + 1):
+            try:
+                pcm = await synthesize_segment(text)
+                if not pcm:
+                    raise ValueError("TTS API did not return audio content.")
+                return pcm
+            except Exception as e:
+                if attempt == self.retries or isinstance(e, SegmentRejected):
+                    self._counts["failures"] += 1
+                    raise
+                logging.warning(f"⚠️ [TTS] Segment failed ({e or type(e).__name__}); retry {attempt + 1}/{self.retries}.")
+            run["retries"] += 1
+            count_on_span("retries")
+            await asyncio.sleep(random.uniform(0, self.retry_base_seconds * 2 ** attempt))
+
+    def metrics(self) -> Dict:
+        return dict(self._counts)
+
+podcast_synthesizer = PodcastSynthesizer.from_env()
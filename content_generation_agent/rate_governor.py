@@ -0,0 +1,400 @@
+# content_generation_agent/rate_governor.py
+"""
+Process-wide admission control for every Gemini, Imagen and TTS call in the ADK server.
+
+Each model gets a `ModelLimiter` with token buckets for requests and tokens per
+minute, and a concurrency limit. Waiting calls are queued per session and granted
+round-robin, so one campaign's six creation loops cannot starve another user.
+Limits adapt AIMD-style: a 429/503 halves the model's rate and concurrency (at
+most once per cooldown), and successes add back about 10% per second. Overloaded calls
+are retried with exponential backoff and full jitter.
+
+LLM agents are governed by `GovernedGemini`, which `agent.py` registers (via
+`register_governed_gemini()`) for the `gemini-*` model names the agents use when
+it builds the app, and which also applies request hedging (`hedging.py`). Google Search runs inside those model calls
+(grounding). Tools wrap their Imagen/TTS calls in `rate_governor.call(...)`.
+`RateGovernorPlugin` tags each call with its session and agent and logs the metrics.
+
+Configuration (environment variables):
+    RATE_GOVERNOR_ENABLED        "0" disables governing (default "1").
+    RATE_LIMIT_RPM               Default requests per minute per model (default 300).
+    RATE_LIMIT_TPM               Default tokens per minute per model (default 1000000).
+    RATE_LIMIT_CONCURRENCY       Default concurrent calls per model (default 16).
+    RATE_LIMITS                  JSON per-model overrides, e.g. '{"gemini-2.0-flash": {"rpm": 60, "tpm": 200000}}'.
+    RATE_BURST_SECONDS           Seconds of quota a bucket may spend at once (default 2).
+    RATE_RETRY_MAX               Retries of an overloaded call (default 4).
+    RATE_RETRY_BASE_SECONDS      First backoff ceiling; doubles per retry (default 1).
+    RATE_RETRY_MAX_SECONDS       Largest backoff ceiling (default 30).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Optional, TypeVar
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.google_llm import Gemini
+from google.adk.models.registry import LLMRegistry
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import BaseTool, ToolContext
+
+from . import constants as K
+from .hedging import hedge_policy
+from .stats import percentile
+from .tracing import count_on_span
+
+T = TypeVar("T")
+
+OVERLOAD_STATUS_CODES = (429, 503)
+DEFAULT_MODEL_LIMITS = {
+    # Preview media models have much smaller quotas than the text models
+    K.IMAGEN_MODEL: {"rpm": 20, "concurrency": 4},
+    K.TTS_MODEL: {"rpm": 10, "concurrency": 2},
+}
+
+current_session_id: contextvars.ContextVar[str] = contextvars.ContextVar("current_session_id", default="default")
+current_agent_name: contextvars.ContextVar[str] = contextvars.ContextVar("current_agent_name", default="")
+
+def is_overload_error(error: Exception) -> bool:
+    """True for quota / overload errors from google-genai or google-api-core (HTTP 429 or 503)."""
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in OVERLOAD_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough token count of a request (4 characters per token) plus its output allowance."""
+    chars = sum(len(part.text or "") for content in llm_request.contents for part in (content.parts or []))
+    config = llm_request.config
+    if config and isinstance(config.system_instruction, str):
+        chars += len(config.system_instruction)
+    max_output = (config.max_output_tokens if config else None) or 1024
+    return chars // 4 + max_output
+
+class TokenBucket:
+    """Refills at `rate` units per second up to `capacity`; may go into debt when a charge is corrected upwards."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)  # A request larger than the bucket waits for a full bucket
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> float:
+        """Charges `amount`, capped at the capacity, and returns what was actually charged."""
+        self._refill()
+        charged = min(amount, self.capacity)
+        self.level -= charged
+        return charged
+
+    def adjust(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+class Slot:
+    """A granted call. Set `overloaded` or `tokens_used` before the slot is released.
+
+    `charged` is what the token bucket was charged at admission. It is less than the
+    estimate `tokens` when that exceeds the bucket's capacity.
+    """
+
+    def __init__(self, session_id: str, tokens: int, waited: float, charged: float = 0.0):
+        self.session_id = session_id
+        self.tokens = tokens
+        self.waited = waited
+        self.charged = charged
+        self.overloaded = False
+        self.tokens_used: Optional[int] = None
+
+class ModelLimiter:
+    """RPM/TPM token buckets, an AIMD concurrency limit and per-session fair queuing for one model."""
+
+    def __init__(self, model: str, rpm: float, tpm: float, concurrency: int, burst_seconds: float = 2.0,
+                 cooldown_seconds: float = 2.0):
+        self.model = model
+        self.rpm, self.tpm, self.max_concurrency = rpm, tpm, concurrency
+        self.burst_seconds = burst_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.factor = 1.0  # AIMD multiplier applied to rate and concurrency
+        self.requests = TokenBucket(rpm / 60, max(1.0, rpm / 60 * burst_seconds))
+        self.tokens = TokenBucket(tpm / 60, max(1.0, tpm / 60 * burst_seconds))
+        self.in_flight = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()  # session -> waiting (future, tokens)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = 0.0
+        self._waits = deque(maxlen=1000)
+        self._counts = {"granted": 0, "overloaded": 0, "max_queue_depth": 0}
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(1, int(self.max_concurrency * self.factor))
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def acquire(self, session_id: str, tokens: int) -> Slot:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (future, tokens)  # The future's result is the number of tokens charged
+        self._queues.setdefault(session_id, deque()).append(waiter)
+        self._counts["max_queue_depth"] = max(self._counts["max_queue_depth"], self.queue_depth)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            charged = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.in_flight -= 1  # Granted just before the cancellation landed
+                self.tokens.adjust(-future.result())
+                self._dispatch()
+            else:
+                queue = self._queues.get(session_id)
+                if queue and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[session_id]
+            raise
+        waited = time.monotonic() - started
+        self._waits.append(waited)
+        return Slot(session_id, tokens, waited, charged)
+
+    def release(self, slot: Slot):
+        self.in_flight -= 1
+        if slot.tokens_used is not None:
+            self.tokens.adjust(slot.tokens_used - slot.charged)
+        now = time.monotonic()
+        if slot.overloaded:
+            self._counts["overloaded"] += 1
+            if now - self._last_decrease >= self.cooldown_seconds:
+                self._last_decrease = now
+                self._set_factor(self.factor / 2)
+                logging.warning(f"🚦 [Rate Governor] {self.model} overloaded; limit now {self.concurrency_limit} "
+                                f"concurrent, {self.rpm * self.factor:.0f} RPM.")
+        elif self.factor < 1.0:
+            self._set_factor(self.factor + 0.1 / max(1.0, self.requests.rate))  # About +10% per second of traffic
+        self._dispatch()
+
+    def _set_factor(self, factor: float):
+        self.factor = min(1.0, max(0.05, factor))
+        self.requests.rate = self.rpm / 60 * self.factor
+        self.tokens.rate = self.tpm / 60 * self.factor
+
+    def _dispatch(self):
+        """Grants waiting calls round-robin across sessions while concurrency and both buckets allow."""
+        while self._queues and self.in_flight < self.concurrency_limit:
+            session_id, queue = next(iter(self._queues.items()))
+            future, tokens = queue[0]
+            if future.cancelled():
+                queue.popleft()
+            else:
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if delay > 0:
+                    self._schedule(delay)
+                    return
+                queue.popleft()
+                self.requests.take(1)
+                charged = self.tokens.take(tokens)
+                self.in_flight += 1
+                self._counts["granted"] += 1
+                future.set_result(charged)
+            self._queues.move_to_end(session_id)  # The next grant goes to the next session
+            if not queue:
+                del self._queues[session_id]
+
+    def _schedule(self, delay: float):
+        loop = asyncio.get_running_loop()
+        if self._timer and not self._timer.cancelled() and self._timer.when() <= loop.time() + delay:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def metrics(self) -> Dict:
+        waits = list(self._waits)
+        return {
+            **self._counts,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "concurrency_limit": self.concurrency_limit,
+            "effective_rpm": round(self.rpm * self.factor, 1),
+            "wait_p50_s": round(percentile(waits, 50), 3),
+            "wait_p95_s": round(percentile(waits, 95), 3),
+        }
+
+class RateGovernor:
+    """Holds one `ModelLimiter` per model and runs calls through them with retry on overload."""
+
+    def __init__(self, rpm: float = 300, tpm: float = 1_000_000, concurrency: int = 16,
+                 model_limits: Optional[Dict[str, Dict]] = None, burst_seconds: float = 2.0,
+                 max_retries: int = 4, retry_base_seconds: float = 1.0, retry_max_seconds: float = 30.0):
+        self.defaults = {"rpm": rpm, "tpm": tpm, "concurrency": concurrency}
+        self.model_limits = {**DEFAULT_MODEL_LIMITS, **(model_limits or {})}
+        self.burst_seconds = burst_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["RateGovernor"]:
+        if os.environ.get("RATE_GOVERNOR_ENABLED", "1") != "1":
+            return None
+        return cls(
+            rpm=float(os.environ.get("RATE_LIMIT_RPM", 300)),
+            tpm=float(os.environ.get("RATE_LIMIT_TPM", 1_000_000)),
+            concurrency=int(os.environ.get("RATE_LIMIT_CONCURRENCY", 16)),
+            model_limits=json.loads(os.environ.get("RATE_LIMITS") or "{}"),
+            burst_seconds=float(os.environ.get("RATE_BURST_SECONDS", 2)),
+            max_retries=int(os.environ.get("RATE_RETRY_MAX", 4)),
+            retry_base_seconds=float(os.environ.get("RATE_RETRY_BASE_SECONDS", 1)),
+            retry_max_seconds=float(os.environ.get("RATE_RETRY_MAX_SECONDS", 30)),
+        )
+
+    def limiter(self, model: str) -> ModelLimiter:
+        if model not in self._limiters:
+            limits = {**self.defaults, **self.model_limits.get(model, {})}
+            self._limiters[model] = ModelLimiter(model, limits["rpm"], limits["tpm"], int(limits["concurrency"]),
+                                                 burst_seconds=self.burst_seconds)
+        return self._limiters[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, tokens: int = 0) -> AsyncGenerator[Slot, None]:
+        """Holds one admitted call to `model` for the duration of the block."""
+        limiter = self.limiter(model)
+        slot = await limiter.acquire(current_session_id.get(), tokens)
+        try:
+            yield slot
+        finally:
+            limiter.release(slot)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1)))
+
+    async def call(self, model: str, fn: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Runs `fn()` inside a slot for `model`, retrying with backoff while the model is overloaded."""
+        for attempt in range(self.max_retries + 1):
+            async with self.slot(model, tokens) as slot:
+                try:
+                    return await fn()
+                except Exception as e:
+                    if not is_overload_error(e):
+                        raise
+                    slot.overloaded = True
+                    if attempt == self.max_retries:
+                        raise
+            self.retries += 1
+            count_on_span("retries")
+            await asyncio.sleep(self.backoff(attempt + 1))
+
+    def metrics(self) -> Dict:
+        return {"retries": self.retries, "models": {model: limiter.metrics() for model, limiter in self._limiters.items()}}
+
+rate_governor = RateGovernor.from_env()
+
+class GovernedGemini(Gemini):
+    """`Gemini` whose calls pass through `rate_governor` and `hedge_policy`.
+
+    An overloaded call is retried, but only if it failed before any (partial)
+    response was yielded. Hedges are only sent while the model's limiter has idle
+    capacity and has not been throttled back.
+    """
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        model = llm_request.model or self.model
+        attempts = 0
+
+        def make_attempt() -> AsyncGenerator[LlmResponse, None]:
+            nonlocal attempts
+            attempts += 1
+            # Gemini mutates the request it sends, so a hedge gets its own copy
+            return self._governed(llm_request if attempts == 1 else llm_request.model_copy(deep=True), stream)
+
+        def has_capacity() -> bool:
+            if not rate_governor:
+                return True
+            limiter = rate_governor.limiter(model)
+            return limiter.factor >= 1.0 and not limiter.queue_depth and limiter.in_flight < limiter.concurrency_limit
+
+        async for response in hedge_policy.run(current_agent_name.get(), make_attempt, has_capacity):
+            yield response
+
+    async def _governed(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        if not rate_governor:
+            async for response in super().generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        model = llm_request.model or self.model
+        tokens = estimate_tokens(llm_request)
+        for attempt in range(rate_governor.max_retries + 1):
+            yielded = False
+            async with rate_governor.slot(model, tokens) as slot:
+                try:
+                    async for response in super().generate_content_async(llm_request, stream):
+                        yielded = True
+                        if response.usage_metadata and response.usage_metadata.total_token_count and not response.partial:
+                            slot.tokens_used = response.usage_metadata.total_token_count
+                        yield response
+                    return
+                except Exception as e:
+                    if yielded or not is_overload_error(e):
+                        raise
+                    slot.overloaded = True
+                    if attempt == rate_governor.max_retries:
+                        raise
+            rate_governor.retries += 1
+            count_on_span("retries")
+            delay = rate_governor.backoff(attempt + 1)
+            logging.warning(f"🚦 [Rate Governor] {model} overloaded; retry {attempt + 1} in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+def register_governed_gemini():
+    """Makes `GovernedGemini` the model class for `gemini-*` names (it is registered after ADK's `Gemini`, so it wins)."""
+    LLMRegistry.register(GovernedGemini)
+    LLMRegistry.resolve.cache_clear()
+
+class RateGovernorPlugin(BasePlugin):
+    """Tags model and tool calls with their session (for fair queuing) and agent (for hedging), and logs metrics after each run."""
+
+    def __init__(self):
+        super().__init__(name="rate_governor")
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        current_session_id.set(callback_context.session.id)
+        current_agent_name.set(callback_context.agent_name)
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict, tool_context: ToolContext) -> Optional[Dict]:
+        current_session_id.set(tool_context.session.id)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        if rate_governor:
+            for model, metrics in rate_governor.metrics()["models"].items():
+                logging.info(f"🚦 [Rate Governor] {model}: {metrics}")
+        logging.info(f"🏇 [Hedging] {hedge_policy.metrics()}")
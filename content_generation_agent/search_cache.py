@@ -0,0 +1,131 @@
+# content_generation_agent/search_cache.py
+"""
+TTL cache of web-search results for the research stage, shared across sessions.
+
+Queries are normalized before lookup (case, punctuation, whitespace, stopwords and
+word order are ignored), so "The future of AI agents?" and "AI agents: future" hit
+the same entry. Concurrent searches for the same normalized query are coalesced
+into a single backend call (single-flight). Entries live in an in-memory LRU in
+front of an optional SQLite store, like `llm_cache`.
+
+The backend is any async callable `query -> result text`. In the pipeline it is
+the `ResearchAgent` (Google Search); `LocalSearchBackend` is a deterministic
+stand-in for offline runs and benchmarks.
+
+Configuration (environment variables):
+    SEARCH_CACHE_ENABLED          "0" disables the cache (default "1").
+    SEARCH_CACHE_MAX_ENTRIES      In-memory LRU size (default 2048).
+    SEARCH_CACHE_TTL_SECONDS      Freshness of a result (default 86400).
+    SEARCH_CACHE_DB               Path of the SQLite store; unset keeps the cache in memory only.
+    SEARCH_CACHE_MAX_DB_ENTRIES   Rows kept in the SQLite store (default 50000).
+    SEARCH_BACKEND                "local" replaces Google Search with `LocalSearchBackend` (default "google").
+    LOCAL_SEARCH_LATENCY          Simulated seconds per local search (default 0.5).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .llm_cache import LlmResponseCache
+
+SearchFn = Callable[[str], Awaitable[str]]
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it its of on or that the this to
+vs versus what when where which who why will with
+""".split())
+
+def normalize_query(query: str) -> str:
+    """Reduces a query to its sorted, lower-cased content words."""
+    words = re.findall(r"\w+", query.lower())
+    content_words = [word for word in words if word not in STOPWORDS] or words
+    return " ".join(sorted(set(content_words)))
+
+class SearchResultStore(LlmResponseCache):
+    """The `LlmResponseCache` LRU/SQLite store, in its own table."""
+    TABLE = "search_cache"
+
+class SearchCache:
+    """Looks up normalized queries in a `SearchResultStore` and coalesces identical in-flight searches.
+
+    Failed searches are never cached; every waiter of a coalesced search sees the same exception.
+    """
+
+    def __init__(self, store: SearchResultStore):
+        self.store = store
+        self._inflight: Dict[str, "asyncio.Task[str]"] = {}
+        self._counts = {"hits": 0, "misses": 0, "coalesced": 0, "backend_calls": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchCache"]:
+        if os.environ.get("SEARCH_CACHE_ENABLED", "1") != "1":
+            return None
+        return cls(SearchResultStore(
+            max_entries=int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", 2048)),
+            ttl_seconds=float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", 86400)),
+            db_path=os.environ.get("SEARCH_CACHE_DB") or None,
+            max_db_entries=int(os.environ.get("SEARCH_CACHE_MAX_DB_ENTRIES", 50000)),
+        ))
+
+    async def search(self, query: str, search_fn: SearchFn) -> Tuple[str, str]:
+        """Returns `(result, outcome)` where outcome is "hit", "coalesced" or "miss"."""
+        key = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        cached = self.store.get(key)
+        if cached is not None:
+            self._counts["hits"] += 1
+            return cached, "hit"
+
+        task = self._inflight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._counts["coalesced"] += 1
+            return await asyncio.shield(task), "coalesced"
+
+        self._counts["misses"] += 1
+        self._counts["backend_calls"] += 1
+        task = asyncio.ensure_future(search_fn(query))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), "miss"
+
+    def _finish(self, key: str, task: "asyncio.Task[str]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._counts["errors"] += 1
+            return
+        self.store.put(key, task.result())
+
+    def metrics(self) -> Dict:
+        """Returns lookup counts and the share of lookups that did not reach the backend."""
+        lookups = self._counts["hits"] + self._counts["misses"] + self._counts["coalesced"]
+        saved = lookups - self._counts["backend_calls"]
+        return {**self._counts, "saved_rate": round(saved / lookups, 4) if lookups else 0.0}
+
+class LocalSearchBackend:
+    """Deterministic offline stand-in for Google Search with a fixed simulated latency."""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["LocalSearchBackend"]:
+        if os.environ.get("SEARCH_BACKEND", "google") != "local":
+            return None
+        logging.info("🔎 [Search] Using the local stand-in search backend.")
+        return cls(latency=float(os.environ.get("LOCAL_SEARCH_LATENCY", 0.5)))
+
+    async def __call__(self, query: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        words = normalize_query(query).split()
+        return "\n".join(
+            f"- Result {i + 1} for '{query}': notes on {', '.join(words[i:] + words[:i])}." for i in range(3)
+        )
+
+search_cache = SearchCache.from_env()
+local_search_backend = LocalSearchBackend.from_env()
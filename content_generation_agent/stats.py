@@ -0,0 +1,28 @@
+# content_generation_agent/stats.py
+"""
+Percentile helpers shared by the server modules, the UI client and the benchmarks.
+
+Standard library only, so `client.py` can import it without loading the agents.
+"""
+from typing import Iterable, Sequence
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank `pct` percentile of `values`, or 0.0 when there are none."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def bucket_percentile(bounds: Sequence[float], counts: Sequence[float], pct: float) -> float:
+    """Upper bound of the histogram bucket holding the `pct` percentile.
+
+    `counts` has one more entry than `bounds`, for values above the last bound;
+    that bucket (and an empty histogram) reports the last bound.
+    """
+    total = sum(counts)
+    running = 0.0
+    for index, count in enumerate(counts):
+        running += count
+        if total and running >= total * pct / 100:
+            return bounds[min(index, len(bounds) - 1)]
+    return bounds[-1]
@@ -4,14 +4,30 @@ Defines all tools that can be called by LlmAgents.
 
 This includes approval tools that set state flags to terminate loops,
 and I/O tools for generating images and audio.
+
+The media tools must not block the ADK server's event loop, which streams every
+other session's events. The Imagen and Gemini clients are created once per
+process on first use. TTS uses the client's native async API, and the
+synchronous Imagen SDK runs on a small shared thread pool. Both calls have a
+timeout. Preview derivatives of the images are encoded on the same pool.
+
+Podcast scripts are synthesized in parallel segments and stitched into one WAV
+by `podcast_audio`. `publish_podcast_audio` can also save the episode in parts
+as the segments finish, for playback before the whole episode is ready.
+
+Configuration (environment variables):
+    MEDIA_TOOL_THREADS        Threads for blocking media SDK calls (default 4).
+    IMAGEN_TIMEOUT_SECONDS    Limit on one Imagen call (default 120).
+    TTS_TIMEOUT_SECONDS       Limit on one TTS call, i.e. one script segment (default 300).
 """
+import asyncio
 import logging
 import os
-import wave
-import io
+import threading
 import json # <--- Import the json library
 import traceback
-from typing import Dict, List # We can still use these for internal type hints
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional # We can still use these for internal type hints
 
 from google.adk.tools import ToolContext
 from google.genai import types as genai_types
@@ -19,6 +35,42 @@ from google import genai
 from vertexai.preview.vision_models import ImageGenerationModel
 
 from . import constants
+from .image_previews import content_hash, image_previewer
+from .podcast_audio import SAMPLE_RATE, SAMPLE_WIDTH, SegmentRejected, pcm_to_wav, podcast_synthesizer
+from .rate_governor import rate_governor
+
+MEDIA_TOOL_THREADS = int(os.environ.get("MEDIA_TOOL_THREADS", 4))
+IMAGEN_TIMEOUT_SECONDS = float(os.environ.get("IMAGEN_TIMEOUT_SECONDS", 120))
+TTS_TIMEOUT_SECONDS = float(os.environ.get("TTS_TIMEOUT_SECONDS", 300))
+
+PODCAST_VOICES = {"Alex": "Kore", "Ben": "Puck"}
+
+# --- Shared Media Clients ---
+
+media_executor = ThreadPoolExecutor(max_workers=MEDIA_TOOL_THREADS, thread_name_prefix="media-tool")
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+def _shared_client(name: str, factory: Callable[[], Any]) -> Any:
+    """Returns the process-wide client `name`, creating it with `factory` on first use."""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+def imagen_model() -> ImageGenerationModel:
+    return _shared_client("imagen", lambda: ImageGenerationModel.from_pretrained(constants.IMAGEN_MODEL))
+
+def genai_client() -> genai.Client:
+    return _shared_client("genai", lambda: genai.Client(api_key=os.getenv('GEMINI_API_KEY'), vertexai=False))
+
+async def run_blocking(fn: Callable[[], Any], timeout: float) -> Any:
+    """Runs a blocking SDK call on `media_executor` without blocking the event loop.
+
+    On timeout or cancellation the caller stops waiting at once; the worker thread
+    finishes the abandoned call in the background.
+    """
+    return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(media_executor, fn), timeout)
 
 # --- Approval Tools ---
 # These tools now correctly return a simple `str` for reliable model parsing.
@@ -62,74 +114,148 @@ def approve_image_prompt(tool_context: ToolContext) -> str:
 
 # --- Media Generation Tools ---
 
+async def make_preview(data: bytes) -> Optional[Dict]:
+    """A preview derivative of one image (see `image_previews`), or None if previews are off or it fails."""
+    if not image_previewer:
+        return None
+    try:
+        preview = await run_blocking(lambda: image_previewer.preview(data), IMAGEN_TIMEOUT_SECONDS)
+        preview["bytes"] = len(preview["data"])
+        return preview
+    except Exception as e:
+        logging.warning(f"⚠️ [Imagen Tool] Could not make a preview: {e or type(e).__name__}")
+        return None
+
 async def generate_images_tool(prompt: str, tool_context: ToolContext) -> str: 
-    """Generates 4 images using Vertex AI's Imagen model and saves them as artifacts."""
+    """Generates 4 images using Vertex AI's Imagen model and saves them, with preview derivatives, as artifacts."""
     try:
         logging.info(f"🎨 [Imagen Tool] Generating 4 images for prompt: '{prompt[:70]}...'")
-        imagen_model = ImageGenerationModel.from_pretrained("imagen-4.0-fast-generate-preview-06-06")
-        image_response = imagen_model.generate_images(
-            prompt=prompt, number_of_images=4, aspect_ratio="16:9", add_watermark=False
-        )
+
+        async def generate():
+            return await run_blocking(lambda: imagen_model().generate_images(
+                prompt=prompt, number_of_images=4, aspect_ratio="16:9", add_watermark=False
+            ), IMAGEN_TIMEOUT_SECONDS)
+        image_response = await rate_governor.call(constants.IMAGEN_MODEL, generate) if rate_governor else await generate()
 
         list_of_generated_images = image_response.images
         if not list_of_generated_images:
             raise ValueError("Imagen API did not return any images.")
 
-        for i, img in enumerate(list_of_generated_images):
+        previews = await asyncio.gather(*(make_preview(img._image_bytes) for img in list_of_generated_images))
+        manifest = []
+        for i, (img, preview) in enumerate(zip(list_of_generated_images, previews, strict=True)):
             artifact_filename = f"generated_image_{i+1}.png"
             image_artifact_part = genai_types.Part.from_bytes(data=img._image_bytes, mime_type="image/png")
             version = await tool_context.save_artifact(filename=artifact_filename, artifact=image_artifact_part)
             logging.info(f"✅ [Imagen Tool] Saved '{artifact_filename}' as version {version}.")
+            entry = {"artifact_name": artifact_filename, "version": version, "sha256": content_hash(img._image_bytes),
+                     "bytes": len(img._image_bytes), "preview": None}
+            if preview:
+                preview_filename = f"generated_image_{i+1}_preview.{image_previewer.extension}"
+                preview_part = genai_types.Part.from_bytes(data=preview.pop("data"), mime_type=image_previewer.mime_type)
+                preview_version = await tool_context.save_artifact(filename=preview_filename, artifact=preview_part)
+                entry["preview"] = {"artifact_name": preview_filename, "version": preview_version, **preview}
+            manifest.append(entry)
+        tool_context.state[constants.STATE_IMAGE_ARTIFACTS] = manifest
 
-        status_report = {"status": "success", "images_generated": len(list_of_generated_images)}
+        status_report = {"status": "success", "images_generated": len(list_of_generated_images),
+                         "previews": sum(1 for entry in manifest if entry["preview"])}
         return json.dumps(status_report) # <--- FIX 2: Return a JSON string
 
     except Exception as e:
         logging.error(f"❌ [Imagen Tool] Error: {e}\n{traceback.format_exc()}")
-        status_report = {"status": "error", "message": str(e)}
+        status_report = {"status": "error", "message": str(e) or type(e).__name__} # Timeouts have no message
         return json.dumps(status_report) # <--- FIX 2: Return a JSON string
 
+# Finish reasons for which the same text will be refused again, so the segment is not retried
+TTS_REJECTED_FINISH_REASONS = {"SAFETY", "PROHIBITED_CONTENT", "BLOCKLIST", "SPII", "RECITATION", "IMAGE_SAFETY"}
+
+def segment_audio(response) -> bytes:
+    """Returns the PCM of a TTS response, or raises a descriptive error.
+
+    `SegmentRejected` marks a blocked prompt or a refusal for a content reason.
+    An empty response for any other reason raises ValueError and is retried.
+    """
+    candidates = response.candidates or []
+    if not candidates:
+        feedback = response.prompt_feedback
+        reason = feedback.block_reason if feedback and feedback.block_reason else None
+        if reason:
+            raise SegmentRejected(f"TTS blocked the segment (block reason: {getattr(reason, 'name', reason)}).")
+        raise ValueError("TTS API returned no candidates.")
+    candidate = candidates[0]
+    parts = candidate.content.parts if candidate.content and candidate.content.parts else []
+    audio = next((part.inline_data.data for part in parts if part.inline_data and part.inline_data.data), None)
+    if audio:
+        return audio
+    finish_reason = getattr(candidate.finish_reason, "name", candidate.finish_reason)
+    if finish_reason in TTS_REJECTED_FINISH_REASONS:
+        raise SegmentRejected(f"TTS refused the segment (finish reason: {finish_reason}).")
+    raise ValueError(f"TTS API did not return audio content (finish reason: {finish_reason}).")
+
+PODCAST_ARTIFACT = "podcast_episode.wav"
+PODCAST_PART_ARTIFACT = "podcast_episode_part_{:03d}.wav"
+
+async def publish_podcast_audio(script_text: str, context, on_part: Optional[Callable[[Dict], Awaitable[None]]] = None) -> Dict:
+    """Synthesizes `script_text` with Gemini TTS and saves the episode through `context.save_artifact`.
+
+    With `on_part`, each run of segments that finished in script order is also saved
+    as a standalone WAV (`podcast_episode_part_NNN.wav`), and `on_part` is awaited with
+    its artifact name, version and progress, so the episode can be played while the
+    rest renders. Returns the status report.
+    """
+    client = genai_client()
+
+    async def synthesize_segment(segment_text: str) -> bytes:
+        async def synthesize():
+            return await asyncio.wait_for(client.aio.models.generate_content(
+                model=constants.TTS_MODEL,
+                contents=segment_text,
+                config=genai_types.GenerateContentConfig(
+                    response_modalities=["AUDIO"],
+                    speech_config=genai_types.SpeechConfig(
+                        multi_speaker_voice_config=genai_types.MultiSpeakerVoiceConfig(
+                            speaker_voice_configs=[
+                                genai_types.SpeakerVoiceConfig(speaker=speaker, voice_config=genai_types.VoiceConfig(prebuilt_voice_config=genai_types.PrebuiltVoiceConfig(voice_name=voice)))
+                                for speaker, voice in PODCAST_VOICES.items()
+                            ]
+                        )
+                    )
+                )
+            ), TTS_TIMEOUT_SECONDS)
+        response = await rate_governor.call(constants.TTS_MODEL, synthesize) if rate_governor else await synthesize()
+        return segment_audio(response)
+
+    parts: List[Dict] = []
+
+    async def save_part(pcm: bytes, ready: int, total: int):
+        artifact_name = PODCAST_PART_ARTIFACT.format(len(parts) + 1)
+        version = await context.save_artifact(
+            filename=artifact_name, artifact=genai_types.Part.from_bytes(data=pcm_to_wav(pcm), mime_type="audio/wav"))
+        part = {"part": len(parts) + 1, "artifact_name": artifact_name, "version": version,
+                "segments_ready": ready, "segments": total, "seconds": round(len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH), 2)}
+        parts.append(part)
+        logging.info(f"🎧 [TTS Tool] Published '{artifact_name}' ({ready}/{total} segments).")
+        await on_part(part)
+
+    voice_key = constants.TTS_MODEL + "".join(f"|{speaker}={voice}" for speaker, voice in PODCAST_VOICES.items())
+    wav_file_bytes, run = await podcast_synthesizer.synthesize(script_text, synthesize_segment, voice_key,
+                                                               on_chunk=save_part if on_part else None)
+
+    audio_artifact_part = genai_types.Part.from_bytes(data=wav_file_bytes, mime_type="audio/wav")
+    version = await context.save_artifact(filename=PODCAST_ARTIFACT, artifact=audio_artifact_part)
+    logging.info(f"✅ [TTS Tool] Saved artifact '{PODCAST_ARTIFACT}' as version {version}.")
+    return {"status": "success", "artifact_name": PODCAST_ARTIFACT, "version": version,
+            "segments": run["segments"], "cached_segments": run["cache_hits"], "parts": len(parts)}
+
 async def generate_podcast_audio_tool(script_text: str, tool_context: ToolContext) -> str: 
     """Generates multi-speaker audio from a script using Gemini TTS and saves it as a WAV artifact."""
     try:
         logging.info("🎙️ [TTS Tool] Generating multi-speaker audio...")
-        client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'), vertexai=False)
-        tts_model = "gemini-2.5-flash-preview-tts"
-
-        response = client.models.generate_content(
-            model=tts_model,
-            contents=script_text,
-            config=genai_types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=genai_types.SpeechConfig(
-                    multi_speaker_voice_config=genai_types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=[
-                            genai_types.SpeakerVoiceConfig(speaker='Alex', voice_config=genai_types.VoiceConfig(prebuilt_voice_config=genai_types.PrebuiltVoiceConfig(voice_name='Kore'))),
-                            genai_types.SpeakerVoiceConfig(speaker='Ben', voice_config=genai_types.VoiceConfig(prebuilt_voice_config=genai_types.PrebuiltVoiceConfig(voice_name='Puck'))),
-                        ]
-                    )
-                )
-            )
-        )
-
-        raw_audio_bytes = response.candidates[0].content.parts[0].inline_data.data
-        if not raw_audio_bytes:
-            raise ValueError("TTS API did not return audio content.")
-
-        with io.BytesIO() as in_memory_file:
-            with wave.open(in_memory_file, 'wb') as wf:
-                wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(24000)
-                wf.writeframes(raw_audio_bytes)
-            wav_file_bytes = in_memory_file.getvalue()
-        
-        audio_artifact_part = genai_types.Part.from_bytes(data=wav_file_bytes, mime_type="audio/wav")
-        version = await tool_context.save_artifact(filename="podcast_episode.wav", artifact=audio_artifact_part)
-        
-        logging.info(f"✅ [TTS Tool] Saved artifact 'podcast_episode.wav' as version {version}.")
-        status_report = {"status": "success", "artifact_name": "podcast_episode.wav", "version": version}
+        status_report = await publish_podcast_audio(script_text, tool_context)
         return json.dumps(status_report) # <--- FIX 2: Return a JSON string
 
     except Exception as e:
         logging.error(f"❌ [TTS Tool] Error: {e}\n{traceback.format_exc()}")
-        status_report = {"status": "error", "message": str(e)}
-        return json.dumps(status_report) # <--- FIX 2: Return a JSON string
\ No newline at end of file
+        status_report = {"status": "error", "message": str(e) or type(e).__name__} # Timeouts have no message
+        return json.dumps(status_report) # <--- FIX 2: Return a JSON string
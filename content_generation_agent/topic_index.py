@@ -0,0 +1,158 @@
+# content_generation_agent/topic_index.py
+"""
+Near-duplicate index of past topics, used to warm-start strategy and research.
+
+Each stored `user_query` maps to the `content_brief` and `research_dossier` it
+produced. Queries are shingled into content words plus character trigrams and
+summarized by a MinHash signature; locality-sensitive hashing over signature bands
+finds candidates without scanning the whole index. Everything is in process
+memory, bounded by an LRU entry limit and a TTL.
+
+Trigram shingles barely tell "... in 2025" from "... in 2026", so a match also
+reports whether both queries contain the same numbers (`numbers_match`). The warm
+start only reuses a match automatically when they do.
+
+Configuration (environment variables):
+    TOPIC_WARM_START                 "auto" reuses a match, "offer" only reports it, "off" neither looks up nor stores the topic (default "offer").
+    TOPIC_INDEX_THRESHOLD            Minimum estimated Jaccard similarity for a match (default 0.7).
+    TOPIC_INDEX_MAX_ENTRIES          Topics kept before the least recently used is evicted (default 1000).
+    TOPIC_INDEX_TTL_SECONDS          Age after which a stored dossier is no longer reused (default 604800).
+    TOPIC_INDEX_LOOKUP_BUDGET_MS     Candidate scoring stops once a lookup has taken this long (default 5).
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .search_cache import STOPWORDS
+
+_PRIME = (1 << 61) - 1
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+def numbers(query: str) -> Set[str]:
+    """The numeric tokens of `query` (years, versions, counts)."""
+    return set(_NUMBER.findall(query))
+
+def shingles(query: str) -> Set[str]:
+    """Content words of `query` plus the character trigrams of each word."""
+    words = [word for word in re.findall(r"\w+", query.lower()) if word not in STOPWORDS]
+    result = set(words)
+    for word in words:
+        padded = f" {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+class TopicIndex:
+    """A bounded MinHash/LSH index from past queries to their brief and dossier."""
+
+    def __init__(self, threshold: float = 0.7, max_entries: int = 1000, ttl_seconds: float = 604800,
+                 lookup_budget_ms: float = 5.0, num_perm: int = 64, bands: int = 32):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lookup_budget_ms = lookup_budget_ms
+        self.rows = num_perm // bands
+        rng = random.Random(0)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()  # normalized query -> entry
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "matches": 0, "evictions": 0, "over_budget": 0}
+        self._lookup_ms_total = 0.0
+        self._lookup_ms_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> "TopicIndex":
+        return cls(
+            threshold=float(os.environ.get("TOPIC_INDEX_THRESHOLD", 0.7)),
+            max_entries=int(os.environ.get("TOPIC_INDEX_MAX_ENTRIES", 1000)),
+            ttl_seconds=float(os.environ.get("TOPIC_INDEX_TTL_SECONDS", 604800)),
+            lookup_budget_ms=float(os.environ.get("TOPIC_INDEX_LOOKUP_BUDGET_MS", 5)),
+        )
+
+    def signature(self, query: str) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles(query)]
+        if not hashes:
+            return []
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(len(signature) // self.rows)]
+
+    def add(self, query: str, content_brief: str, research_dossier: str):
+        """Stores the brief and dossier produced for `query`, evicting the oldest topics past `max_entries`."""
+        signature = self.signature(query)
+        if not signature or not content_brief or not research_dossier:
+            return
+        key = " ".join(query.lower().split())
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {"query": query, "content_brief": content_brief, "research_dossier": research_dossier,
+                                  "signature": signature, "stored_at": time.time()}
+            for band in self._bands(signature):
+                self._buckets[band].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """Returns the most similar fresh topic scoring at least `threshold`, with its `score`, or None.
+
+        `numbers_match` tells whether both queries contain exactly the same numbers.
+        """
+        started = time.perf_counter()
+        signature = self.signature(query)
+        best, best_score = None, 0.0
+        with self._lock:
+            self._counts["lookups"] += 1
+            collisions: Dict[str, int] = defaultdict(int)
+            for band in self._bands(signature):
+                for key in self._buckets.get(band, ()):
+                    collisions[key] += 1
+            # Most band collisions first: those are the likeliest matches if the budget runs out
+            for key in sorted(collisions, key=collisions.get, reverse=True):
+                if (time.perf_counter() - started) * 1000 > self.lookup_budget_ms:
+                    self._counts["over_budget"] += 1
+                    break
+                entry = self._entries[key]
+                if time.time() - entry["stored_at"] > self.ttl_seconds:
+                    continue
+                score = sum(a == b for a, b in zip(signature, entry["signature"], strict=True)) / len(signature)
+                if score >= self.threshold and score > best_score:
+                    best, best_score = key, score
+            if best:
+                self._entries.move_to_end(best)
+                self._counts["matches"] += 1
+                entry = self._entries[best]
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._lookup_ms_total += elapsed_ms
+            self._lookup_ms_max = max(self._lookup_ms_max, elapsed_ms)
+        if not best:
+            return None
+        logging.info(f"🧭 [Topic Index] '{query}' matches '{entry['query']}' (score {best_score:.2f}, {elapsed_ms:.2f} ms).")
+        return {"query": entry["query"], "score": round(best_score, 3), "numbers_match": numbers(query) == numbers(entry["query"]),
+                "content_brief": entry["content_brief"], "research_dossier": entry["research_dossier"]}
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for band in self._bands(entry["signature"]):
+                self._buckets[band].discard(key)
+                if not self._buckets[band]:
+                    del self._buckets[band]
+
+    def metrics(self) -> Dict:
+        """Returns index size, match counts and lookup latency."""
+        lookups = self._counts["lookups"]
+        return {**self._counts, "entries": len(self._entries),
+                "lookup_ms_mean": round(self._lookup_ms_total / lookups, 3) if lookups else 0.0,
+                "lookup_ms_max": round(self._lookup_ms_max, 3)}
+
+topic_index = TopicIndex.from_env()
+warm_start_mode = os.environ.get("TOPIC_WARM_START", "offer")
@@ -0,0 +1,378 @@
+# content_generation_agent/tracing.py
+"""
+Opt-in spans for every agent run, model call and tool call, with Prometheus and optional JSONL export.
+
+`TracingPlugin` opens a span when an agent, model call or tool call starts and
+closes it when it ends. Each span records:
+
+- its start and end time;
+- its parent span and the enclosing agent;
+- the agent's iteration (its nth run in the invocation, i.e. the loop iteration);
+- the prompt and output tokens of model calls;
+- whether the response came from the LLM cache;
+- how many overload retries and hedges it needed.
+
+Finished spans are aggregated into duration histograms and token/call counters,
+which can be served in the Prometheus text format on `/metrics`. When `TRACE_FILE`
+is set, they are also appended to that JSONL file by a background thread, so the
+event loop never waits on disk. The file is rotated at `TRACE_FILE_MAX_MB`,
+keeping `TRACE_FILE_BACKUPS` older files. `trace_report.py` prints a session's
+critical path and slowest agents from the trace file.
+
+The innermost open span is tracked in a context variable (like the rate
+governor's session tag), so concurrent DAG nodes and loops each see their own.
+
+An `EventLoopLagMonitor` also measures how late the server's event loop wakes
+up from short sleeps. Lag means something (such as a blocking SDK call) is
+stalling every session's stream.
+
+Tracing is off unless `TRACE_ENABLED=1`, like the other optional plugins; the
+plugin, the trace file, the `/metrics` endpoint and the lag probe all follow it.
+
+Configuration (environment variables):
+    TRACE_ENABLED        "1" enables tracing (default "0").
+    TRACE_FILE           JSONL file spans are appended to; unset writes no file.
+    TRACE_FILE_MAX_MB    Size at which the trace file is rotated (default 64).
+    TRACE_FILE_BACKUPS   Rotated trace files kept next to it, as `<TRACE_FILE>.1` etc. (default 2).
+    TRACE_METRICS_PORT   Port of the Prometheus `/metrics` endpoint; unset or "0" does not serve one.
+    TRACE_LOOP_LAG_INTERVAL  Seconds between event-loop lag probes; "0" disables them (default 0.1).
+"""
+import asyncio
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import BaseTool, ToolContext
+
+current_span: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("current_span", default=None)
+
+def count_on_span(counter: str, amount: int = 1):
+    """Adds to a counter (such as `retries`) on the innermost open span of the calling task."""
+    span = current_span.get()
+    if span is not None:
+        span[counter] = span.get(counter, 0) + amount
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+    BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[next((i for i, bound in enumerate(self.BOUNDS) if value <= bound), len(self.BOUNDS))] += 1
+        self.sum += value
+
+    def render(self, metric: str, labels: str) -> List[str]:
+        lines, running = [], 0
+        for bound, count in zip(list(self.BOUNDS) + ["+Inf"], self.counts, strict=True):
+            running += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {running}')
+        lines += [f"{metric}_sum{{{labels}}} {self.sum:.6f}", f"{metric}_count{{{labels}}} {running}"]
+        return lines
+
+class SpanFileWriter:
+    """Appends span records to a size-rotated JSONL file from a daemon thread.
+
+    `write()` only enqueues. When the queue is full (the disk cannot keep up) the
+    span is dropped and counted, rather than slowing the event loop down.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, backups: int = 2, queue_size: int = 10000):
+        self.path = path
+        self.dropped = 0
+        # With no backups RotatingFileHandler never truncates, so at least one is kept.
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=max(1, backups), encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            self._handler.emit(logging.makeLogRecord({"msg": line}))
+        self._handler.close()
+
+    def close(self, timeout: float = 5.0):
+        """Writes the spans still queued, then stops the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+class Tracer:
+    """Aggregates finished spans for `/metrics`, and hands them to `writer` when file export is on."""
+
+    def __init__(self, writer: Optional[SpanFileWriter] = None, enabled: bool = True):
+        self.writer = writer
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._durations: Dict[tuple, Histogram] = defaultdict(Histogram)  # (kind, name) -> histogram
+        self._counters: Dict[tuple, float] = defaultdict(float)  # (metric, agent, label value) -> total
+        self.loop_lag = Histogram()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        enabled = os.environ.get("TRACE_ENABLED", "0") == "1"
+        path = os.environ.get("TRACE_FILE")
+        writer = None
+        if enabled and path:
+            writer = SpanFileWriter(
+                path,
+                max_bytes=int(float(os.environ.get("TRACE_FILE_MAX_MB", 64)) * 1024 * 1024),
+                backups=int(os.environ.get("TRACE_FILE_BACKUPS", 2)),
+            )
+        tracer = cls(writer=writer, enabled=enabled)
+        port = int(os.environ.get("TRACE_METRICS_PORT", 0) or 0)
+        if tracer.enabled and port:
+            tracer.serve_metrics(port)
+        return tracer
+
+    def start(self, kind: str, name: str, parent: Optional[Dict], trace_id: Optional[str] = None,
+              session_id: Optional[str] = None, **attributes) -> Dict:
+        """Returns a new open span; `parent` is kept under "parent" (not exported) until the span ends."""
+        parent = parent or {}
+        return {
+            # Sub-runs (e.g. AgentTool searches in their own sub-session) are reported under the campaign's run
+            "trace_id": parent.get("trace_id") or trace_id,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent.get("span_id"),
+            "session_id": parent.get("session_id") or session_id,
+            "kind": kind,
+            "name": name,
+            "start": time.time(),
+            **attributes,
+            "parent": parent or None,
+        }
+
+    def end(self, span: Dict, **attributes):
+        span.update(attributes)
+        span["end"] = time.time()
+        span["duration_s"] = round(span["end"] - span["start"], 4)
+        agent = span.get("agent", span["name"])
+        with self._lock:
+            self._durations[(span["kind"], span["name"])].observe(span["duration_s"])
+            if span["kind"] == "llm":
+                self._counters[("llm_calls_total", agent, "hit" if span.get("cache") else "miss")] += 1
+                if not span.get("cache"):
+                    self._counters[("llm_tokens_total", agent, "prompt")] += span.get("prompt_tokens") or 0
+                    self._counters[("llm_tokens_total", agent, "output")] += span.get("output_tokens") or 0
+            for counter in ("retries", "hedges"):
+                if span.get(counter):
+                    self._counters[(f"{counter}_total", agent, span["kind"])] += span[counter]
+            if span.get("error"):
+                self._counters[("errors_total", agent, span["kind"])] += 1
+        if self.writer:
+            self.writer.write({key: value for key, value in span.items() if key != "parent"})
+
+    def prometheus(self) -> str:
+        """All aggregates in the Prometheus text exposition format."""
+        label_names = {"llm_calls_total": "cache", "llm_tokens_total": "type"}
+        with self._lock:
+            lines = ["# TYPE contentgen_event_loop_lag_seconds histogram"]
+            lines += self.loop_lag.render("contentgen_event_loop_lag_seconds", 'loop="adk"')
+            lines.append("# TYPE contentgen_span_duration_seconds histogram")
+            for (kind, name), histogram in sorted(self._durations.items()):
+                lines += histogram.render("contentgen_span_duration_seconds", f'kind="{kind}",name="{name}"')
+            for metric in sorted({key[0] for key in self._counters}):
+                lines.append(f"# TYPE contentgen_{metric} counter")
+                for (_, agent, value), total in sorted(item for item in self._counters.items() if item[0][0] == metric):
+                    lines.append(f'contentgen_{metric}{{agent="{agent}",{label_names.get(metric, "kind")}="{value}"}} {total:g}')
+            if self.writer:
+                lines += ["# TYPE contentgen_trace_spans_dropped_total counter",
+                          f"contentgen_trace_spans_dropped_total {self.writer.dropped}"]
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int) -> ThreadingHTTPServer:
+        """Serves `prometheus()` on http://0.0.0.0:`port`/metrics from a daemon thread."""
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="trace-metrics", daemon=True).start()
+        logging.info(f"📈 [Tracing] Serving metrics on :{port}/metrics")
+        return server
+
+tracer = Tracer.from_env()
+
+class EventLoopLagMonitor:
+    """Sleeps `interval` seconds at a time on the event loop and records how much later than that it woke up."""
+
+    def __init__(self, tracer: Tracer, interval: float = 0.1):
+        self.tracer = tracer
+        self.interval = interval
+        self.max_lag = 0.0  # Since the last `report()`
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        """Starts probing the running event loop, unless already probing it."""
+        loop = asyncio.get_running_loop()
+        if self.interval > 0 and (self._task is None or self._task.done() or self._task.get_loop() is not loop):
+            self._task = loop.create_task(self._probe())
+
+    async def _probe(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            with self.tracer._lock:
+                self.tracer.loop_lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > 1.0:
+                logging.warning(f"🐢 [Tracing] Event loop was blocked for {lag:.2f}s.")
+
+    def report(self) -> float:
+        """Returns the largest lag since the previous report."""
+        max_lag, self.max_lag = self.max_lag, 0.0
+        return max_lag
+
+loop_lag_monitor = EventLoopLagMonitor(tracer, float(os.environ.get("TRACE_LOOP_LAG_INTERVAL", 0.1)))
+
+class TracingPlugin(BasePlugin):
+    """Opens and closes spans around agent runs, model calls and tool calls.
+
+    Register it before the LLM cache: a cached response skips the
+    after-model callbacks, so a model span still open at the agent's next callback
+    is closed there and marked as a cache hit.
+    """
+
+    def __init__(self, tracer: Tracer, loop_lag_monitor: Optional[EventLoopLagMonitor] = None):
+        super().__init__(name="tracing")
+        self.tracer = tracer
+        self.loop_lag_monitor = loop_lag_monitor
+        self._iterations: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))  # invocation -> agent -> runs
+        self._tool_spans: Dict[str, Dict] = {}  # function call id -> open span
+
+    def _close_cached_model_span(self) -> Optional[Dict]:
+        """Closes a model span the cache answered, and returns the enclosing span."""
+        span = current_span.get()
+        if span is not None and span["kind"] == "llm":
+            self.tracer.end(span, cache=True)
+            span = span["parent"]
+            current_span.set(span)
+        return span
+
+    async def before_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        parent = self._close_cached_model_span()
+        iterations = self._iterations[callback_context.invocation_id]
+        iterations[agent.name] += 1
+        span = self.tracer.start(
+            "agent", agent.name, parent, trace_id=callback_context.invocation_id, session_id=callback_context.session.id,
+            parent_agent=agent.parent_agent.name if agent.parent_agent else None, iteration=iterations[agent.name],
+        )
+        current_span.set(span)
+        return None
+
+    async def after_agent_callback(self, *, agent: BaseAgent, callback_context: CallbackContext) -> None:
+        span = self._close_cached_model_span()
+        if span is not None and span["kind"] == "agent" and span["name"] == agent.name:
+            current_span.set(span["parent"])
+            self.tracer.end(span)
+        return None
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        parent = self._close_cached_model_span()
+        span = self.tracer.start("llm", llm_request.model or "llm", parent, trace_id=callback_context.invocation_id,
+                                 session_id=callback_context.session.id, agent=callback_context.agent_name,
+                                 iteration=(parent or {}).get("iteration"))
+        current_span.set(span)
+        return None
+
+    def _end_model_span(self, **attributes):
+        span = current_span.get()
+        if span is not None and span["kind"] == "llm":
+            current_span.set(span["parent"])
+            self.tracer.end(span, **attributes)
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        self._end_model_span(
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            output_tokens=usage.candidates_token_count if usage else None,
+            cache=(llm_response.custom_metadata or {}).get("llm_cache") == "hit",
+            error=llm_response.error_message,
+        )
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest,
+                                      error: Exception) -> Optional[LlmResponse]:
+        self._end_model_span(error=str(error)[:300])
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: Dict, tool_context: ToolContext) -> Optional[Dict]:
+        parent = self._close_cached_model_span()
+        span = self.tracer.start("tool", tool.name, parent, trace_id=tool_context.invocation_id,
+                                 session_id=tool_context.session.id, agent=tool_context.agent_name,
+                                 iteration=(parent or {}).get("iteration"))
+        self._tool_spans[tool_context.function_call_id or span["span_id"]] = span
+        current_span.set(span)
+        return None
+
+    def _end_tool_span(self, tool_context: ToolContext, **attributes):
+        span = self._tool_spans.pop(tool_context.function_call_id or "", None)
+        if span is not None:
+            if current_span.get() is span:
+                current_span.set(span["parent"])
+            self.tracer.end(span, **attributes)
+
+    async def after_tool_callback(self, *, tool: BaseTool, tool_args: Dict, tool_context: ToolContext, result: Dict) -> Optional[Dict]:
+        self._end_tool_span(tool_context)
+        return None
+
+    async def on_tool_error_callback(self, *, tool: BaseTool, tool_args: Dict, tool_context: ToolContext,
+                                     error: Exception) -> Optional[Dict]:
+        self._end_tool_span(tool_context, error=str(error)[:300])
+        return None
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        if self.loop_lag_monitor:
+            self.loop_lag_monitor.ensure_started()
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._iterations.pop(invocation_context.invocation_id, None)
+        if self.loop_lag_monitor:
+            logging.info(f"🐢 [Tracing] Max event loop lag since the last run: {self.loop_lag_monitor.report() * 1000:.0f} ms.")
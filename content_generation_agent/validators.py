@@ -0,0 +1,97 @@
+# content_generation_agent/validators.py
+"""
+Deterministic, rule-based checks for drafts.
+
+Each rule takes the draft text and returns a short, actionable feedback string if
+the draft breaks the rule, or None if it passes. `RuleValidatorAgent` runs these
+before a QA editor so mechanical failures never cost an LLM round-trip.
+
+X counts a post's length by weight rather than by characters: every URL counts
+as 23 (the length of its t.co link), and characters outside Latin and the common
+punctuation ranges (CJK, emoji, ...) count as 2. `x_weighted_length` follows those
+rules, so the X length check matches what X itself would accept.
+
+A draft that passes its rules still goes to the editor for the subjective review
+(tone, impact), except where the pipeline opts out of it.
+
+Configuration (environment variables):
+    X_SKIP_EDITOR_ON_PASS    "1" approves an X post that passes its rules without the editor's
+                             impact review, saving a model call per X draft (default "0").
+"""
+import os
+import re
+from typing import Callable, List, Optional
+
+Rule = Callable[[str], Optional[str]]
+
+X_POST_MAX_CHARS = 280  # X's limit, in weighted characters; the writer and editor prompts say "at most" this
+X_URL_LENGTH = 23
+_X_URL = re.compile(r"https?://\S+", re.IGNORECASE)
+_X_LIGHT_RANGES = ((0x0000, 0x10FF), (0x2000, 0x200D), (0x2010, 0x201F), (0x2032, 0x2037))  # Count as 1
+
+def x_weighted_length(text: str) -> int:
+    """Length of `text` as X counts it: URLs are 23, CJK and emoji characters 2, everything else 1."""
+    length = 0
+    for index, part in enumerate(_X_URL.split(text)):
+        if index:
+            length += X_URL_LENGTH
+        joined = False
+        for char in part:
+            code = ord(char)
+            if 0xFE00 <= code <= 0xFE0F or 0x1F3FB <= code <= 0x1F3FF or joined:
+                # Variation selectors, skin tones and characters after a zero-width joiner belong to the previous emoji
+                joined = False
+            elif code == 0x200D:
+                joined = True
+            else:
+                length += 1 if any(low <= code <= high for low, high in _X_LIGHT_RANGES) else 2
+    return length
+
+def max_length(limit: int, measure: Callable[[str], int] = len, note: str = "") -> Rule:
+    """A rule capping `measure(draft)` at `limit`; `note` explains the measure in the feedback."""
+    def rule(draft: str) -> Optional[str]:
+        length = measure(draft)
+        if length > limit:
+            return f"The post is {length} characters long{note}; cut it to at most {limit} characters."
+        return None
+    return rule
+
+def has_hashtags(draft: str) -> Optional[str]:
+    if not re.search(r"(?<!\w)#\w+", draft):
+        return "Add 2-3 relevant hashtags (e.g. #AI)."
+    return None
+
+def has_speaker_labels(draft: str) -> Optional[str]:
+    missing = [speaker for speaker in ("Alex", "Ben") if not re.search(rf"^\s*\**{speaker}\**:", draft, re.MULTILINE)]
+    if missing:
+        return f"Every line of dialogue must start with a speaker label; no lines found for: {', '.join(missing)} (use 'Alex:' / 'Ben:')."
+    return None
+
+def has_h1_title(draft: str) -> Optional[str]:
+    if not re.search(r"^#\s+\S", draft, re.MULTILINE):
+        return "Start the post with a catchy H1 title (`# Title`)."
+    return None
+
+def has_subheadings(draft: str) -> Optional[str]:
+    if not re.search(r"^##\s+\S", draft, re.MULTILINE):
+        return "Structure the body with Markdown subheadings (`## Subheading`)."
+    return None
+
+def is_not_empty(draft: str) -> Optional[str]:
+    if not draft.strip():
+        return "The draft is empty; write the full content."
+    return None
+
+# --- Rule Sets per Platform ---
+
+BLOG_RULES: List[Rule] = [is_not_empty, has_h1_title, has_subheadings]
+PODCAST_RULES: List[Rule] = [is_not_empty, has_speaker_labels]
+X_POST_RULES: List[Rule] = [is_not_empty, max_length(X_POST_MAX_CHARS, x_weighted_length,
+                                                             " as X counts it (every link is 23, CJK and emoji 2)"),
+                               has_hashtags]
+
+x_skip_editor_on_pass = os.environ.get("X_SKIP_EDITOR_ON_PASS", "0") == "1"
+
+def run_rules(draft: str, rules: List[Rule]) -> List[str]:
+    """Returns the feedback of every rule the draft fails, in order."""
+    return [feedback for rule in rules if (feedback := rule(draft))]
@@ -1,139 +1,163 @@
 import gradio as gr
-import requests
-import uuid
 import json
-import re
 import logging
 import time
-import tempfile
-import base64
 import os
-from typing import Dict, List, Any, Generator
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from client import (
+    MEDIA_CACHE_DIR, CONTENT_OUTPUTS, DRAFT_STATE_KEYS, AUDIO_PROGRESS_KEY, IMAGE_MANIFEST_KEY, DEPENDENCY_OUTPUTS_KEY,
+    AudioPartFetcher, ReportParser, StreamStats, WakeableStream, media_cache, create_new_session, stream_agent_events,
+    fetch_media_artifacts, fetch_full_image, build_run_payload, parse_content_brief, event_text,
+)
 
 # --- Configuration ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-API_BASE_URL = "http://127.0.0.1:8000"
-APP_NAME = "content_generation_agent"  # This must match your agent's directory name
 GRADIO_SERVER_PORT = int(os.environ.get("PORT", 7860))
+GRADIO_CACHE_TTL = int(os.environ.get("GRADIO_CACHE_TTL", 3600))  # Seconds before Gradio's own file copies are purged
+UI_FRAME_INTERVAL = float(os.environ.get("UI_FRAME_INTERVAL", 0.25))  # Seconds of events coalesced into one UI frame (0 = every event)
+RAW_EVENT_PANE_SIZE = int(os.environ.get("RAW_EVENT_PANE_SIZE", 50))  # Most recent events shown in the raw JSON pane
 
-# --- UI Helper Functions ---
+# --- UI Frame Coalescing ---
 
-def parse_final_report(report_text: str) -> Dict[str, str]:
-    """Parses the structured markdown report from the SynthesisAgent."""
-    if not report_text: return {}
-    
-    def find_block(key: str) -> str:
-        match = re.search(rf"{key.upper()}_START\s*(.*?)\s*{key.upper()}_END", report_text, re.DOTALL)
-        return match.group(1).strip() if match else ""
-
-    return {
-        "blog": find_block("blog_post"),
-        "linkedin": find_block("linkedin_post"),
-        "x_post": find_block("x_post"),
-        "threads_post": find_block("threads_post"),
-        "podcast": find_block("podcast_script"),
-        "image_prompt": find_block("image_prompt"),
-        "media_status": find_block("media_status"),
-    }
+# Order must match the `outputs` list wired to `run_content_pipeline` below.
+UI_OUTPUT_KEYS = [
+    "blog", "linkedin", "x_post", "threads_post", "podcast", "audio", "images",
+    "execution_log", "tabs", "raw_json", "strategy_brief",
+    "search_queries", "research_results", "dossier", "image_prompt", "image_artifacts",
+]
+
+class UIFrameCoalescer:
+    """Turns a stream of full UI states into sparse, rate-limited Gradio frames.
+
+    At most one frame is produced per `interval` seconds, and components whose value
+    has not changed since the last frame are sent as a no-op `gr.update()`.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sent: Dict[str, Any] = {}
+        self._last_frame_at = float("-inf")
 
-def create_new_session():
-    """Creates a new user/session with the ADK server."""
-    user_id = f"gradio-user-{uuid.uuid4()}"
-    session_id = f"gradio-session-{uuid.uuid4()}"
-    url = f"{API_BASE_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}"
-    try:
-        response = requests.post(url, json={})
-        response.raise_for_status()
-        logger.info(f"Created new session: {session_id}")
-        return user_id, session_id, f"✅ **Active Session:** `{session_id}`"
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to create session: {e}")
-        return None, None, "❌ **Connection Error:** Could not connect to ADK server."
-
-def stream_agent_events(payload: dict) -> Generator[Dict, None, None]:
-    """Streams Server-Sent Events from the ADK's /run_sse endpoint."""
-    try:
-        with requests.post(f"{API_BASE_URL}/run_sse", json=payload, stream=True, timeout=600) as response:
-            response.raise_for_status()
-            for line in response.iter_lines():
-                if line.startswith(b'data:'):
-                    try:
-                        yield json.loads(line.decode('utf-8')[5:])
-                    except json.JSONDecodeError:
-                        pass
-    except requests.exceptions.RequestException as e:
-        yield {"error": f"Connection to server failed: {e}"}
-
-def fetch_media_artifacts(user_id: str, session_id: str):
-    """Fetches generated image and audio artifacts from the ADK server."""
-    log_updates = ""
-    # Fetch Images
-    image_filepaths = []
-    log_updates += "\n* 🖼️ Fetching generated image artifacts..."
-    for i in range(1, 5):
-        artifact_name = f"generated_image_{i}.png"
-        url = f"{API_BASE_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}/artifacts/{artifact_name}"
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                b64_data = response.json()['inlineData']['data']
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-                    tmp.write(base64.urlsafe_b64decode(b64_data))
-                    image_filepaths.append(tmp.name)
-                log_updates += f"\n  - ✅ Loaded `{artifact_name}`"
+    def render(self, ui_state: Dict[str, Any], force: bool = False) -> Optional[List[Any]]:
+        now = time.monotonic()
+        if not force and now - self._last_frame_at < self.interval:
+            return None
+        self._last_frame_at = now
+
+        frame = []
+        for key in UI_OUTPUT_KEYS:
+            value = ui_state[key]
+            if isinstance(value, (list, deque)):
+                value = list(value)
+            elif isinstance(value, dict):
+                value = dict(value)
+            if key in self._sent and self._sent[key] == value:
+                frame.append(gr.update())
             else:
-                log_updates += f"\n  - ⚠️ Could not load `{artifact_name}` (Status: {response.status_code})"
-        except Exception as e:
-            log_updates += f"\n  - ❌ Error loading `{artifact_name}`: {e}"
-    
-    # Fetch Audio
-    audio_filepath = None
-    log_updates += "\n* 🔊 Fetching audio artifact..."
-    url = f"{API_BASE_URL}/apps/{APP_NAME}/users/{user_id}/sessions/{session_id}/artifacts/podcast_episode.wav"
-    try:
-        response = requests.get(url, timeout=60)
-        if response.status_code == 200:
-            b64_data = response.json()['inlineData']['data']
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                tmp.write(base64.urlsafe_b64decode(b64_data))
-                audio_filepath = tmp.name
-            log_updates += "\n* ✅ **Audio Loaded Successfully!**"
-        else:
-            log_updates += f"\n* ⚠️ **Warning:** Could not fetch audio (Status: {response.status_code})."
-    except Exception as e:
-        log_updates += f"\n* ❌ **Error:** Failed to process audio artifact: {e}."
-        
-    return image_filepaths, audio_filepath, log_updates
+                self._sent[key] = value
+                frame.append(value)
+        return frame
+
+def dump_event_log(events: List[Dict]) -> Optional[str]:
+    """Writes the complete event list of the last run to a downloadable JSON file."""
+    if not events:
+        return None
+    return media_cache.store([json.dumps(events, indent=2).encode("utf-8")], suffix=".json")
+
+def gallery_entries(images: List[str], image_manifest: Optional[List[Dict]]) -> List[Optional[Dict]]:
+    """The manifest entry of each gallery image, matched by the content hash the media cache names files with."""
+    by_hash = {(entry.get("preview") or entry).get("sha256"): entry for entry in image_manifest or []}
+    return [by_hash.get(os.path.basename(path).split(".")[0]) for path in images]
+
+def open_full_image(user_id: str, session_id: str, entries: List[Optional[Dict]], evt: gr.SelectData) -> Optional[str]:
+    """Loads the full-resolution PNG of the gallery image the user selected."""
+    entry = entries[evt.index] if entries and evt.index < len(entries) else None
+    if not entry:
+        return None
+    filepath, log_update = fetch_full_image(user_id, session_id, entry)
+    if not filepath:
+        gr.Warning(log_update.strip(" -\n"))
+    return filepath
 
 # --- Main Gradio Pipeline Function ---
 
-def run_content_pipeline(user_query: str, user_id: str, session_id: str):
-    """The main function driving the Gradio UI updates."""
+# UI fields of each selectable text output, shown as not requested when it is left out
+OUTPUT_UI_KEYS = {"blog": "blog", "linkedin": "linkedin", "x": "x_post", "threads": "threads_post", "podcast": "podcast"}
+
+def run_content_pipeline(user_query: str, user_id: str, session_id: str, reuse_research: bool = False,
+                         outputs: Optional[List[str]] = None):
+    """The main function driving the Gradio UI updates.
+
+    With `reuse_research`, strategy and research are taken from a near-duplicate past
+    topic when the server's topic index has one. Only the selected `outputs` are
+    generated (all of them when none are selected).
+
+    Yields one value per entry of `UI_OUTPUT_KEYS`, followed by the full event list
+    for the on-demand dump. Events are coalesced into frames by `UIFrameCoalescer`.
+    """
     # Initialize UI state
     ui_state = {
         "blog": "", "linkedin": "", "x_post": "", "threads_post": "", "podcast": "", "audio": None, "images": [],
-        "execution_log": "### Agent Execution Flow\n", "tabs": gr.Tabs(selected=0), "raw_json": [], "strategy_brief": {},
-        "search_queries": "", "research_results": "", "dossier": "", "image_prompt": ""
+        "execution_log": "### Agent Execution Flow\n", "tabs": gr.Tabs(selected=0),
+        "raw_json": deque(maxlen=RAW_EVENT_PANE_SIZE), "strategy_brief": {},
+        "search_queries": "", "research_results": "", "dossier": "", "image_prompt": "",
+        "image_artifacts": [],  # Manifest entry of each gallery image, for loading its full resolution
     }
-    yield list(ui_state.values())
+    all_events: List[Dict] = []
+    frames = UIFrameCoalescer(UI_FRAME_INTERVAL)
+
+    def emit(force: bool = False) -> Optional[List[Any]]:
+        frame = frames.render(ui_state, force=force)
+        return frame + [all_events] if frame else None
+
+    yield emit(force=True)
 
     if not session_id:
         ui_state["execution_log"] += "\n* ❌ **Error:** Please create a session first."
-        yield list(ui_state.values())
+        yield emit(force=True)
         return
 
+    outputs = list(outputs or CONTENT_OUTPUTS)
+    for output, ui_key in OUTPUT_UI_KEYS.items():
+        if output not in outputs:
+            ui_state[ui_key] = "_Not requested for this run._"
+
     # Start the agent pipeline
-    run_payload = {"app_name": APP_NAME, "user_id": user_id, "session_id": session_id, "new_message": {"role": "user", "parts": [{"text": user_query}]}}
+    state_delta = {"requested_outputs": outputs}
+    if reuse_research:
+        state_delta["warm_start_mode"] = "auto"
+    run_payload = build_run_payload(user_query, user_id, session_id, state_delta=state_delta)
     processed_authors = set()
+    report_parser = ReportParser()
+    report_streamed = False
+    stream_stats = StreamStats()
+    image_manifest: Optional[List[Dict]] = None
+    # Events are read on a background thread; a finished audio part download wakes this loop up
+    events = WakeableStream(stream_agent_events(run_payload, stream_stats))
+    audio_parts = AudioPartFetcher(user_id, session_id, on_done=events.wake)
+
+    def play_ready_parts(wait: bool = False):
+        # The audio player streams: every part is sent in its own frame and appended to playback
+        for filepath, log_update in audio_parts.ready(wait=wait):
+            ui_state["execution_log"] += log_update
+            if filepath:
+                ui_state["audio"] = filepath
+            yield emit(force=True)
 
     # Stream events and update UI in real-time
-    for event in stream_agent_events(run_payload):
+    for event in events:
+        if event is None:
+            yield from play_ready_parts()
+            continue
         ui_state["raw_json"].append(event)
+        all_events.append(event)
         if event.get("error"):
             ui_state["execution_log"] += f"\n* ❌ **STREAM ERROR:** {event['error']}"
-            yield list(ui_state.values())
+            yield emit(force=True)
             return
 
         author = event.get('author')
@@ -144,39 +168,83 @@ def run_content_pipeline(user_query: str, user_id: str, session_id: str):
         # Update content from state deltas
         state_delta = event.get("actions", {}).get("stateDelta", {})
         if state_delta:
-            key_map = {
-                "image_prompt": "image_prompt", "blog_draft": "blog", "linkedin_draft": "linkedin",
-                "x_post_draft": "x_post", "threads_post_draft": "threads_post", "podcast_draft": "podcast",
-                "research_dossier": "dossier"
-            }
-            for key, ui_key in key_map.items():
+            for key, ui_key in DRAFT_STATE_KEYS.items():
                 if key in state_delta:
                     ui_state[ui_key] = state_delta[key]
             
+            for output in state_delta.get(DEPENDENCY_OUTPUTS_KEY) or []:
+                # Scheduled because a requested output needs it (e.g. the script behind the podcast audio)
+                if output in OUTPUT_UI_KEYS and output not in outputs:
+                    ui_state[OUTPUT_UI_KEYS[output]] = "_Generating: a requested output depends on it._"
+                    ui_state["execution_log"] += f"\n* 🔗 **{output}** runs as a dependency of the requested outputs"
+            if state_delta.get(IMAGE_MANIFEST_KEY):
+                image_manifest = state_delta[IMAGE_MANIFEST_KEY]
+            progress = state_delta.get(AUDIO_PROGRESS_KEY)
+            if progress:
+                audio_parts.submit(progress)
+                ui_state["execution_log"] += (f"\n* 🎧 **Podcast part {progress['part']}** ready "
+                                              f"({progress['segments_ready']}/{progress['segments']} segments)")
             if "content_brief" in state_delta:
-                try: ui_state["strategy_brief"] = json.loads(re.sub(r'```json\n|\n```', '', state_delta["content_brief"]).strip())
-                except json.JSONDecodeError: pass
-        
-        # Parse final report
-        if event.get('author') == "SynthesisAgent" and event.get('is_final_response'):
-            ui_state["execution_log"] += "\n* ✅ **Final Report Generated**"
-            parsed_report = parse_final_report(event['content']['parts'][0]['text'])
-            ui_state.update(parsed_report)
+                ui_state["strategy_brief"] = parse_content_brief(state_delta["content_brief"]) or ui_state["strategy_brief"]
+            if state_delta.get("critical_path"):
+                ui_state["execution_log"] += "\n* 🕸️ **Critical Path:** " + " → ".join(
+                    f"`{step['agent']}` ({step['duration_s']:.1f}s)" for step in state_delta["critical_path"])
+            warm_start = state_delta.get("warm_start")
+            if warm_start:
+                ui_state["execution_log"] += (
+                    f"\n* ♻️ **Reused research** from similar topic *{warm_start['matched_query']}* (similarity {warm_start['score']:.2f})"
+                    if warm_start["applied"] else
+                    f"\n* 💡 **Similar past topic:** *{warm_start['matched_query']}* (similarity {warm_start['score']:.2f}) "
+                    "was not reused because its numbers (e.g. the year) differ."
+                    if warm_start.get("reason") == "numbers_differ" else
+                    f"\n* 💡 **Similar past topic:** *{warm_start['matched_query']}* (similarity {warm_start['score']:.2f}). "
+                    "Tick **Reuse research** to skip strategy and research next time."
+                )
         
-        yield list(ui_state.values())
+        # Parse the final report, releasing each section as soon as its END marker arrives
+        if author == "SynthesisAgent" and event_text(event):
+            if event.get("partial"):
+                report_streamed = True
+                sections = report_parser.feed(event_text(event))
+            else:
+                # The closing event repeats the full text when partial chunks were streamed
+                sections = report_parser.close() if report_streamed else report_parser.feed(event_text(event))
+                sections.update(report_parser.close())
+                ui_state["execution_log"] += "\n* ✅ **Final Report Generated**"
+            ui_state.update(sections)
+            if sections.get("media_status"):
+                ui_state["execution_log"] += f"\n* 📦 **Media Status:**\n{sections['media_status']}"
+
+        yield from play_ready_parts()
+        frame = emit()
+        if frame:
+            yield frame
+    yield from play_ready_parts(wait=True)
+    stream = stream_stats.summary()
+    ui_state["execution_log"] += (
+        f"\n* 📡 **Stream:** {stream['events']} events, receive p50/p95 "
+        f"{stream['receive_p50_ms']:.0f}/{stream['receive_p95_ms']:.0f} ms, parse p95 {stream['parse_p95_ms']:.2f} ms, "
+        f"{stream['resumes']} resume(s)"
+    )
+    yield emit(force=True)  # Flush whatever the last throttled frame held back
 
-    # After stream, fetch generated media artifacts
-    images, audio, log_updates = fetch_media_artifacts(user_id, session_id)
-    ui_state["images"] = images
-    ui_state["audio"] = audio
-    ui_state["execution_log"] += log_updates
+    # After stream, fetch generated media artifacts; an episode that was streamed in parts is already playing
+    media_outputs = [output for output in outputs if output != "podcast_audio" or not audio_parts.started]
+    for images, audio, log_update in fetch_media_artifacts(user_id, session_id, media_outputs, image_manifest):
+        ui_state["images"] = images
+        ui_state["image_artifacts"] = gallery_entries(images, image_manifest)
+        if audio:
+            ui_state["audio"] = audio
+        ui_state["execution_log"] += log_update
+        yield emit(force=True)
     ui_state["execution_log"] += "\n\n🏁 **Pipeline Complete!**"
-    yield list(ui_state.values())
+    yield emit(force=True)
 
 
 # --- Gradio UI Definition ---
 # (The Gradio UI block remains largely the same, as it was already well-structured)
-with gr.Blocks(theme=gr.themes.Default(primary_hue="blue", secondary_hue="sky"), css="footer {display: none !important}") as demo:
+with gr.Blocks(theme=gr.themes.Default(primary_hue="blue", secondary_hue="sky"), css="footer {display: none !important}",
+               delete_cache=(GRADIO_CACHE_TTL, GRADIO_CACHE_TTL)) as demo:
     gr.Markdown("# 🤖 ADK Multi-Agent Content Factory")
     user_id_state, session_id_state = gr.State(), gr.State()
     with gr.Row():
@@ -196,6 +264,8 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="blue", secondary_hue="sky"),
                 """
             )
             query_input = gr.Textbox(label="Enter your content topic", placeholder="e.g., 'The future of AI'", interactive=False)
+            reuse_research_checkbox = gr.Checkbox(label="♻️ Reuse research from similar past topics", value=False)
+            outputs_checkboxes = gr.CheckboxGroup(label="Outputs to generate", choices=CONTENT_OUTPUTS, value=CONTENT_OUTPUTS)
             submit_button = gr.Button("Generate Content ✨", variant="primary", interactive=False)
             output_tabs = gr.Tabs(elem_id="output_tabs")
             with output_tabs:
@@ -205,25 +275,35 @@ with gr.Blocks(theme=gr.themes.Default(primary_hue="blue", secondary_hue="sky"),
                 with gr.TabItem("🧵 Threads Post", id=3): threads_output = gr.Markdown()
                 with gr.TabItem("▶️ Podcast Script", id=4): podcast_output = gr.Markdown()
                 with gr.TabItem("🖼️ Generated Images", id=5):
-                    image_gallery = gr.Gallery(label="Generated Images", columns=2, height="auto")
-                with gr.TabItem("🎤 Podcast Audio", id=6): audio_output = gr.Audio(label="Generated Podcast Episode", type="filepath")
+                    image_gallery = gr.Gallery(label="Generated Images (previews)", columns=2, height="auto", show_download_button=False)
+                    full_image_output = gr.Image(label="Full Resolution (select an image to load it)", type="filepath",
+                                                 interactive=False, show_download_button=True)
+                with gr.TabItem("🎤 Podcast Audio", id=6): audio_output = gr.Audio(label="Generated Podcast Episode", type="filepath", streaming=True, autoplay=True)
                 with gr.TabItem("🔬 Behind the Scenes", id=7):
                     with gr.Accordion("Content Strategy & Research", open=True):
                         gr.Markdown("#### Content Brief"); strategy_brief_output = gr.Json()
                         gr.Markdown("#### Final Research Dossier"); dossier_output = gr.Markdown()
                         gr.Markdown("#### Final Image Prompt"); image_prompt_output = gr.Markdown()
 
-    with gr.Accordion("Raw Server Response (Events JSON)", open=False): raw_json_output = gr.Json()
+    with gr.Accordion(f"Raw Server Response (Last {RAW_EVENT_PANE_SIZE} Events JSON)", open=False):
+        raw_json_output = gr.Json()
+        full_events_state = gr.State([])
+        image_artifacts_state = gr.State([])
+        dump_events_button = gr.Button("⬇️ Download Full Event Log", variant="secondary")
+        events_file_output = gr.File(label="Full Event Log", interactive=False)
 
     def handle_new_session_ui(uid, sid): return (gr.Textbox(interactive=True), gr.Button(interactive=True), {}) if uid and sid else (gr.Textbox(interactive=False), gr.Button(interactive=False), {})
     new_session_button.click(fn=create_new_session, outputs=[user_id_state, session_id_state, session_status_text]).then(
         fn=handle_new_session_ui, inputs=[user_id_state, session_id_state], outputs=[query_input, submit_button, raw_json_output])
     
-    submit_button.click(fn=run_content_pipeline, inputs=[query_input, user_id_state, session_id_state],
+    submit_button.click(fn=run_content_pipeline, inputs=[query_input, user_id_state, session_id_state, reuse_research_checkbox, outputs_checkboxes],
         outputs=[ blog_output, linkedin_output, x_output, threads_output, podcast_output, audio_output, image_gallery,
                   execution_log_output, output_tabs, raw_json_output, strategy_brief_output, 
-                  gr.Markdown(), gr.Markdown(), dossier_output, image_prompt_output ]) # Empty markdown to match outputs list
+                  gr.Markdown(), gr.Markdown(), dossier_output, image_prompt_output, # Empty markdown to match outputs list
+                  image_artifacts_state, full_events_state ])
+    image_gallery.select(fn=open_full_image, inputs=[user_id_state, session_id_state, image_artifacts_state], outputs=[full_image_output])
+    dump_events_button.click(fn=dump_event_log, inputs=[full_events_state], outputs=[events_file_output])
 
 if __name__ == "__main__":
     logger.info(f"Starting Gradio server on http://0.0.0.0:{GRADIO_SERVER_PORT}")
-    demo.launch(server_name="0.0.0.0", server_port=GRADIO_SERVER_PORT)
\ No newline at end of file
+    demo.launch(server_name="0.0.0.0", server_port=GRADIO_SERVER_PORT, allowed_paths=[MEDIA_CACHE_DIR])
\ No newline at end of file
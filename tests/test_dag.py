@@ -0,0 +1,109 @@
+"""Unit tests for the DAG orchestrator: planning, cycle rejection, the critical path and scheduling."""
+import asyncio
+from typing import Any, AsyncGenerator, List
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from content_generation_agent import constants as K
+from content_generation_agent.agents.dag import DagAgent, DagNode, requested_outputs
+
+class StepAgent(BaseAgent):
+    """Sleeps `delay` seconds, then writes "<name> done" to each of its keys."""
+    delay: float = 0.0
+    keys: List[str] = []
+    log: Any = None  # Shared list; `Any` stops pydantic from copying it
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if self.log is not None:
+            self.log.append(f"start {self.name}")
+        await asyncio.sleep(self.delay)
+        if self.log is not None:
+            self.log.append(f"end {self.name}")
+        yield Event(author=self.name, actions=EventActions(state_delta={key: f"{self.name} done" for key in self.keys}))
+
+def make_dag(log: List[str] = None, delays=None) -> DagAgent:
+    """research -> (blog, podcast -> audio), with the report always running last."""
+    delays, log = delays or {}, log if log is not None else []
+
+    def node(name, reads, writes, always=False):
+        return DagNode(StepAgent(name=name, delay=delays.get(name, 0.0), keys=list(writes), log=log), reads, writes, always)
+
+    return DagAgent(name="Dag", nodes=[
+        node("research", ["query"], ["dossier"]),
+        node("blog", ["dossier"], ["blog"]),
+        node("podcast", ["dossier"], ["script"]),
+        node("audio", ["script"], ["audio"]),
+        node("report", ["blog", "script", "audio"], ["report"], always=True),
+    ], outputs={"blog": ["blog"], "podcast_script": ["script"], "podcast_audio": ["audio"]})
+
+def names(nodes) -> List[str]:
+    return [node.agent.name for node in nodes]
+
+def test_plan_schedules_only_what_the_outputs_need():
+    dag = make_dag()
+    nodes, dependencies = dag.plan(frozenset({"blog"}))
+    assert names(nodes) == ["research", "blog", "report"]
+    assert dependencies == {"research": set(), "blog": {"research"}, "report": {"blog"}}
+
+def test_plan_pulls_in_transitive_dependencies_and_reports_them():
+    dag = make_dag()
+    outputs = frozenset({"podcast_audio"})
+    nodes, dependencies = dag.plan(outputs)
+    assert names(nodes) == ["research", "podcast", "audio", "report"]
+    assert dependencies["report"] == {"podcast", "audio"}
+    assert dag.dependency_outputs(outputs, nodes) == ["podcast_script"]
+
+def test_plans_are_cached_per_output_set():
+    dag = make_dag()
+    assert dag.plan(frozenset({"blog"})) is dag.plan(frozenset({"blog"}))
+
+def test_requested_outputs_falls_back_to_everything():
+    assert requested_outputs({K.STATE_REQUESTED_OUTPUTS: "blog, bogus"}, ["blog", "x_post"]) == {"blog"}
+    assert requested_outputs({K.STATE_REQUESTED_OUTPUTS: ["bogus"]}, ["blog", "x_post"]) == {"blog", "x_post"}
+    assert requested_outputs({}, ["blog"]) == {"blog"}
+
+def test_dependency_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        DagAgent(name="Cyclic", nodes=[
+            DagNode(StepAgent(name="a"), ["y"], ["x"]),
+            DagNode(StepAgent(name="b"), ["x"], ["y"]),
+            DagNode(StepAgent(name="c"), [], ["z"]),
+        ])
+
+def test_a_node_reading_its_own_output_is_not_a_cycle():
+    dag = DagAgent(name="Loop", nodes=[DagNode(StepAgent(name="a"), ["x"], ["x"])])
+    assert dag.plan(frozenset()) == ([], {})
+
+def test_critical_path_follows_the_dependency_that_finished_last():
+    timings = {"research": [0.0, 2.0], "blog": [2.0, 3.0], "podcast": [2.0, 5.0], "audio": [5.0, 9.0], "report": [9.0, 9.5]}
+    dependencies = {"research": set(), "blog": {"research"}, "podcast": {"research"}, "audio": {"podcast"},
+                    "report": {"blog", "podcast", "audio"}}
+    path = DagAgent.critical_path(timings, dependencies)
+    assert [step["agent"] for step in path] == ["research", "podcast", "audio", "report"]
+    assert path[-1]["end_s"] == 9.5 and path[2]["duration_s"] == 4.0
+    assert DagAgent.critical_path({}, {}) == []
+
+def test_run_starts_nodes_as_soon_as_their_dependencies_finish():
+    log: List[str] = []
+    dag = make_dag(log, delays={"blog": 0.2, "podcast": 0.05, "audio": 0.05})
+
+    async def scenario():
+        runner = InMemoryRunner(agent=dag, app_name="test")
+        session = await runner.session_service.create_session(
+            app_name="test", user_id="user", state={K.STATE_REQUESTED_OUTPUTS: ["blog", "podcast_audio"]})
+        message = types.Content(role="user", parts=[types.Part(text="go")])
+        async for _ in runner.run_async(user_id="user", session_id=session.id, new_message=message):
+            pass
+        return await runner.session_service.get_session(app_name="test", user_id="user", session_id=session.id)
+
+    session = asyncio.run(scenario())
+    # Audio only waits for the podcast script, not for the slower blog
+    assert log.index("start audio") < log.index("end blog")
+    assert log[-1] == "end report"
+    assert [step["agent"] for step in session.state[K.STATE_CRITICAL_PATH]] == ["research", "blog", "report"]
+    assert session.state[K.STATE_DEPENDENCY_OUTPUTS] == ["podcast_script"]
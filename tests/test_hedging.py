@@ -0,0 +1,101 @@
+"""Unit tests for hedged model calls: deadlines, the hedge budget and cancellation of the loser."""
+import asyncio
+
+from content_generation_agent.hedging import HedgePolicy
+
+def make_policy(**overrides) -> HedgePolicy:
+    options = {"agents": {"Writer"}, "percentile": 50, "budget_percent": 100, "min_samples": 5, "min_delay": 0.0}
+    policy = HedgePolicy(**{**options, **overrides})
+    for _ in range(100):
+        policy.histograms["Writer"].record(0.01)  # Deadline: the 50 ms bucket, however the tests add to it
+    return policy
+
+def attempts(delays, log):
+    """`make_attempt` whose nth attempt yields "attempt n" after `delays[n]` seconds and logs its fate."""
+    async def attempt(index: int):
+        try:
+            await asyncio.sleep(delays[index])
+            log.append(("done", index))
+            yield f"attempt {index}"
+        except asyncio.CancelledError:
+            log.append(("cancelled", index))
+            raise
+
+    count = 0
+
+    def make_attempt():
+        nonlocal count
+        count += 1
+        return attempt(count - 1)
+    return make_attempt
+
+async def collect(policy, agent, make_attempt, has_capacity=lambda: True):
+    return [item async for item in policy.run(agent, make_attempt, has_capacity)]
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    policy, log = make_policy(), []
+    assert policy.deadline("Writer") == 0.05
+    items = asyncio.run(collect(policy, "Writer", attempts([1.0, 0.0], log)))
+    assert items == ["attempt 1"]
+    assert ("cancelled", 0) in log
+    assert policy.metrics()["hedges"] == 1 and policy.metrics()["hedge_wins"] == 1
+
+def test_fast_primary_is_not_hedged():
+    policy, log = make_policy(), []
+    assert asyncio.run(collect(policy, "Writer", attempts([0.0], log))) == ["attempt 0"]
+    assert policy.metrics()["hedges"] == 0
+
+def test_no_deadline_without_enough_samples_or_for_other_agents():
+    assert make_policy(min_samples=500).deadline("Writer") is None
+    assert make_policy().deadline("Editor") is None
+    assert make_policy(enabled=False).deadline("Writer") is None
+
+def test_hedges_stay_within_the_budget():
+    policy = make_policy(budget_percent=25)
+
+    async def scenario():
+        for _ in range(8):
+            await collect(policy, "Writer", attempts([0.2, 0.0], []))
+
+    asyncio.run(scenario())
+    metrics = policy.metrics()
+    assert metrics["calls"] == 8
+    assert metrics["hedges"] == 2  # 25% of 8 calls
+    assert metrics["skipped_budget"] == 6
+
+def test_no_hedge_without_spare_capacity():
+    policy, log = make_policy(), []
+    items = asyncio.run(collect(policy, "Writer", attempts([0.1, 0.0], log), has_capacity=lambda: False))
+    assert items == ["attempt 0"]
+    assert policy.metrics()["hedges"] == 0 and policy.metrics()["skipped_capacity"] == 1
+
+def test_failed_attempt_falls_back_to_the_other_one():
+    policy = make_policy()
+
+    async def failing_primary():
+        await asyncio.sleep(0.1)
+        raise ConnectionError("reset")
+        yield
+
+    async def hedge():
+        await asyncio.sleep(0.2)
+        yield "hedge"
+
+    makers = iter([failing_primary, hedge])
+    assert asyncio.run(collect(policy, "Writer", lambda: next(makers)())) == ["hedge"]
+
+def test_cancelling_the_caller_cancels_every_attempt():
+    policy, log = make_policy(), []
+
+    async def scenario():
+        task = asyncio.ensure_future(collect(policy, "Writer", attempts([1.0, 1.0], log)))
+        await asyncio.sleep(0.1)  # Past the deadline, so both attempts are running
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert sorted(log) == [("cancelled", 0), ("cancelled", 1)]
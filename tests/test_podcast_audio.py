@@ -0,0 +1,93 @@
+"""Unit tests for podcast script segmentation, stitching and segment synthesis."""
+import asyncio
+import io
+import wave
+
+import pytest
+
+from content_generation_agent.podcast_audio import (
+    PodcastSynthesizer, SegmentRejected, silence, split_script, split_turns, stitch,
+)
+
+def make_script(turns: int) -> str:
+    return "\n".join(f"{'Alex' if i % 2 == 0 else 'Ben'}: Line number {i} talks about topic {i * 7}." for i in range(turns))
+
+def test_segments_respect_max_chars_and_keep_every_turn_in_order():
+    script = make_script(80)
+    segments = split_script(script, max_chars=300)
+    assert len(segments) > 1
+    assert all(len(segment) <= 300 for segment in segments)
+    assert "\n".join(segments).splitlines() == split_turns(script)
+
+def test_segments_only_break_at_turn_boundaries():
+    for segment in split_script(make_script(80), max_chars=300):
+        assert all(line.startswith(("Alex:", "Ben:")) for line in segment.splitlines())
+
+def test_long_turn_is_split_at_sentences_and_keeps_its_label():
+    turn = "Ben: " + " ".join(f"Sentence {i} is here." for i in range(40))
+    segments = split_script(turn, max_chars=120)
+    assert len(segments) > 1
+    assert all(segment.startswith("Ben: ") and len(segment) <= 120 for segment in segments)
+    assert all(segment.endswith(".") for segment in segments)
+
+def test_unlabeled_lines_join_the_turn_above():
+    assert split_turns("Alex: Hello\nand welcome.\n\nBen: Hi!") == ["Alex: Hello\nand welcome.", "Ben: Hi!"]
+
+def test_editing_one_line_leaves_distant_segments_unchanged():
+    lines = make_script(120).splitlines()
+    before = split_script("\n".join(lines), max_chars=400)
+    lines[60] = "Alex: A completely rewritten line in the middle of the episode."
+    after = split_script("\n".join(lines), max_chars=400)
+    assert len(set(before) & set(after)) >= len(before) - 3
+
+def test_empty_script_has_no_segments():
+    assert split_script("\n  \n") == []
+
+def test_stitch_inserts_pauses_between_segments_only():
+    pause = silence(10)
+    assert len(pause) == 24000 * 10 // 1000 * 2
+    assert stitch([b"ab", b"cd"], pause_ms=10) == b"ab" + pause + b"cd"
+    assert stitch([b"ab"], pause_ms=10) == b"ab"
+    assert stitch([b"ab", b"cd"]) == b"abcd"
+
+def test_stitch_drops_a_trailing_odd_byte_to_keep_samples_aligned():
+    assert stitch([b"abc", b"de"], pause_ms=0) == b"abde"
+
+def test_synthesize_streams_chunks_that_add_up_to_the_episode():
+    synthesizer = PodcastSynthesizer(max_chars=200, parallelism=3, pause_ms=5)
+    chunks = []
+
+    async def segment_audio(text: str) -> bytes:
+        await asyncio.sleep(0.001 * (len(text) % 5))
+        return text.encode("utf-8")[:len(text) // 2 * 2]
+
+    async def on_chunk(pcm: bytes, ready: int, total: int):
+        chunks.append(pcm)
+
+    wav, run = asyncio.run(synthesizer.synthesize(make_script(40), segment_audio, on_chunk=on_chunk))
+    with wave.open(io.BytesIO(wav)) as reader:
+        frames = reader.readframes(reader.getnframes())
+    assert frames == b"".join(chunks)
+    assert run["synthesized"] == run["segments"] > 1
+
+def test_failed_segment_is_retried_but_rejected_segment_is_not():
+    synthesizer = PodcastSynthesizer(retries=2, retry_base_seconds=0)
+    calls = []
+
+    async def flaky(text: str) -> bytes:
+        calls.append(text)
+        if len(calls) == 1:
+            raise ConnectionError("reset")
+        return b"\x01\x00"
+
+    _, run = asyncio.run(synthesizer.synthesize("Alex: Hi.", flaky))
+    assert run["retries"] == 1 and len(calls) == 2
+
+    async def refused(text: str) -> bytes:
+        calls.append(text)
+        raise SegmentRejected("blocked")
+
+    calls.clear()
+    with pytest.raises(SegmentRejected):
+        asyncio.run(synthesizer.synthesize("Alex: Hi.", refused))
+    assert len(calls) == 1
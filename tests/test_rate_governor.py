@@ -0,0 +1,91 @@
+"""Unit tests for the rate governor's token buckets, fair queuing and AIMD limits."""
+import asyncio
+
+import pytest
+
+from content_generation_agent.rate_governor import ModelLimiter, TokenBucket
+
+def test_take_is_capped_at_capacity_and_reports_the_charge():
+    bucket = TokenBucket(rate=10, capacity=20)
+    assert bucket.take(5) == 5
+    assert bucket.take(100) == 20
+    assert bucket.level == pytest.approx(-5, abs=0.1)
+
+def test_wait_time_for_oversized_amount_waits_for_a_full_bucket():
+    bucket = TokenBucket(rate=10, capacity=20)
+    bucket.take(20)
+    assert bucket.wait_time(1000) == pytest.approx(2.0, abs=0.05)
+    assert TokenBucket(rate=10, capacity=20).wait_time(1000) == 0.0
+
+def test_adjust_refunds_up_to_capacity_and_charges_into_debt():
+    bucket = TokenBucket(rate=10, capacity=20)
+    bucket.adjust(-50)
+    assert bucket.level == 20
+    bucket.adjust(30)
+    assert bucket.level == pytest.approx(-10, abs=0.1)
+
+def test_release_charges_oversized_calls_for_their_real_usage():
+    async def scenario():
+        limiter = ModelLimiter("model", rpm=6000, tpm=600, concurrency=4)  # Token bucket capacity 20
+        slot = await limiter.acquire("a", tokens=100)
+        assert slot.charged == 20
+        slot.tokens_used = 100
+        limiter.release(slot)
+        return limiter.tokens.level
+
+    assert asyncio.run(scenario()) == pytest.approx(-80, abs=0.5)
+
+def test_sessions_are_granted_round_robin():
+    async def scenario():
+        limiter = ModelLimiter("model", rpm=60000, tpm=10_000_000, concurrency=1)
+        order = []
+
+        async def call(session_id: str, label: str):
+            slot = await limiter.acquire(session_id, tokens=1)
+            order.append(label)
+            await asyncio.sleep(0)
+            limiter.release(slot)
+
+        held = await limiter.acquire("x", tokens=1)
+        calls = [asyncio.ensure_future(call(session_id, label))
+                 for session_id, label in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("b", "b2"))]
+        await asyncio.sleep(0)  # Everything queues behind the held slot
+        limiter.release(held)
+        await asyncio.gather(*calls)
+        return order
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "a2", "b2", "a3"]
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = ModelLimiter("model", rpm=60000, tpm=10_000_000, concurrency=1)
+        held = await limiter.acquire("a", tokens=1)
+        waiter = asyncio.ensure_future(limiter.acquire("b", tokens=1))
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+        limiter.release(held)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+def test_overload_halves_limits_once_per_cooldown_and_successes_recover():
+    async def scenario():
+        limiter = ModelLimiter("model", rpm=600, tpm=10_000_000, concurrency=8, cooldown_seconds=60)
+        for _ in range(2):
+            slot = await limiter.acquire("a", tokens=1)
+            slot.overloaded = True
+            limiter.release(slot)
+        halved = (limiter.factor, limiter.concurrency_limit, limiter.requests.rate)
+        slot = await limiter.acquire("a", tokens=1)
+        limiter.release(slot)
+        return halved, limiter.factor
+
+    (factor, concurrency, rate), recovered = asyncio.run(scenario())
+    assert factor == 0.5
+    assert concurrency == 4
+    assert rate == pytest.approx(600 / 60 * 0.5)
+    assert 0.5 < recovered <= 1.0
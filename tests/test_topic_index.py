@@ -0,0 +1,58 @@
+"""Unit tests for the near-duplicate topic index: thresholds, numbers, TTL and LRU eviction."""
+from content_generation_agent.topic_index import TopicIndex, numbers, shingles
+
+def make_index(**options) -> TopicIndex:
+    return TopicIndex(**{"lookup_budget_ms": 1000, **options})  # No budget cut-offs on a busy test machine
+
+QUERY = "How small businesses can use generative AI for customer support in 2025"
+
+def test_shingles_drop_stopwords_and_add_trigrams():
+    result = shingles("The AI of Support")
+    assert {"ai", "support", " ai", "ai ", "sup", "ort"} <= result
+    assert "the" not in result and "of" not in result
+
+def test_near_duplicate_matches_and_reports_numbers():
+    index = make_index(threshold=0.7)
+    index.add(QUERY, "brief", "dossier")
+    match = index.lookup(QUERY.replace("2025", "2026"))
+    assert match["query"] == QUERY
+    assert 0.7 <= match["score"] < 1.0
+    assert match["numbers_match"] is False
+    assert index.lookup(QUERY.lower())["numbers_match"] is True
+
+def test_unrelated_topic_does_not_match():
+    index = make_index(threshold=0.7)
+    index.add(QUERY, "brief", "dossier")
+    assert index.lookup("Sourdough baking schedules for busy parents") is None
+
+def test_threshold_decides_whether_a_similar_topic_matches():
+    similar = "How small businesses can use generative AI for customer service in 2025"
+    strict, loose = make_index(threshold=0.99), make_index(threshold=0.5)
+    for index in (strict, loose):
+        index.add(QUERY, "brief", "dossier")
+    assert strict.lookup(similar) is None
+    assert loose.lookup(similar)["content_brief"] == "brief"
+
+def test_expired_topics_are_not_reused():
+    index = make_index(ttl_seconds=-1)
+    index.add(QUERY, "brief", "dossier")
+    assert index.lookup(QUERY) is None
+
+def test_least_recently_used_topic_is_evicted():
+    index = make_index(max_entries=2)
+    topics = ["Electric cars battery recycling", "Remote work productivity tools", "Urban vertical farming startups"]
+    index.add(topics[0], "b0", "d0")
+    index.add(topics[1], "b1", "d1")
+    assert index.lookup(topics[0])  # Now the most recently used
+    index.add(topics[2], "b2", "d2")
+    assert index.lookup(topics[1]) is None
+    assert index.lookup(topics[0]) and index.lookup(topics[2])
+    assert index.metrics()["entries"] == 2 and index.metrics()["evictions"] == 1
+
+def test_incomplete_runs_are_not_stored():
+    index = make_index()
+    index.add(QUERY, "brief", "")
+    assert index.metrics()["entries"] == 0
+
+def test_numbers_are_extracted_as_tokens():
+    assert numbers("Top 10 AI tools of 2025, v1.5") == {"10", "2025", "1.5"}
@@ -0,0 +1,117 @@
+"""
+Prints where a session's time and tokens went, from the JSONL trace file written by the ADK server.
+
+The server writes the file only when `TRACE_ENABLED=1` and `TRACE_FILE` are set. Rotated files next to
+it (`<file>.1`, `<file>.2`, ...) are read as well, oldest first.
+
+For one session (by default the most recent in the file) it shows:
+
+- the critical path of its last run: starting from the root agent, the chain of
+  spans that each ended last before the next one started;
+- the top-N agents by total time, with their run count, model calls, cache hits,
+  tokens and retries.
+
+Usage:
+    python trace_report.py                                  # Latest session in TRACE_FILE
+    python trace_report.py /tmp/contentgen_traces.jsonl --session gradio-session-... --top 15
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+DEFAULT_TRACE_FILE = os.environ.get("TRACE_FILE")
+
+def read_spans(path: str) -> List[Dict]:
+    """Spans of `path` and of its rotated backups, oldest file first."""
+    backups = []
+    while os.path.exists(f"{path}.{len(backups) + 1}"):
+        backups.append(f"{path}.{len(backups) + 1}")
+    spans = []
+    for file in reversed([path] + backups):
+        if os.path.exists(file):
+            with open(file, encoding="utf-8") as f:
+                spans += [json.loads(line) for line in f if line.strip()]
+    return spans
+
+def critical_path(spans: List[Dict]) -> List[Dict]:
+    """Walks back from the end of the root span through the child that finished last before each cursor."""
+    children = defaultdict(list)
+    for span in spans:
+        children[span.get("parent_id")].append(span)
+    roots = children.get(None, [])
+    if not roots:
+        return []
+
+    path: List[Dict] = []
+
+    def walk(span: Dict, depth: int):
+        path.append({**span, "depth": depth})
+        steps, cursor = [], span["end"]
+        candidates = sorted(children.get(span["span_id"], []), key=lambda s: s["end"], reverse=True)
+        for child in candidates:
+            if child["end"] <= cursor + 1e-3:
+                steps.append(child)
+                cursor = child["start"]
+        for child in reversed(steps):
+            walk(child, depth + 1)
+
+    walk(max(roots, key=lambda s: s["end"]), 0)
+    return path
+
+def agent_totals(spans: List[Dict]) -> List[Dict]:
+    """Per-agent time, runs, and the model-call counts, tokens and retries of its own calls."""
+    totals: Dict[str, Dict] = defaultdict(lambda: {"seconds": 0.0, "runs": 0, "llm_calls": 0, "cache_hits": 0,
+                                                   "prompt_tokens": 0, "output_tokens": 0, "retries": 0})
+    for span in spans:
+        if span["kind"] == "agent":
+            totals[span["name"]]["seconds"] += span["duration_s"]
+            totals[span["name"]]["runs"] += 1
+        else:
+            agent = totals[span.get("agent") or span["name"]]
+            agent["retries"] += span.get("retries", 0)
+            if span["kind"] == "llm":
+                agent["llm_calls"] += 1
+                agent["cache_hits"] += bool(span.get("cache"))
+                agent["prompt_tokens"] += span.get("prompt_tokens") or 0
+                agent["output_tokens"] += span.get("output_tokens") or 0
+    return sorted(({"agent": name, **values} for name, values in totals.items() if values["runs"]),
+                  key=lambda row: row["seconds"], reverse=True)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show the critical path and slowest agents of a traced session.")
+    parser.add_argument("trace_file", nargs="?", default=DEFAULT_TRACE_FILE, help="JSONL trace file (default: TRACE_FILE).")
+    parser.add_argument("--session", help="Session ID to report on (default: the most recent one).")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest agents to list.")
+    args = parser.parse_args(argv)
+    if not args.trace_file:
+        parser.error("no trace file given and TRACE_FILE is not set (the server writes one only when it and TRACE_ENABLED=1 are set)")
+
+    spans = read_spans(args.trace_file)
+    if not spans:
+        print(f"No spans in {args.trace_file}.")
+        return 1
+    session = args.session or max(spans, key=lambda s: s["end"])["session_id"]
+    spans = [span for span in spans if span["session_id"] == session]
+    if not spans:
+        print(f"No spans for session {session}.")
+        return 1
+    last_trace = max(spans, key=lambda s: s["end"])["trace_id"]
+
+    print(f"Session {session} ({len(spans)} spans)\n\nCritical path of run {last_trace}:")
+    for step in critical_path([span for span in spans if span["trace_id"] == last_trace]):
+        label = step["name"] if step["kind"] == "agent" else f"{step['kind']}:{step['name']}"
+        iteration = f" #{step['iteration']}" if step.get("iteration", 1) not in (None, 1) else ""
+        print(f"  {'  ' * step['depth']}{label}{iteration}  {step['duration_s']:.2f}s")
+
+    print(f"\nTop {args.top} agents by total time:")
+    print(f"  {'agent':<32} {'seconds':>8} {'runs':>5} {'calls':>6} {'cached':>6} {'prompt tok':>10} {'output tok':>10} {'retries':>7}")
+    for row in agent_totals(spans)[:args.top]:
+        print(f"  {row['agent']:<32} {row['seconds']:>8.2f} {row['runs']:>5} {row['llm_calls']:>6} {row['cache_hits']:>6} "
+              f"{row['prompt_tokens']:>10} {row['output_tokens']:>10} {row['retries']:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())